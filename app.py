@@ -1,34 +1,21 @@
 import os
 import sys
+import bisect
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QTreeView, QSplitter, QLabel, QStatusBar,
                              QPlainTextEdit, QToolBar, QPushButton, QTabWidget, QTabBar,
-                             QFileIconProvider, QMenu, QFileDialog, QMessageBox)
-from PyQt6.QtGui import QAction, QIcon, QFileSystemModel, QColor, QPixmap, QPainter
-from PyQt6.QtCore import Qt, QDir, QSize, QPoint, QThread, pyqtSignal, QFileInfo
-from editor.editor_widget import ShellLiteEditor
+                             QFileIconProvider, QMenu, QFileDialog, QMessageBox, QInputDialog)
+from PyQt6.QtGui import QAction, QIcon, QColor, QPixmap, QPainter, QFont
+from PyQt6.QtCore import Qt, QDir, QSize, QPoint, QThread, QTimer, pyqtSignal, QFileInfo, QSettings
+from editor.console import OutputConsole
 from editor.styles import COLORS, STYLESHEET
-
-class EmojiFileSystemModel(QFileSystemModel):
-    def __init__(self):
-        super().__init__()
-        self.setIconProvider(QFileIconProvider())
-
-class FileLoaderThread(QThread):
-    loaded = pyqtSignal(str, str) 
-    error = pyqtSignal(str)
-
-    def __init__(self, path):
-        super().__init__()
-        self.path = path
-
-    def run(self):
-        try:
-            with open(self.path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            self.loaded.emit(content, self.path)
-        except Exception as e:
-            self.error.emit(str(e))
+from editor.workspace import shared_index
+from editor.loader import FileLoader, HEX_PREVIEW_BYTES
+from editor.saver import FileSaver
+from editor.documents import Document, DocumentRegistry
+from editor.tracing import tracer, traced, StallWatchdog, EXPORT_MINUTES, STALL_THRESHOLD_MS
+# QScintilla, the runner, the file tree, quick open and Find in Files are
+# imported where first used, so none of them delay the first paint
 
 class TitleBar(QWidget):
     def __init__(self, parent):
@@ -49,9 +36,14 @@ class TitleBar(QWidget):
         self.file_menu.addAction("New File", parent.new_file)
         self.file_menu.addAction("Open File...", parent.open_file)
         self.file_menu.addAction("Open Folder...", parent.open_folder)
+        self.file_menu.addAction("Exclude Patterns...", parent.edit_excludes)
+        quick_open_action = self.file_menu.addAction("Go to File...", parent.show_quick_open)
+        quick_open_action.setShortcut("Ctrl+P")
+        parent.addAction(quick_open_action)
         self.file_menu.addSeparator()
         self.file_menu.addAction("Save", parent.save_file)
         self.file_menu.addAction("Save As...", parent.save_as_file)
+        self.file_menu.addAction("Save All", parent.save_all)
         self.file_menu.addSeparator()
         self.file_menu.addAction("Exit", parent.close)
         self.btn_file.setMenu(self.file_menu)
@@ -68,9 +60,44 @@ class TitleBar(QWidget):
         self.edit_menu.addAction("Cut", parent.cut)
         self.edit_menu.addAction("Copy", parent.copy)
         self.edit_menu.addAction("Paste", parent.paste)
+        self.edit_menu.addSeparator()
+        find_action = self.edit_menu.addAction("Find in Files...", parent.show_find_in_files)
+        find_action.setShortcut("Ctrl+Shift+F")
+        parent.addAction(find_action)
+        goto_action = self.edit_menu.addAction("Go to Definition", parent.go_to_definition)
+        goto_action.setShortcut("F12")
+        parent.addAction(goto_action)
+        self.edit_menu.addSeparator()
+        fold_action = self.edit_menu.addAction("Fold All", parent.fold_all)
+        fold_action.setShortcut("Ctrl+Alt+[")
+        parent.addAction(fold_action)
+        unfold_action = self.edit_menu.addAction("Unfold All", parent.unfold_all)
+        unfold_action.setShortcut("Ctrl+Alt+]")
+        parent.addAction(unfold_action)
+        outline_action = self.edit_menu.addAction("Outline", parent.show_outline)
+        outline_action.setShortcut("Ctrl+Shift+O")
+        parent.addAction(outline_action)
         self.btn_edit.setMenu(self.edit_menu)
         self.layout.addWidget(self.btn_edit)
 
+        # Run Menu
+        self.btn_run_menu = QPushButton("Run")
+        self.setup_menu_btn(self.btn_run_menu)
+        self.run_menu = QMenu(self)
+        self.run_menu.setStyleSheet(f"background-color: {COLORS['bg_panel']}; color: {COLORS['text_main']}; border: 1px solid {COLORS['border']};")
+        self.run_menu.addAction("Run Script", parent.run_script)
+        self.run_menu.addAction("Run with Profiler", parent.run_with_profiler)
+        self.run_menu.addAction("Run All in Folder...", parent.run_all_in_folder)
+        self.run_menu.addAction("Stop", parent.stop_script)
+        self.run_menu.addSeparator()
+        self.warm_pool_action = self.run_menu.addAction("Use Warm Interpreter Pool")
+        self.warm_pool_action.setCheckable(True)
+        self.warm_pool_action.toggled.connect(parent.set_warm_pool)
+        self.run_menu.addSeparator()
+        self.run_menu.addAction("Export Performance Trace...", parent.export_trace)
+        self.btn_run_menu.setMenu(self.run_menu)
+        self.layout.addWidget(self.btn_run_menu)
+
         self.layout.addStretch()
         
         # Center Title
@@ -99,6 +126,27 @@ class TitleBar(QWidget):
         self.btn_run.clicked.connect(parent.run_script)
         self.layout.addWidget(self.btn_run)
 
+        # Stop Button
+        self.btn_stop = QPushButton("■ Stop")
+        self.btn_stop.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.btn_stop.setEnabled(False)
+        self.btn_stop.setStyleSheet(f"""
+            QPushButton {{
+                background-color: #e06c75; 
+                color: #1e1e1e; 
+                border: none; 
+                border-radius: 4px; 
+                padding: 6px 16px;
+                font-weight: bold;
+                font-size: 12px;
+            }}
+            QPushButton:hover {{ background-color: #f07f88; }}
+            QPushButton:pressed {{ background-color: #c85a63; }}
+            QPushButton:disabled {{ background-color: {COLORS['bg_panel']}; color: {COLORS['text_dim']}; }}
+        """)
+        self.btn_stop.clicked.connect(parent.stop_script)
+        self.layout.addWidget(self.btn_stop)
+
     def setup_menu_btn(self, btn):
         btn.setStyleSheet(f"""
             QPushButton {{
@@ -113,11 +161,14 @@ class TitleBar(QWidget):
         """)
 
 class ShellDeskWindow(QMainWindow):
+    startup_finished = pyqtSignal()
+
     def __init__(self):
         super().__init__()
         self.resize(1100, 750)
         self.setWindowTitle("ShellDesk Editor")
         self.setWindowIcon(QIcon("editor/icon.png")) # Placeholder if exists
+        self.settings = QSettings("ShellDesk", "ShellDesk")
         
         # Setup Central Widget
         central_widget = QWidget()
@@ -170,8 +221,8 @@ class ShellDeskWindow(QMainWindow):
         self.editor_splitter.addWidget(self.tabs)
 
         # Output Console
-        self.output_console = QPlainTextEdit()
-        self.output_console.setReadOnly(True)
+        self.output_console = OutputConsole()
+        self.output_console.open_full_output.connect(self.open_path)
         self.output_console.setPlaceholderText(">> Run output will appear here...")
         self.output_console.setStyleSheet(f"background-color: {COLORS['bg_dark']}; color: {COLORS['text_main']}; border-top: 1px solid {COLORS['border']}; font-family: 'Consolas', monospace; padding: 10px;")
         self.editor_splitter.addWidget(self.output_console)
@@ -193,62 +244,306 @@ class ShellDeskWindow(QMainWindow):
         
         self.statusBar().addWidget(self.status_label)
         self.statusBar().setStyleSheet(f"background-color: {COLORS['status_bg_dark']}; border-top: 1px solid {COLORS['border']}; color: white;")
+        # Event-loop latency, fed by the stall watchdog once startup is done
+        self.latency_label = QLabel("")
+        self.latency_label.setStyleSheet(f"color: {COLORS['text_dim']}; font-size: 11px; padding: 0 10px;")
+        self.latency_label.setToolTip("Worst GUI event-loop delay over the last second")
+        self.statusBar().addPermanentWidget(self.latency_label)
+        self.watchdog = None
         
-        self.open_files = {}
+        # Open tabs by path and by widget; also decides which tabs hibernate
+        self.documents = DocumentRegistry()
+        self.pending_jumps = {}
+        self.large_loads = {}
+        # Saves in flight, keyed by save id
+        self.file_saver = FileSaver(self)
+        self.file_saver.saved.connect(self.on_file_saved)
+        self.file_saver.failed.connect(self.on_file_save_failed)
+        self.saves = {}
+        self.save_batch = None
+        # Open files changed by something else, created with the first one opened
+        self.change_watcher = None
+        self.file_loader = FileLoader(self)
+        self.file_loader.loaded.connect(self.on_file_loaded)
+        self.file_loader.error.connect(self.on_file_error)
+        self.file_loader.binary.connect(self.on_binary_file)
+        self.file_loader.large_started.connect(self.on_large_file_started)
+        self.file_loader.chunk.connect(self.on_large_file_chunk)
+        self.file_loader.large_finished.connect(self.on_large_file_finished)
+        self.file_loader.prefetched.connect(self.on_prefetched)
+        # Restored tabs still to be read ahead, nearest the current one first
+        self.prefetch_queue = []
+        self.prefetch_pending = set()
+        self.restore_queue = []
+        self.restore_added = []
+
+        # Workspace file paths for Ctrl+P, built on first use
+        self.path_index = None
+        self.quick_open = None
+        self.find_panel = None
+        self.outline_panel = None
+        self.suite_panel = None
+        self.profile_panel = None
+        self.profile_run = None
+        # The profiled document and the per-line costs shown in its margin,
+        # put back whenever its editor is rebuilt after hibernating
+        self.profiled_document = None
+        self.profile_margin = None
+
+        # Workspace symbol index, built when a folder is opened
+        self.workspace_index = shared_index()
+        self.workspace_index.ready.connect(self.on_workspace_indexed)
+
+        # Script runs in flight, keyed by run id
+        self.runs = {}
+        self.next_run_id = 1
+        self.warm_pool = None
+        self.run_clock = QTimer(self)
+        self.run_clock.setInterval(100)
+        self.run_clock.timeout.connect(self.update_run_status)
+        self.started = False
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.started:
+            # The window is on screen; build the rest on the next turn of the event loop
+            self.started = True
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        if self.file_model is not None:
+            return
+        self.populate_sidebar()
+        self.restore_session()
+        self.watchdog = StallWatchdog(parent=self)
+        self.watchdog.latency.connect(self.on_loop_latency)
+        self.watchdog.stalled.connect(self.on_stall)
+        self.watchdog.start()
+        self.startup_finished.emit()
+
+    def closeEvent(self, event):
+        self.save_session()
+        super().closeEvent(event)
+
+    def save_session(self):
+        from editor.session import save_session
+        if self.file_model is None:
+            # Closed before the previous session was even restored
+            return
+        tabs = []
+        current = None
+        for index in range(self.tabs.count()):
+            document = self.documents.for_widget(self.tabs.widget(index))
+            if document is None:
+                continue
+            if document.hibernated:
+                cursor, first_line = document.cursor, document.first_line
+                text = document.text() if document.modified else None
+            elif document.is_editor() and not document.widget.large_file:
+                editor = document.widget
+                cursor, first_line = editor.getCursorPosition(), editor.firstVisibleLine()
+                text = editor.text() if editor.isModified() or document.path is None else None
+            else:
+                # Binary previews and large files are cheap to reopen by hand
+                continue
+            if document.path is None and not text:
+                continue
+            if index == self.tabs.currentIndex():
+                current = len(tabs)
+            tabs.append((document.path, cursor, first_line, text))
+        save_session(self.settings, self.file_model.root.path, tabs, current)
+
+    def restore_session(self):
+        # Every tab comes back as a placeholder; only the current one is
+        # loaded now, the rest when focused or read ahead in the background.
+        # Placeholders go in a batch per turn of the event loop, current tab
+        # first, since inserting many styled tabs at once is itself slow.
+        from editor.session import load_session, read_backup
+        from editor.loader import LARGE_FILE_BYTES
+        session = load_session(self.settings)
+        if session is None:
+            return
+        root = session.get("root")
+        if root and os.path.isdir(root) and root != self.file_model.root.path:
+            self.open_workspace(root)
+        restored = []
+        for i, entry in enumerate(session.get("tabs", [])):
+            path = entry.get("path")
+            content = read_backup(entry["hash"]) if entry.get("hash") else None
+            if path is None and content is None:
+                continue
+            if path is not None and content is None:
+                try:
+                    if os.path.getsize(path) >= LARGE_FILE_BYTES:
+                        continue
+                except OSError:
+                    continue
+            document = Document(path, QWidget())
+            document.defer(entry.get("cursor", (0, 0)), entry.get("first_line", 0), content)
+            restored.append((i, document))
+        current = session.get("current") or 0
+        restored.sort(key=lambda item: abs(item[0] - current))
+        self.restore_queue = restored
+        self.restore_added = []
+        if restored:
+            self.restore_tabs()
+            # The placeholders paint first; then the current tab loads
+            QTimer.singleShot(0, lambda: self.on_tab_changed(self.tabs.currentIndex()))
+
+    def restore_tabs(self):
+        from editor.session import RESTORE_TAB_BATCH
+        batch = self.restore_queue[:RESTORE_TAB_BATCH]
+        del self.restore_queue[:RESTORE_TAB_BATCH]
+        self.tabs.blockSignals(True)
+        for i, document in batch:
+            if document.path is not None and self.documents.for_path(document.path):
+                # Opened by hand in the meantime
+                continue
+            # Placed among the restored tabs already shown, in session order
+            position = bisect.bisect(self.restore_added, i)
+            self.restore_added.insert(position, i)
+            self.documents.add(document)
+            self.watch_file(document.path)
+            title = os.path.basename(document.path) if document.path else "Untitled.shl"
+            self.tabs.insertTab(position, document.widget, title + ("*" if document.modified else ""))
+        self.tabs.blockSignals(False)
+        if self.restore_queue:
+            QTimer.singleShot(0, self.restore_tabs)
+        else:
+            self.queue_prefetch()
+
+    def queue_prefetch(self):
+        current = self.tabs.currentIndex()
+        waiting = []
+        for index in range(self.tabs.count()):
+            document = self.documents.for_widget(self.tabs.widget(index))
+            if document is not None and document.hibernated and document.packed is None and document.path:
+                waiting.append((abs(index - current), document.path))
+        waiting.sort()
+        from editor.session import PREFETCH_MAX_FILES
+        self.prefetch_queue = [path for _, path in waiting[:PREFETCH_MAX_FILES]]
+        self.prefetch_next()
+
+    def prefetch_next(self):
+        from editor.session import PREFETCH_BATCH
+        if self.prefetch_pending:
+            return
+        while self.prefetch_queue and len(self.prefetch_pending) < PREFETCH_BATCH:
+            path = self.prefetch_queue.pop(0)
+            if self.file_loader.prefetch(path):
+                self.prefetch_pending.add(path)
+
+    def on_prefetched(self, path):
+        self.prefetch_pending.discard(path)
+        self.prefetch_next()
+
+    def on_loop_latency(self, ms):
+        color = COLORS['text_dim'] if ms < STALL_THRESHOLD_MS else "#e06c75"
+        self.latency_label.setStyleSheet(f"color: {color}; font-size: 11px; padding: 0 10px;")
+        self.latency_label.setText(f"Loop {ms:.0f} ms")
+
+    def on_stall(self, ms, stack):
+        self.status_label.setText(f" UI stalled for {ms:.0f} ms (Run > Export Performance Trace for details) ")
+
+    def export_trace(self):
+        minutes, ok = QInputDialog.getInt(self, "Export Performance Trace",
+                                          "Export the last N minutes:", EXPORT_MINUTES, 1, 24 * 60)
+        if not ok:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Export Performance Trace", "shelldesk-trace.json",
+                                              "Trace Files (*.json);;All Files (*)")
+        if not path:
+            return
+        try:
+            count = tracer().export(path, minutes)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Could not export trace: {e}")
+            return
+        self.status_label.setText(f" Exported {count} trace events to {os.path.basename(path)} (open in ui.perfetto.dev) ")
 
     def setup_sidebar(self):
+        # Only the container; the tree is filled in once the window has painted
         self.sidebar_container = QWidget()
-        layout = QVBoxLayout(self.sidebar_container)
-        layout.setContentsMargins(0, 0, 0, 0)
-        
-        self.file_model = EmojiFileSystemModel()
-        self.file_model.setRootPath(QDir.rootPath())
+        self.sidebar_layout = QVBoxLayout(self.sidebar_container)
+        self.sidebar_layout.setContentsMargins(0, 0, 0, 0)
+        self.file_model = None
+
+    def populate_sidebar(self):
+        from editor.filetree import FileTreeModel
+        # Rooted at the workspace and listed lazily, never at the filesystem root
+        self.file_model = FileTreeModel(self)
+        self.file_model.set_excludes(self.settings.value("tree/exclude", [], type=list))
+        self.file_model.set_root(os.getcwd())
         
         self.tree_view = QTreeView()
         self.tree_view.setModel(self.file_model)
-        self.tree_view.setRootIndex(self.file_model.index(os.getcwd()))
+        self.tree_view.setUniformRowHeights(True)
         
         # Styling
         self.tree_view.setHeaderHidden(True)
         self.tree_view.setAnimated(True)
         self.tree_view.setIndentation(20)
-        
-        # Hide standard columns (Size, Type, Date) - keep Name
-        for i in range(1, 4):
-            self.tree_view.setColumnHidden(i, True)
             
         self.tree_view.clicked.connect(self.on_file_clicked)
-        layout.addWidget(self.tree_view)
+
+        # Find in Files goes under the tree when first used
+        self.sidebar_splitter = QSplitter(Qt.Orientation.Vertical)
+        self.sidebar_splitter.addWidget(self.tree_view)
+        self.sidebar_layout.addWidget(self.sidebar_splitter)
 
     def close_tab(self, index):
         widget = self.tabs.widget(index)
-        path_to_remove = None
-        for path, w in self.open_files.items():
-            if w == widget:
-                path_to_remove = path
-                break
+        document = self.documents.for_widget(widget)
+        path_to_remove = document.path if document else None
+        if document:
+            self.documents.remove(document)
+            # A save still running finishes on its own; its tab is gone
+            for save_id in [save_id for save_id, entry in self.saves.items() if entry[0] is document]:
+                del self.saves[save_id]
         if path_to_remove:
-            del self.open_files[path_to_remove]
+            self.unwatch_file(path_to_remove)
+            if path_to_remove in self.large_loads:
+                # Closed while still streaming in
+                del self.large_loads[path_to_remove]
+                self.file_loader.cancel(path_to_remove)
+            else:
+                # Reopening it soon comes straight from the loader cache
+                self.file_loader.touch(path_to_remove)
         self.tabs.removeTab(index)
+        if document is not None and document is self.profiled_document:
+            self.profiled_document = None
+            self.profile_margin = None
+        widget.deleteLater()
 
     def on_tab_changed(self, index):
         if index == -1:
             self.status_label.setText(" Ready ")
+            if self.outline_panel is not None:
+                self.outline_panel.set_editor(None)
             return
         
-        widget = self.tabs.widget(index)
-        current_path = None
-        for path, w in self.open_files.items():
-            if w == widget:
-                current_path = path
-                break
-        
-        if current_path:
+        document = self.documents.for_widget(self.tabs.widget(index))
+        if document:
+            if document.hibernated:
+                self.materialize(document)
+            self.documents.touch(document)
+            self.hibernate_idle()
+        if self.outline_panel is not None:
+            self.outline_panel.set_editor(self.get_current_editor())
+        self.update_editing_status()
+
+    def update_editing_status(self):
+        document = self.documents.for_widget(self.tabs.currentWidget())
+        current_path = document.path if document else None
+        if self.tabs.currentIndex() == -1:
+            self.status_label.setText(" Ready ")
+        elif current_path:
             self.status_label.setText(f" Editing: {os.path.basename(current_path)} ")
         else:
             self.status_label.setText(" Editing: Untitled ")
 
     def get_current_editor(self):
+        from editor.editor_widget import ShellLiteEditor
         widget = self.tabs.currentWidget()
         if isinstance(widget, ShellLiteEditor):
             return widget
@@ -274,70 +569,235 @@ class ShellDeskWindow(QMainWindow):
         editor = self.get_current_editor()
         if editor: editor.paste()
 
+    def go_to_definition(self):
+        editor = self.get_current_editor()
+        if not editor:
+            return
+        line, col = editor.getCursorPosition()
+        word = editor.wordAtLineIndex(line, col)
+        if not word:
+            return
+        # The current document wins over the rest of the workspace
+        for def_line, symbols in enumerate(editor.symbol_index.line_symbols):
+            if word in symbols:
+                self.jump_to_line(editor, def_line)
+                return
+        hits = self.workspace_index.find_definition(word)
+        if not hits:
+            self.status_label.setText(f" No definition found for: {word} ")
+            return
+        path, def_line = hits[0]
+        self.open_at(path, def_line)
+
+    def open_at(self, path, line, column=0):
+        path = os.path.abspath(path)
+        document = self.documents.for_path(path)
+        if document:
+            self.tabs.setCurrentWidget(document.widget)
+            if document.is_editor():
+                self.jump_to_line(document.widget, line, column)
+        else:
+            self.pending_jumps[path] = (line, column)
+            self.open_path(path)
+
+    def jump_to_line(self, editor, line, column=0):
+        editor.setCursorPosition(line, column)
+        editor.ensureLineVisible(line)
+        editor.setFocus()
+
+    def on_workspace_indexed(self, file_count, reindexed):
+        root = self.workspace_index.root
+        self.status_label.setText(f" Workspace: {root} ({file_count} scripts indexed, {reindexed} updated) ")
+
     def run_script(self):
+        from editor.editor_widget import ShellLiteEditor
+        from editor.runner import ScriptRun
         current_editor = self.tabs.currentWidget()
         if not current_editor or not isinstance(current_editor, ShellLiteEditor):
-            self.output_console.appendPlainText("Error: No active script to run.\n")
+            self.append_output("Error: No active script to run.\n")
             return
 
-        self.output_console.clear()
-        self.output_console.appendPlainText(">> Executing script...\n")
-        
-        script_content = current_editor.text()
-        temp_path = os.path.join(os.getcwd(), "temp_script.shl") 
-        
-        try:
-            with open(temp_path, "w", encoding="utf-8") as f:
-                f.write(script_content)
-        except Exception as e:
-            self.output_console.appendPlainText(f"Error saving temp file: {e}")
+        if not self.runs:
+            self.output_console.clear()
+        run_id = self.next_run_id
+        self.next_run_id += 1
+        self.append_output(f">> [run {run_id}] Executing script...\n")
+
+        run = ScriptRun(run_id, current_editor.text(), os.getcwd(), self.warm_pool, self)
+        run.output.connect(self.on_run_output)
+        run.errors.connect(self.on_run_output)
+        run.finished.connect(self.on_run_finished)
+        run.failed.connect(self.on_run_failed)
+        self.runs[run_id] = run
+        run.start()
+        if run_id in self.runs:
+            # Not when it failed to start; that already ended it
+            self.title_bar.btn_stop.setEnabled(True)
+            self.run_clock.start()
+        self.update_run_status()
+
+    def set_warm_pool(self, enabled):
+        from editor.runner import WarmPool
+        if enabled and self.warm_pool is None:
+            self.warm_pool = WarmPool(parent=self)
+            self.warm_pool.fill()
+        elif not enabled and self.warm_pool is not None:
+            self.warm_pool.shutdown()
+            self.warm_pool = None
+
+    def stop_script(self):
+        for run in self.runs.values():
+            run.stop()
+        if self.suite_panel is not None:
+            self.suite_panel.stop()
+        if self.profile_run is not None:
+            self.profile_run.stop()
+
+    def run_all_in_folder(self):
+        from editor.suite import SuiteOptionsDialog, SuiteResultsPanel
+        dialog = SuiteOptionsDialog(self.settings, self)
+        if not dialog.exec():
             return
+        pattern, workers, timeout = dialog.options()
+        if self.suite_panel is None:
+            self.suite_panel = SuiteResultsPanel()
+            self.suite_panel.open_script.connect(self.open_path)
+            self.editor_splitter.addWidget(self.suite_panel)
+        self.suite_panel.show()
+        self.suite_panel.start(self.file_model.root.path, self.file_model.excludes, pattern, workers, timeout)
 
-        import subprocess
-        env = os.environ.copy()
-        
-        # Fix PYTHONPATH to include the 'shell-lite' directory so 'shell_lite' module can be imported
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        # Append 'shell-lite' to PYTHONPATH
-        shell_lite_path = os.path.join(project_root, "shell-lite")
-        env["PYTHONPATH"] = shell_lite_path + os.pathsep + env.get("PYTHONPATH", "")
-        
-        # Using shell_lite.main instead of shell_lite.src.main
-        cmd = [sys.executable, "-m", "shell_lite.main", temp_path]
+    def run_with_profiler(self):
+        from editor.profiler import ProfileRun, ProfilePanel
+        editor = self.get_current_editor()
+        if editor is None:
+            self.append_output("Error: No active script to run.\n")
+            return
+        if self.profile_run is not None and self.profile_run.is_running():
+            self.append_output("A profiled run is already in progress.\n")
+            return
+        if self.profile_panel is None:
+            self.profile_panel = ProfilePanel()
+            self.profile_panel.open_line.connect(self.on_profile_line)
+            self.profile_panel.close_button.clicked.connect(self.clear_profile)
+            self.editor_splitter.addWidget(self.profile_panel)
+        self.clear_profile()
+        document = self.documents.for_widget(editor)
+        path = document.path if document else None
+        self.profiled_document = document
+        if not self.runs:
+            self.output_console.clear()
+        self.append_output(">> Profiling script...\n")
+        self.profile_panel.start(path)
+        self.profile_panel.show()
+        self.profile_run = ProfileRun(editor.text(), os.getcwd(), path, self)
+        self.profile_run.output.connect(self.append_output)
+        self.profile_run.done.connect(self.on_profile_done)
+        self.profile_run.failed.connect(self.on_profile_failed)
+        run = self.profile_run
+        run.start()
+        if self.profile_run is run:
+            # Not when it failed to start; that already ended it
+            self.title_bar.btn_stop.setEnabled(True)
 
-        try:
-            process = subprocess.Popen(
-                cmd, 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE, 
-                text=True,
-                cwd=os.getcwd(),
-                env=env,
-                creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-            )
-            
-            stdout, stderr = process.communicate()
-            
-            if stdout:
-                self.output_console.appendPlainText(stdout)
-            if stderr:
-                self.output_console.appendPlainText("Errors:\n" + stderr)
-                
-            self.output_console.appendPlainText(f"\n[Exited with code {process.returncode}]")
-            
-        except Exception as e:
-            self.output_console.appendPlainText(f"Execution failed: {e}")
-            
-        if os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-            except:
-                pass
+    def on_profile_done(self, profile):
+        run = self.sender()
+        if run is not self.profile_run:
+            return
+        self.profile_run = None
+        run.deleteLater()
+        if not self.runs:
+            self.title_bar.btn_stop.setEnabled(False)
+        if profile is None:
+            self.append_output("\n[profile] The run ended before anything was recorded\n")
+            self.profile_panel.status.setText("No profile recorded")
+            return
+        state = "stopped" if profile["stopped"] else f"exited with code {profile['exit_code']}"
+        self.append_output(f"\n[profile] {state} in {profile['wall_s']:.2f}s, saved to {profile['file']}\n")
+        if self.profiled_document is not None:
+            self.profile_margin = (profile["lines"], profile["run_s"])
+            self.show_profile_margin(self.profiled_document)
+        self.profile_panel.show_profile(profile)
+
+    def on_profile_failed(self, message):
+        run = self.sender()
+        if run is not self.profile_run:
+            return
+        self.profile_run = None
+        run.deleteLater()
+        if not self.runs:
+            self.title_bar.btn_stop.setEnabled(False)
+        self.append_output(f"[profile] {message}\n")
+        self.profile_panel.status.setText(message)
+
+    def show_profile_margin(self, document):
+        # A hibernated tab gets its margin when it is materialized again
+        if document is self.profiled_document and self.profile_margin is not None and document.is_editor():
+            document.widget.show_profile(*self.profile_margin)
+
+    def on_profile_line(self, line):
+        document = self.profiled_document
+        if document is not None:
+            # Materializes the tab if it was hibernated
+            self.tabs.setCurrentWidget(document.widget)
+            self.jump_to_line(document.widget, line)
+
+    def clear_profile(self):
+        document = self.profiled_document
+        if document is not None and self.profile_margin is not None and document.is_editor():
+            document.widget.clear_profile()
+        self.profile_margin = None
+
+    def append_output(self, text):
+        self.output_console.write(text)
+
+    def on_run_output(self, run_id, text):
+        self.append_output(text)
+
+    def on_run_finished(self, run_id, exit_code, elapsed):
+        run = self.runs.pop(run_id, None)
+        note = ""
+        if run is not None:
+            # Latency readout, to compare cold and warm starts
+            note = f" ({'warm' if run.warm else 'cold'}"
+            if run.first_output is not None:
+                note += f", first output after {run.first_output:.3f}s"
+            note += ", stopped)" if run.stopped else ")"
+        self.append_output(f"\n[run {run_id}] Exited with code {exit_code} in {elapsed:.2f}s{note}\n")
+        self.on_run_done(run)
+
+    def on_run_failed(self, run_id, message):
+        run = self.runs.pop(run_id, None)
+        self.append_output(f"[run {run_id}] {message}\n")
+        self.on_run_done(run)
+
+    def on_run_done(self, run):
+        if run is not None:
+            run.deleteLater()
+        if not self.runs:
+            self.title_bar.btn_stop.setEnabled(False)
+            self.run_clock.stop()
+        self.update_run_status()
+
+    def update_run_status(self):
+        self.title_bar.btn_stop.setEnabled(bool(self.runs) or self.profile_run is not None)
+        if not self.runs:
+            self.update_editing_status()
+            return
+        longest = max(run.elapsed() for run in self.runs.values())
+        self.status_label.setText(f" Running {len(self.runs)} script(s)... {longest:.1f}s ")
 
     def on_file_clicked(self, index):
         if not index: 
              return
-        path = self.file_model.filePath(index)
+        if self.file_model.is_more(index):
+            self.file_model.load_more(index)
+            return
+        self.open_path(self.file_model.file_path(index))
+
+    def open_path(self, path):
+        if not path:
+            return
+        path = os.path.abspath(path)
         
         if os.path.isdir(path):
             # If user clicked a folder, maybe expand/collapse (default behavior)
@@ -345,31 +805,103 @@ class ShellDeskWindow(QMainWindow):
             return
 
         if os.path.isfile(path):
-            if path in self.open_files:
-                self.tabs.setCurrentWidget(self.open_files[path])
+            document = self.documents.for_path(path)
+            if document:
+                self.tabs.setCurrentWidget(document.widget)
                 self.status_label.setText(f" Switched to: {os.path.basename(path)} ")
                 return
             
             self.status_label.setText(f" Loading: {os.path.basename(path)}... ")
-            self.loader_thread = FileLoaderThread(path)
-            self.loader_thread.loaded.connect(self.on_file_loaded)
-            self.loader_thread.error.connect(self.on_file_error)
-            self.loader_thread.start()
+            self.file_loader.load(path)
 
+    @traced("load.display")
     def on_file_loaded(self, content, path):
+        from editor.editor_widget import ShellLiteEditor
+        if self.documents.for_path(path):
+            return
+        from editor.diagnostics import checks_syntax
         new_editor = ShellLiteEditor()
+        new_editor.set_diagnostics_enabled(checks_syntax(path))
         new_editor.setText(content)
+        new_editor.setModified(False)
+        self.track_dirty(new_editor)
+        self.documents.add(Document(path, new_editor))
+        self.watch_file(path)
         filename = os.path.basename(path)
         index = self.tabs.addTab(new_editor, filename)
         self.tabs.setCurrentIndex(index)
-        self.open_files[path] = new_editor
         self.status_label.setText(f" Editing: {filename} ")
+        if path in self.pending_jumps:
+            self.jump_to_line(new_editor, *self.pending_jumps.pop(path))
+
+    def on_large_file_started(self, path, size):
+        from PyQt6.Qsci import QsciScintilla
+        from editor.editor_widget import ShellLiteEditor
+        if self.documents.for_path(path):
+            self.file_loader.cancel(path)
+            return
+        new_editor = ShellLiteEditor()
+        new_editor.enable_large_file_mode()
+        # Appending chunk by chunk must not build an undo history of the whole file
+        new_editor.SendScintilla(QsciScintilla.SCI_SETUNDOCOLLECTION, 0)
+        new_editor.setReadOnly(True)
+        self.track_dirty(new_editor)
+        self.documents.add(Document(path, new_editor))
+        self.watch_file(path)
+        filename = os.path.basename(path)
+        index = self.tabs.addTab(new_editor, filename)
+        self.tabs.setCurrentIndex(index)
+        self.large_loads[path] = (new_editor, size)
+        self.status_label.setText(f" Loading: {filename}... 0% ")
+
+    def on_large_file_chunk(self, path, text, done):
+        if path not in self.large_loads:
+            return
+        editor, size = self.large_loads[path]
+        editor.setReadOnly(False)
+        editor.append(text)
+        editor.setReadOnly(True)
+        self.file_loader.chunk_taken(path)
+        if self.tabs.currentWidget() is editor:
+            percent = min(100, done * 100 // max(size, 1))
+            self.status_label.setText(f" Loading: {os.path.basename(path)}... {percent}% ")
+
+    def on_large_file_finished(self, path):
+        from PyQt6.Qsci import QsciScintilla
+        if path not in self.large_loads:
+            return
+        editor, size = self.large_loads.pop(path)
+        editor.setReadOnly(False)
+        editor.SendScintilla(QsciScintilla.SCI_SETUNDOCOLLECTION, 1)
+        editor.SendScintilla(QsciScintilla.SCI_EMPTYUNDOBUFFER)
+        editor.setModified(False)
+        if self.tabs.currentWidget() is editor:
+            self.status_label.setText(f" Editing: {os.path.basename(path)} (large file, no highlighting) ")
+        if path in self.pending_jumps:
+            self.jump_to_line(editor, *self.pending_jumps.pop(path))
+
+    def on_binary_file(self, path, size, preview):
+        if self.documents.for_path(path):
+            return
+        viewer = QPlainTextEdit()
+        viewer.setReadOnly(True)
+        viewer.setFont(QFont("Consolas", 10))
+        shown = min(size, HEX_PREVIEW_BYTES)
+        viewer.setPlainText(f"Binary file, {size} bytes. Showing the first {shown} bytes.\n\n{preview}")
+        self.documents.add(Document(path, viewer))
+        filename = os.path.basename(path)
+        index = self.tabs.addTab(viewer, f"{filename} [binary]")
+        self.tabs.setCurrentIndex(index)
+        self.status_label.setText(f" Binary file, not editable: {filename} ")
 
     def on_file_error(self, err_msg):
         self.status_label.setText(f" Error: {err_msg} ")
 
     def new_file(self):
+        from editor.editor_widget import ShellLiteEditor
         new_editor = ShellLiteEditor()
+        self.track_dirty(new_editor)
+        self.documents.add(Document(None, new_editor))
         index = self.tabs.addTab(new_editor, "Untitled.shl") # Default extension hint
         self.tabs.setCurrentIndex(index)
         self.status_label.setText(" Created new file ")
@@ -377,36 +909,94 @@ class ShellDeskWindow(QMainWindow):
     def open_file(self):
         path, _ = QFileDialog.getOpenFileName(self, "Open File", "", "ShellLite Files (*.sh *.shl *.oka);;All Files (*)")
         if path:
-            self.on_file_clicked(self.file_model.index(path))
+            self.open_path(path)
 
     def open_folder(self):
         dir_path = QFileDialog.getExistingDirectory(self, "Open Folder", os.getcwd())
         if dir_path:
-            self.tree_view.setRootIndex(self.file_model.index(dir_path))
-            self.status_label.setText(f" Workspace: {dir_path} ")
+            self.open_workspace(dir_path)
+
+    def open_workspace(self, dir_path):
+        self.file_model.set_root(dir_path)
+        if self.find_panel is not None:
+            self.find_panel.set_root(self.file_model.root.path, self.file_model.excludes)
+        self.status_label.setText(f" Workspace: {dir_path} (indexing...) ")
+        self.workspace_index.open(dir_path)
+
+    def edit_excludes(self):
+        current = ", ".join(self.file_model.excludes)
+        text, ok = QInputDialog.getText(self, "Exclude Patterns",
+                                        "Hide from the file tree (.gitignore syntax, comma separated):", text=current)
+        if not ok:
+            return
+        patterns = [p.strip() for p in text.split(",") if p.strip()]
+        self.settings.setValue("tree/exclude", patterns)
+        self.file_model.set_excludes(patterns)
+        if self.find_panel is not None:
+            self.find_panel.set_root(self.file_model.root.path, patterns)
+        if self.path_index is not None and self.path_index.root is not None:
+            self.path_index.open(self.file_model.root.path, patterns)
+
+    def show_quick_open(self):
+        from editor.quickopen import PathIndex, QuickOpenDialog
+        if self.path_index is None:
+            self.path_index = PathIndex(self)
+        if self.path_index.root != self.file_model.root.path:
+            self.path_index.open(self.file_model.root.path, self.file_model.excludes)
+        if self.quick_open is None:
+            self.quick_open = QuickOpenDialog(self.path_index, self)
+            self.quick_open.chosen.connect(self.open_path)
+        self.quick_open.popup()
+
+    def show_find_in_files(self):
+        if self.find_panel is None:
+            from editor.search import FindInFilesPanel
+            self.find_panel = FindInFilesPanel()
+            self.find_panel.open_hit.connect(self.open_at)
+            self.sidebar_splitter.addWidget(self.find_panel)
+        self.find_panel.set_root(self.file_model.root.path, self.file_model.excludes)
+        self.find_panel.show()
+        editor = self.get_current_editor()
+        selected = editor.selectedText() if editor else ""
+        self.find_panel.focus_query(selected if "\n" not in selected else "")
+
+    def fold_all(self):
+        editor = self.get_current_editor()
+        if editor: editor.fold_all(True)
+
+    def unfold_all(self):
+        editor = self.get_current_editor()
+        if editor: editor.fold_all(False)
+
+    def show_outline(self):
+        if self.outline_panel is None:
+            from editor.outline import OutlinePanel
+            self.outline_panel = OutlinePanel()
+            self.outline_panel.open_line.connect(self.on_outline_line)
+            self.sidebar_splitter.addWidget(self.outline_panel)
+        self.outline_panel.set_editor(self.get_current_editor())
+        self.outline_panel.show()
+
+    def on_outline_line(self, line):
+        editor = self.get_current_editor()
+        if editor:
+            editor.ensureLineVisible(line)
+            self.jump_to_line(editor, line)
 
     def save_file(self):
+        from editor.editor_widget import ShellLiteEditor
         current_editor = self.tabs.currentWidget()
         if not current_editor or not isinstance(current_editor, ShellLiteEditor):
             return
             
-        current_path = None
-        for path, widget in self.open_files.items():
-            if widget == current_editor:
-                current_path = path
-                break
-                
-        if current_path:
-            try:
-                with open(current_path, 'w', encoding='utf-8') as f:
-                    f.write(current_editor.text())
-                self.status_label.setText(f" Saved: {os.path.basename(current_path)} ")
-            except Exception as e:
-                self.status_label.setText(f" Error saving: {e} ")
+        document = self.documents.for_widget(current_editor)
+        if document and document.path:
+            self.save_document(document, document.path)
         else:
             self.save_as_file()
 
     def save_as_file(self):
+        from editor.editor_widget import ShellLiteEditor
         current_editor = self.tabs.currentWidget()
         if not current_editor or not isinstance(current_editor, ShellLiteEditor):
             return
@@ -418,22 +1008,216 @@ class ShellDeskWindow(QMainWindow):
         
         path, _ = QFileDialog.getSaveFileName(self, "Save File As", suggested_name, "ShellLite Files (*.shl *.sh);;All Files (*)")
         if path:
+            self.save_document(self.documents.for_widget(current_editor), path, rename=True)
+
+    def save_all(self):
+        batch = {"ids": set(), "written": 0, "unchanged": 0, "failed": 0}
+        untitled = 0
+        # Hibernated tabs are saved from their packed text, without waking them
+        for document in self.documents.documents():
+            if not document.is_modified():
+                continue
+            if document.path is None:
+                untitled += 1
+                continue
+            save_id = self.save_document(document, document.path)
+            if save_id is not None:
+                batch["ids"].add(save_id)
+        skipped = f", {untitled} untitled skipped" if untitled else ""
+        if not batch["ids"]:
+            self.status_label.setText(f" Nothing to save{skipped} ")
+            return
+        # Writes to different files run in parallel on the saver pool
+        batch["skipped"] = skipped
+        self.save_batch = batch
+        self.status_label.setText(f" Saving {len(batch['ids'])} files... ")
+
+    def save_document(self, document, path, rename=False):
+        if path in self.large_loads:
+            self.status_label.setText(f" Still loading: {os.path.basename(path)} ")
+            return None
+        save_id = self.file_saver.save(path, document.text())
+        self.saves[save_id] = (document, document.edit_count(), rename)
+        self.status_label.setText(f" Saving: {os.path.basename(path)}... ")
+        return save_id
+
+    def on_file_saved(self, save_id, path, written):
+        entry = self.saves.pop(save_id, None)
+        if entry is None or self.documents.for_widget(entry[0].widget) is not entry[0]:
+            # Closed while it was being written
+            self.finish_batch(save_id, "written" if written else "unchanged")
+            return
+        document, edit_count, rename = entry
+        if rename:
+            self.unwatch_file(document.path)
+            self.documents.set_path(document, path)
+            self.watch_file(path)
+        elif self.change_watcher is not None:
+            # Our own write; its change events are not a reload
+            self.change_watcher.note_written(path, self.file_saver.hashes.get(path))
+        # Edits made while the write ran keep the tab dirty
+        if document.edit_count() == edit_count:
+            if document.hibernated:
+                document.modified = False
+            else:
+                document.widget.setModified(False)
+        self.update_tab_title(document)
+        if self.finish_batch(save_id, "written" if written else "unchanged"):
+            return
+        if rename:
+            self.status_label.setText(f" Saved as: {os.path.basename(path)} ")
+        elif written:
+            self.status_label.setText(f" Saved: {os.path.basename(path)} ")
+        else:
+            self.status_label.setText(f" No changes to save: {os.path.basename(path)} ")
+
+    def on_file_save_failed(self, save_id, path, message):
+        self.saves.pop(save_id, None)
+        if self.finish_batch(save_id, "failed"):
+            return
+        self.status_label.setText(f" Error saving: {message} ")
+
+    def finish_batch(self, save_id, outcome):
+        batch = self.save_batch
+        if batch is None or save_id not in batch["ids"]:
+            return False
+        batch["ids"].discard(save_id)
+        batch[outcome] += 1
+        if not batch["ids"]:
+            self.save_batch = None
+            failed = f", {batch['failed']} failed" if batch["failed"] else ""
+            self.status_label.setText(f" Saved {batch['written']} files ({batch['unchanged']} unchanged{failed}{batch['skipped']}) ")
+        return True
+
+    def watch_file(self, path):
+        if path is None:
+            return
+        if self.change_watcher is None:
+            from editor.watcher import ExternalChangeWatcher
+            self.change_watcher = ExternalChangeWatcher(self)
+            self.change_watcher.due.connect(self.check_external_changes)
+            self.change_watcher.checked.connect(self.on_external_changes)
+        self.change_watcher.watch(path, self.file_saver.hashes.get(path))
+
+    def unwatch_file(self, path):
+        if path is not None and self.change_watcher is not None:
+            self.change_watcher.unwatch(path)
+
+    def check_external_changes(self, paths):
+        requests = []
+        for path in paths:
+            document = self.documents.for_path(path)
+            if document is None:
+                continue
+            if path in self.file_saver.running or path in self.file_saver.queued:
+                # Our own write in flight; looked at again once it has landed
+                self.change_watcher.postpone(path)
+                continue
+            buffer = None
+            edit_count = None
+            if (not document.hibernated and document.is_editor() and not document.widget.large_file
+                    and not document.widget.isModified()):
+                # Only a buffer that still matches the old file is diffed
+                buffer = document.widget.text()
+                edit_count = document.widget.edit_count
+            requests.append((path, buffer, edit_count))
+        self.change_watcher.check(requests)
+
+    def on_external_changes(self, results):
+        reloaded, changed, deleted = [], [], []
+        for path, stamp, digest, text, edits, edit_count in results:
+            document = self.documents.for_path(path)
+            if document is None:
+                continue
+            name = os.path.basename(path)
+            if stamp is None:
+                deleted.append(name)
+                continue
+            if text is None or (document.hibernated and not document.modified):
+                # Unchanged, or read from disk again when the tab is focused
+                continue
+            if edits is None or document.is_modified():
+                # Unsaved edits, large files and binary previews are left alone
+                changed.append(name)
+                continue
+            editor = document.widget
+            if document.hibernated or editor.edit_count != edit_count:
+                # Typed into since its text was taken; diffed again
+                self.change_watcher.postpone(path)
+                continue
+            if edits:
+                editor.apply_line_edits(edits)
+                reloaded.append(name)
+        parts = []
+        for label, names in (("Reloaded", reloaded), ("Changed on disk, not reloaded", changed),
+                             ("Deleted on disk", deleted)):
+            if names:
+                more = f" and {len(names) - 3} more" if len(names) > 3 else ""
+                parts.append(f"{label}: {', '.join(names[:3])}{more}")
+        if parts:
+            self.status_label.setText(f" {'; '.join(parts)} ")
+
+    def track_dirty(self, editor):
+        editor.modificationChanged.connect(lambda modified, e=editor: self.update_tab_title(self.documents.for_widget(e)))
+
+    def update_tab_title(self, document):
+        if document is None:
+            return
+        index = self.tabs.indexOf(document.widget)
+        if index == -1:
+            return
+        title = os.path.basename(document.path) if document.path else self.tabs.tabText(index).replace("*", "")
+        self.tabs.setTabText(index, title + ("*" if document.is_modified() else ""))
+
+    def hibernate_idle(self):
+        current = self.tabs.currentWidget()
+        for document in self.documents.over_limit():
+            editor = document.widget
+            # Large buffers are too costly to rebuild and are kept live
+            if editor is current or editor.large_file or document.path in self.large_loads:
+                continue
+            self.hibernate(document)
+
+    def hibernate(self, document):
+        editor = document.widget
+        document.capture(editor)
+        editor.scan_timer.stop()
+        editor.lexer.cancel_background()
+        placeholder = QWidget()
+        self.documents.set_widget(document, placeholder)
+        self.swap_tab_widget(editor, placeholder)
+
+    def materialize(self, document):
+        from editor.editor_widget import ShellLiteEditor
+        content = None
+        if document.packed is None and document.path is not None:
+            # Read ahead already, or still cached from an earlier open
+            content = self.file_loader.cached(document.path)
+        if content is None:
             try:
-                with open(path, 'w', encoding='utf-8') as f:
-                    f.write(current_editor.text())
-                    
-                self.tabs.setTabText(index, os.path.basename(path))
-                
-                # Update map
-                old_path = None
-                for p, w in self.open_files.items():
-                    if w == current_editor:
-                        old_path = p
-                        break
-                if old_path:
-                    del self.open_files[old_path]
-                self.open_files[path] = current_editor
-                
-                self.status_label.setText(f" Saved as: {os.path.basename(path)} ")
-            except Exception as e:
-                self.status_label.setText(f" Error saving: {e} ")
+                content = document.text()
+            except (OSError, ValueError) as e:
+                content = ""
+                self.status_label.setText(f" Error: {e} ")
+        from editor.diagnostics import checks_syntax
+        editor = ShellLiteEditor()
+        editor.set_diagnostics_enabled(checks_syntax(document.path))
+        document.restore(editor, content)
+        self.track_dirty(editor)
+        placeholder = document.widget
+        self.documents.set_widget(document, editor)
+        self.swap_tab_widget(placeholder, editor)
+        self.show_profile_margin(document)
+
+    def swap_tab_widget(self, old, new):
+        # Same index and title; tab signals are held so nothing sees the gap
+        index = self.tabs.indexOf(old)
+        title = self.tabs.tabText(index)
+        current = self.tabs.currentIndex() == index
+        self.tabs.blockSignals(True)
+        self.tabs.removeTab(index)
+        self.tabs.insertTab(index, new, title)
+        if current:
+            self.tabs.setCurrentIndex(index)
+        self.tabs.blockSignals(False)
+        old.deleteLater()
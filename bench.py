@@ -0,0 +1,667 @@
+import os
+import sys
+import json
+import time
+import argparse
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PyQt6.QtWidgets import QApplication
+from PyQt6.Qsci import QsciScintilla
+
+SAMPLE = [
+    'fn greet name',
+    '    say "Hello, " + name',
+    '    count = count + 1',
+    '# keep the loop honest',
+    'repeat 10 times',
+    '    if count > 3.5',
+    '        give \'done\'',
+    '    else',
+    '        greet "world"',
+]
+
+def make_source(lines):
+    return "\r\n".join(SAMPLE[i % len(SAMPLE)] for i in range(lines))
+
+_app = None
+
+def get_app():
+    global _app
+    if QApplication.instance() is None:
+        isolate_settings()
+    _app = QApplication.instance() or QApplication(sys.argv)
+    return _app
+
+def isolate_settings():
+    # Benchmarks must neither restore nor overwrite the user's own session
+    import atexit
+    import shutil
+    import tempfile
+    from PyQt6.QtCore import QSettings
+    folder = tempfile.mkdtemp(prefix="shelldesk-bench-")
+    atexit.register(shutil.rmtree, folder, ignore_errors=True)
+    os.environ["XDG_CONFIG_HOME"] = folder
+    QSettings.setPath(QSettings.Format.NativeFormat, QSettings.Scope.UserScope, folder)
+
+def style_all(editor):
+    # Large requests are tokenized in the background; wait for the last chunk
+    app = get_app()
+    editor.SendScintilla(QsciScintilla.SCI_COLOURISE, 0, -1)
+    length = editor.SendScintilla(QsciScintilla.SCI_GETLENGTH)
+    while editor.SendScintilla(QsciScintilla.SCI_GETENDSTYLED) < length:
+        app.processEvents()
+        time.sleep(0.001)
+
+def bench_lexer_keystroke(sizes, reps=50, viewport=60):
+    from editor.lexer import ShellLiteLexer
+    get_app()
+    results = []
+    for lines in sizes:
+        editor = QsciScintilla()
+        editor.setUtf8(True)
+        lexer = ShellLiteLexer(editor)
+        editor.setLexer(lexer)
+        source = make_source(lines)
+        editor.setText(source)
+        t0 = time.perf_counter()
+        style_all(editor)
+        full = time.perf_counter() - t0
+        mid = lines // 2
+        timings = []
+        for i in range(reps):
+            editor.insertAt("x", mid, 4)
+            stop = editor.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, min(mid + viewport, lines - 1))
+            # Style from the end-styled position up to the viewport, as a repaint does
+            t0 = time.perf_counter()
+            end_styled = editor.SendScintilla(QsciScintilla.SCI_GETENDSTYLED)
+            editor.SendScintilla(QsciScintilla.SCI_COLOURISE, end_styled, stop)
+            timings.append(time.perf_counter() - t0)
+        timings.sort()
+        results.append({
+            "lines": lines,
+            "full_style_ms": full * 1000,
+            "mb_per_s": len(source.encode("utf-8")) / full / (1024 * 1024),
+            "keystroke_median_us": timings[len(timings) // 2] * 1e6,
+            "keystroke_max_us": timings[-1] * 1e6,
+        })
+    return results
+
+def make_paths(count, seed=1):
+    import random
+    rng = random.Random(seed)
+    words = ["src", "lib", "test", "util", "core", "app", "widget", "model", "view", "editor",
+             "shell", "lite", "runner", "parser", "lexer", "tokens", "config", "data", "docs", "main"]
+    paths = set()
+    while len(paths) < count:
+        folder = "/".join(rng.choice(words) for _ in range(rng.randint(1, 5)))
+        paths.add(f"{folder}/{rng.choice(words)}{rng.randint(0, 999)}{rng.choice(['.shl', '.py', '.txt', '.json'])}")
+    return sorted(paths)
+
+def bench_quick_open(count=100000, queries=("editorlexer", "srcwidget", "mainpy", "s/e/l", "testcorelib", "zzz")):
+    from editor.quickopen import PathIndex, PathSnapshot
+    get_app()
+    index = PathIndex()
+    t0 = time.perf_counter()
+    index.snapshot = PathSnapshot(make_paths(count))
+    build = time.perf_counter() - t0
+    timings = []
+    for query in queries:
+        # One query per keystroke, as the palette issues them, plus the
+        # follow-up passes it runs while a scan is partial
+        index.last_query = None
+        for end in range(1, len(query) + 1):
+            while True:
+                t0 = time.perf_counter()
+                index.query(query[:end])
+                timings.append(time.perf_counter() - t0)
+                if not index.partial:
+                    break
+    timings.sort()
+    return {
+        "paths": count,
+        "build_ms": build * 1000,
+        "keystroke_median_ms": timings[len(timings) // 2] * 1000,
+        "keystroke_max_ms": timings[-1] * 1000,
+    }
+
+def bench_find(megabytes=64, queries=(("zebra", False, True), ("ZEBRA", False, False), (r"count \+ \d{3}", True, True),
+                                      ("greet", False, False))):
+    # Scan throughput of one mapped file per Find in Files mode; the last
+    # query hits every few lines and stops at the per-file cap
+    import tempfile
+    from editor.search import build_query, search_file
+    block = (make_source(10000) + "\r\n").encode("utf-8")
+    fd, path = tempfile.mkstemp(suffix=".shl")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for _ in range(max(1, megabytes * 1024 * 1024 // len(block))):
+                f.write(block)
+        size = os.path.getsize(path)
+        results = []
+        for query, regex, match_case in queries:
+            spec = build_query(query, regex, match_case)
+            t0 = time.perf_counter()
+            hits = search_file(path, spec)
+            elapsed = time.perf_counter() - t0
+            results.append({
+                "query": query,
+                "mode": ("regex" if regex else "literal") + ("" if match_case else ", ignore case"),
+                "hits": len(hits),
+                "mb_per_s": size / elapsed / (1024 * 1024),
+            })
+        return results
+    finally:
+        os.remove(path)
+
+# Interpreter start to the deferred UI being built; bench exits non-zero above it
+STARTUP_BUDGET_MS = 750
+
+def bench_startup(runs=5):
+    # Fresh processes, as a cold launch from a script would be
+    import subprocess
+    main_py = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    import tempfile
+    totals, paints, walls = [], [], []
+    with tempfile.TemporaryDirectory(prefix="shelldesk-bench-") as config:
+        env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"),
+                   XDG_CONFIG_HOME=config)
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            result = subprocess.run([sys.executable, main_py, "--profile-startup", "--quit-after-startup"],
+                                    env=env, capture_output=True, text=True, timeout=60)
+            walls.append(time.perf_counter() - t0)
+            elapsed = 0.0
+            for line in result.stderr.splitlines():
+                phase, _, rest = line.rpartition(" ms")[0].rpartition(" ")
+                try:
+                    ms = float(rest)
+                except ValueError:
+                    continue
+                phase = phase.strip()
+                if phase == "total":
+                    totals.append(ms)
+                else:
+                    elapsed += ms
+                    if phase == "first paint":
+                        paints.append(elapsed)
+    if not totals:
+        raise RuntimeError("main.py did not report its startup phases")
+    totals.sort()
+    paints.sort()
+    walls.sort()
+    return {
+        "runs": runs,
+        "first_paint_ms": paints[len(paints) // 2],
+        "ready_ms": totals[len(totals) // 2],
+        "process_ms": walls[len(walls) // 2] * 1000,
+    }
+
+def wait_until(condition, timeout=30):
+    app = get_app()
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("benchmark timed out")
+        app.processEvents()
+        time.sleep(0.0005)
+
+def pump(seconds):
+    app = get_app()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+def bench_editor_construction(reps=20):
+    from editor.editor_widget import ShellLiteEditor
+    get_app()
+    timings = []
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        editor = ShellLiteEditor()
+        timings.append(time.perf_counter() - t0)
+        editor.deleteLater()
+    # The first editor also pays for the QScintilla and lexer imports
+    return [{
+        "tabs": reps,
+        "first_ms": timings[0] * 1000,
+        "median_ms": median(timings[1:] or timings) * 1000,
+    }]
+
+def bench_scan_document(sizes, reps=5):
+    # Time on the GUI thread to start a full symbol scan, and until the
+    # background scan has published its symbols
+    from editor.editor_widget import ShellLiteEditor
+    get_app()
+    results = []
+    for lines in sizes:
+        gui, total = [], []
+        for _ in range(reps):
+            editor = ShellLiteEditor()
+            wait_until(lambda: editor.symbol_index.job is None)
+            editor.setText(make_source(lines))
+            editor.scan_timer.stop()
+            published = []
+            editor.symbol_index.changed.connect(published.append)
+            t0 = time.perf_counter()
+            editor.scan_document()
+            gui.append(time.perf_counter() - t0)
+            wait_until(lambda: published and editor.symbol_index.job is None)
+            total.append(time.perf_counter() - t0)
+            editor.deleteLater()
+        results.append({
+            "lines": lines,
+            "gui_ms": median(gui) * 1000,
+            "total_ms": median(total) * 1000,
+        })
+    return results
+
+def bench_folding(sizes, reps=20):
+    # Fold levels for a freshly set buffer (all slices, and the longest
+    # single slice the event loop waits on), one edit's incremental update,
+    # and fold/unfold all from the cached levels
+    from editor.editor_widget import ShellLiteEditor
+    from editor.tracing import tracer
+    get_app()
+    results = []
+    for lines in sizes:
+        editor = ShellLiteEditor()
+        editor.setText(make_source(lines))
+        editor.lexer.fold_timer.stop()
+        start = len(tracer().events)
+        t0 = time.perf_counter()
+        editor.lexer.flush_folds()
+        full = time.perf_counter() - t0
+        slices = [event[2] for event in list(tracer().events)[start:] if event[0] == "fold"]
+        edits, folds, unfolds = [], [], []
+        for i in range(reps):
+            line = (i * 7919) % lines
+            editor.insertAt("    if count > 1\r\n", line, 0)
+            t0 = time.perf_counter()
+            editor.lexer.flush_folds()
+            edits.append(time.perf_counter() - t0)
+        for _ in range(min(reps, 5)):
+            t0 = time.perf_counter()
+            editor.fold_all(True)
+            folds.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            editor.fold_all(False)
+            unfolds.append(time.perf_counter() - t0)
+        results.append({
+            "lines": lines,
+            "full_ms": full * 1000,
+            "slice_max_ms": max(slices) / 1e6,
+            "edit_us": median(edits) * 1e6,
+            "fold_all_ms": median(folds) * 1000,
+            "unfold_all_ms": median(unfolds) * 1000,
+        })
+        editor.deleteLater()
+    return results
+
+def bench_file_open(sizes, reps=5):
+    # open_path to the tab being current and painted, with the loader cache
+    # emptied first so every open reads the file
+    import tempfile
+    from editor.app import ShellDeskWindow
+    app = get_app()
+    window = ShellDeskWindow()
+    window.show()
+    window.finish_startup()
+
+    def open_once(path):
+        window.file_loader.forget(path)
+        t0 = time.perf_counter()
+        window.open_path(path)
+        wait_until(lambda: window.documents.for_path(path) is not None)
+        document = window.documents.for_path(path)
+        document.widget.repaint()
+        elapsed = time.perf_counter() - t0
+        window.close_tab(window.tabs.indexOf(document.widget))
+        app.processEvents()
+        return elapsed
+
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for lines in sizes:
+            path = os.path.join(folder, f"bench_{lines}.shl")
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                f.write(make_source(lines))
+            if not results:
+                # Untimed, so the first size does not pay for warm-up
+                open_once(path)
+            timings = [open_once(path) for _ in range(reps)]
+            results.append({
+                "lines": lines,
+                "bytes": os.path.getsize(path),
+                "median_ms": median(timings) * 1000,
+                "max_ms": max(timings) * 1000,
+            })
+    window.close()
+    window.deleteLater()
+    return results
+
+def bench_session_restore(counts=(1, 10, 50), lines=2000, reps=5):
+    # finish_startup to the current tab being a painted editor, with a saved
+    # session of `count` files; only the current one should be loaded
+    import tempfile
+    from PyQt6.QtCore import QSettings
+    from editor.app import ShellDeskWindow
+    from editor.session import save_session
+    app = get_app()
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        paths = []
+        for i in range(max(counts)):
+            path = os.path.join(folder, f"session_{i}.shl")
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                f.write(make_source(lines))
+            paths.append(path)
+        for count in counts:
+            timings = []
+            for _ in range(reps):
+                tabs = [(path, (0, 0), 0, None) for path in paths[:count]]
+                # No workspace root, so indexing the folder does not compete
+                save_session(QSettings("ShellDesk", "ShellDesk"), None, tabs, count // 2)
+                window = ShellDeskWindow()
+                window.show()
+                app.processEvents()
+                t0 = time.perf_counter()
+                window.finish_startup()
+                wait_until(lambda: window.get_current_editor() is not None)
+                window.get_current_editor().repaint()
+                timings.append(time.perf_counter() - t0)
+                window.close()
+                # As on quit: no read-ahead may outlive its window
+                window.file_loader.shutdown()
+                window.watchdog.stop()
+                window.deleteLater()
+                pump(0.1)
+            results.append({
+                "tabs": count,
+                "interactive_ms": median(timings) * 1000,
+            })
+    return results
+
+def bench_run_script(reps=3, source='say "ready"'):
+    # Run launch to the first line of output, cold and through the warm pool;
+    # skipped when shell_lite cannot be imported by the child
+    import tempfile
+    from editor.runner import ScriptRun, WarmPool
+    get_app()
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        pool = WarmPool()
+        pool.fill()
+        for mode in ("cold", "warm"):
+            timings = []
+            for run_id in range(reps):
+                if mode == "warm":
+                    # Give the spare interpreters time to import shell_lite
+                    wait_until(lambda: pool.broken or pool.idle)
+                    pump(1.0)
+                run = ScriptRun(run_id, source, folder, pool if mode == "warm" else None)
+                ended = []
+                run.finished.connect(lambda *a: ended.append(a))
+                run.failed.connect(lambda *a: ended.append(a))
+                t0 = time.perf_counter()
+                run.start()
+                wait_until(lambda: run.first_output is not None or ended)
+                elapsed = time.perf_counter() - t0
+                wait_until(lambda: ended)
+                if len(ended[0]) != 3 or ended[0][1] != 0:
+                    pool.shutdown()
+                    return []
+                timings.append(elapsed)
+                run.deleteLater()
+            results.append({
+                "mode": mode,
+                "runs": reps,
+                "first_output_ms": median(timings) * 1000,
+            })
+        pool.shutdown()
+        # Retired workers exit on their own once their stdin closes
+        pump(0.5)
+    return results
+
+def make_words(count, seed=3):
+    import random
+    rng = random.Random(seed)
+    syllables = ["ka", "lo", "mi", "ren", "to", "sa", "vel", "dor", "pi", "qu", "ze", "han"]
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) + rng.choice(["", "_count", "Size", "2"]))
+    return sorted(words)
+
+def bench_completion(sizes, prefixes=40):
+    # Per keystroke, from a typed character to the list being shown. The
+    # legacy path is what completion did before: AcsAll over a prepared
+    # QsciAPIs list, a linear pass over the document symbols and a scan of
+    # the document's words. That path is quadratic in the vocabulary, so
+    # sizes much past 10000 take minutes.
+    from PyQt6.Qsci import QsciAPIs, QsciAbstractAPIs
+    from editor.completion import KEYWORDS, STDLIB
+    from editor.editor_widget import ShellLiteEditor
+    from editor.lexer import ShellLiteLexer
+    import random
+    get_app()
+
+    class LegacyAPIs(QsciAbstractAPIs):
+        def __init__(self, lexer, shared, symbols):
+            super().__init__(lexer)
+            self.shared = shared
+            self.symbols = symbols
+
+        def updateAutoCompletionList(self, context, words):
+            words = self.shared.updateAutoCompletionList(context, words)
+            if context:
+                prefix = context[-1].lower()
+                for symbol in self.symbols:
+                    if symbol.lower().startswith(prefix) and symbol not in words:
+                        words.append(symbol)
+            return words
+
+        def autoCompletionSelected(self, selection):
+            pass
+
+        def callTips(self, context, commas, style, shifts):
+            return []
+
+    results = []
+    for count in sizes:
+        words = make_words(count)
+        text = "\n".join(f"{word} = {i}" for i, word in enumerate(words)) + "\n"
+        typed = random.Random(count).sample(words, min(prefixes, len(words)))
+        legacy = QsciScintilla()
+        lexer = ShellLiteLexer(legacy)
+        legacy.setLexer(lexer)
+        shared = QsciAPIs(lexer)
+        for word in KEYWORDS + STDLIB:
+            shared.add(word)
+        prepared = []
+        shared.apiPreparationFinished.connect(lambda: prepared.append(True))
+        shared.prepare()
+        wait_until(lambda: prepared)
+        legacy.api = LegacyAPIs(lexer, shared, set(words))
+        legacy.setAutoCompletionSource(QsciScintilla.AutoCompletionSource.AcsAll)
+        legacy.setAutoCompletionCaseSensitivity(False)
+        editor = ShellLiteEditor()
+        editor.completer.set_symbols(set(words))
+        timings = {"legacy": [], "ranked": [], "cached": []}
+        for name, widget in (("legacy", legacy), ("ranked", editor), ("cached", editor)):
+            widget.setText(text)
+            widget.setCursorPosition(len(words), 0)
+            for word in typed:
+                for end in range(1, min(len(word), 4) + 1):
+                    widget.insert(word[end - 1])
+                    widget.setCursorPosition(len(words), end)
+                    t0 = time.perf_counter()
+                    if widget is legacy:
+                        widget.autoCompleteFromAll()
+                    else:
+                        widget.on_char_added(ord(word[end - 1]))
+                    timings[name].append(time.perf_counter() - t0)
+                    widget.cancelList()
+                widget.setSelection(len(words), 0, len(words), min(len(word), 4))
+                widget.removeSelectedText()
+                if name == "ranked":
+                    # Cold cache for the next word, as if it was the first time
+                    widget.completer.cache.clear()
+        legacy.deleteLater()
+        editor.deleteLater()
+        results.append({
+            "words": count,
+            "legacy_keystroke_us": median(timings["legacy"]) * 1e6,
+            "ranked_keystroke_us": median(timings["ranked"]) * 1e6,
+            "cached_keystroke_us": median(timings["cached"]) * 1e6,
+        })
+    return results
+
+# Each benchmark: rows from the parsed arguments, the field naming a row,
+# and the table columns as (field, header, format)
+BENCHMARKS = {
+    "lexer": (lambda args: bench_lexer_keystroke(args.sizes, args.reps), "lines", [
+        ("full_style_ms", "full style ms", ".1f"), ("mb_per_s", "MB/s", ".1f"),
+        ("keystroke_median_us", "keystroke us (median)", ".1f"), ("keystroke_max_us", "keystroke us (max)", ".1f")]),
+    "scan": (lambda args: bench_scan_document(args.sizes), "lines", [
+        ("gui_ms", "scan gui ms", ".2f"), ("total_ms", "scan total ms", ".1f")]),
+    "folding": (lambda args: bench_folding(args.sizes), "lines", [
+        ("full_ms", "all levels ms", ".1f"), ("slice_max_ms", "longest slice ms", ".1f"), ("edit_us", "edit us (median)", ".1f"),
+        ("fold_all_ms", "fold all ms", ".1f"), ("unfold_all_ms", "unfold all ms", ".1f")]),
+    "tabs": (lambda args: bench_editor_construction(), "tabs", [
+        ("first_ms", "first editor ms", ".1f"), ("median_ms", "editor ms (median)", ".2f")]),
+    "open": (lambda args: bench_file_open(args.sizes), "lines", [
+        ("bytes", "bytes", "d"), ("median_ms", "open ms (median)", ".1f"), ("max_ms", "open ms (max)", ".1f")]),
+    "session": (lambda args: bench_session_restore(), "tabs", [
+        ("interactive_ms", "current tab ready ms", ".1f")]),
+    "run": (lambda args: bench_run_script(), "mode", [
+        ("runs", "runs", "d"), ("first_output_ms", "first output ms", ".1f")]),
+    "completion": (lambda args: bench_completion(args.words), "words", [
+        ("legacy_keystroke_us", "legacy us (median)", ".1f"), ("ranked_keystroke_us", "ranked us (median)", ".1f"),
+        ("cached_keystroke_us", "cached us (median)", ".1f")]),
+    "quick_open": (lambda args: [bench_quick_open(args.paths)], "paths", [
+        ("build_ms", "index build ms", ".1f"), ("keystroke_median_ms", "query ms (median)", ".2f"),
+        ("keystroke_max_ms", "query ms (max)", ".2f")]),
+    "find": (lambda args: bench_find(args.find_mb), "query", [
+        ("mode", "mode", ""), ("hits", "hits", "d"), ("mb_per_s", "MB/s", ".1f")]),
+    "startup": (lambda args: [bench_startup(args.startup_runs)], "runs", [
+        ("first_paint_ms", "first paint ms", ".1f"), ("ready_ms", "ready ms", ".1f"), ("process_ms", "process ms", ".1f")]),
+}
+
+def print_table(name, key, columns, rows):
+    headers = [key] + [header for _, header, _ in columns]
+    table = [[f"{row[key]}"] + [format(row[field], fmt) for field, _, fmt in columns] for row in rows]
+    widths = [max(8, len(header), *(len(cells[i]) for cells in table)) for i, header in enumerate(headers)]
+    print(f"\n[{name}]")
+    for cells in [headers] + table:
+        print(" ".join(f"{cell:>{width}}" for cell, width in zip(cells, widths)))
+
+# Timing and throughput fields; counts such as bytes or hits describe the workload
+METRIC_SUFFIXES = ("_ms", "_us", "mb_per_s")
+
+def flatten(results):
+    # {"lexer[10000].keystroke_median_us": value, ...}
+    metrics = {}
+    for name, rows in results.items():
+        key = BENCHMARKS[name][1]
+        for row in rows:
+            for field, value in row.items():
+                if field.endswith(METRIC_SUFFIXES):
+                    metrics[f"{name}[{row[key]}].{field}"] = value
+    return metrics
+
+def higher_is_better(metric):
+    return metric.endswith("mb_per_s")
+
+def compare(baseline, current, tolerance):
+    # Metrics that got worse by more than the tolerance
+    old, new = flatten(baseline["results"]), flatten(current["results"])
+    regressions = []
+    print(f"\n{'metric':<44} {'baseline':>12} {'current':>12} {'change':>8}")
+    for metric in sorted(old.keys() & new.keys()):
+        before, after = old[metric], new[metric]
+        if not before:
+            continue
+        change = (after - before) / before
+        worse = -change if higher_is_better(metric) else change
+        flag = ""
+        if worse > tolerance:
+            flag = "  SLOWER"
+            regressions.append(metric)
+        print(f"{metric:<44} {before:>12.2f} {after:>12.2f} {change * 100:>+7.1f}%{flag}")
+    return regressions
+
+def load_results(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def compare_main(argv):
+    parser = argparse.ArgumentParser(prog="python -m editor.bench compare",
+                                     description="Flag slowdowns between two saved benchmark runs")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed slowdown, as a fraction")
+    args = parser.parse_args(argv)
+    regressions = compare(load_results(args.baseline), load_results(args.current), args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) slower than the baseline by more than {args.tolerance:.0%}", file=sys.stderr)
+        sys.exit(1)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["compare"]:
+        return compare_main(argv[1:])
+    parser = argparse.ArgumentParser(description="Headless ShellDesk benchmarks")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help="Comma separated benchmarks: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma separated line counts")
+    parser.add_argument("--reps", type=int, default=50)
+    parser.add_argument("--words", default="1000,10000", help="Comma separated vocabulary sizes for the completion benchmark")
+    parser.add_argument("--paths", type=int, default=100000, help="Workspace size for the quick-open benchmark")
+    parser.add_argument("--find-mb", type=int, default=64, help="File size for the Find in Files benchmark")
+    parser.add_argument("--startup-runs", type=int, default=5)
+    parser.add_argument("--startup-budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a saved JSON run; exits non-zero on slowdowns")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed slowdown, as a fraction")
+    args = parser.parse_args(argv)
+    args.sizes = [int(s) for s in args.sizes.split(",")]
+    args.words = [int(s) for s in args.words.split(",")]
+    names = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error("unknown benchmark: " + ", ".join(unknown))
+    results = {}
+    for name in names:
+        run, key, columns = BENCHMARKS[name]
+        results[name] = run(args)
+        if results[name]:
+            print_table(name, key, columns, results[name])
+        else:
+            print(f"\n[{name}] skipped")
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    failed = False
+    if args.baseline:
+        regressions = compare(load_results(args.baseline), report, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) slower than the baseline by more than {args.tolerance:.0%}", file=sys.stderr)
+            failed = True
+    startup = results.get("startup")
+    if startup and startup[0]["ready_ms"] > args.startup_budget_ms:
+        print(f"startup took {startup[0]['ready_ms']:.1f} ms, over the {args.startup_budget_ms:.0f} ms budget", file=sys.stderr)
+        failed = True
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
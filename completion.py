@@ -0,0 +1,159 @@
+import os
+import re
+import bisect
+from collections import OrderedDict
+from PyQt6.QtCore import QStandardPaths
+
+KEYWORDS = [
+    "say", "print", "show", "ask", "if", "else", "elif", "unless",
+    "while", "until", "for", "forever", "repeat", "times", "stop", "skip",
+    "return", "give", "fn", "is", "break", "continue", "in", "make", "new",
+    "thing", "extends", "has", "can", "to", "try", "catch", "always",
+    "throw", "error", "import", "use", "as", "share", "exit", "const",
+    "true", "false", "yes", "no"
+]
+
+STDLIB = [
+    "math.pi", "math.e", "math.sqrt", "math.sin", "math.cos", "math.floor", "math.ceil", "math.random",
+    "time.date", "time.year", "time.month", "time.day", "time.sleep",
+    "color.red", "color.green", "color.blue", "color.yellow", "color.bold",
+    "path.basename", "path.dirname", "path.ext", "path.exists", "path.join",
+    "env.get", "env.has", "env.set",
+    "re.match", "re.findall", "re.replace", "re.split",
+    "json_stringify", "json_parse"
+]
+
+COMPLETION_LIMIT = 50
+# Prefixes remembered per editor; dropped whenever a source changes
+PREFIX_CACHE_SIZE = 256
+# A use this many accepted completions ago counts half as much as one now
+RECENCY_HALF_LIFE = 20
+# Identifiers plus dotted stdlib names such as math.sqrt
+WORD_BEFORE = re.compile(r'[A-Za-z_][\w.]*$')
+WORD_AFTER = re.compile(r'^\w*')
+
+def cache_dir():
+    location = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation)
+    return location or os.path.join(os.path.expanduser("~"), ".shelldesk", "cache")
+
+def completion_prefix(before):
+    match = WORD_BEFORE.search(before)
+    return match.group() if match else ""
+
+class SortedWords:
+    # Case-folded sorted array: the words with a prefix are one contiguous
+    # run, found with two bisections
+    def __init__(self, words=()):
+        pairs = sorted({(word.lower(), word) for word in words})
+        self.lowered = [low for low, _ in pairs]
+        self.words = [word for _, word in pairs]
+
+    def prefixed(self, prefix, limit=COMPLETION_LIMIT):
+        start = bisect.bisect_left(self.lowered, prefix)
+        end = bisect.bisect_left(self.lowered, prefix + "\uffff", start)
+        return self.words[start:min(end, start + limit)]
+
+class UsageStats:
+    # Accepted completions, shared by every tab. A word's score is its use
+    # count with each use decayed by how many completions ago it happened.
+    def __init__(self):
+        self.scores = {}
+        self.last_used = {}
+        self.used = []  # sorted (lowered, word) of everything ever accepted
+        self.tick = 0
+        self.generation = 0
+
+    def record(self, word):
+        self.tick += 1
+        self.generation += 1
+        if word not in self.scores:
+            self.scores[word] = 0.0
+            self.last_used[word] = self.tick
+            bisect.insort(self.used, (word.lower(), word))
+        self.scores[word] = self.score(word) + 1.0
+        self.last_used[word] = self.tick
+
+    def score(self, word):
+        age = self.tick - self.last_used[word]
+        return self.scores[word] * 0.5 ** (age / RECENCY_HALF_LIFE)
+
+    def ranked(self, prefix):
+        words = []
+        for i in range(bisect.bisect_left(self.used, (prefix,)), len(self.used)):
+            lowered, word = self.used[i]
+            if not lowered.startswith(prefix):
+                break
+            words.append(word)
+        words.sort(key=self.score, reverse=True)
+        return words
+
+class CompletionEngine:
+    def __init__(self):
+        self.builtins = SortedWords(KEYWORDS + STDLIB)
+        self.usage = UsageStats()
+
+_shared_engine = None
+
+def shared_engine():
+    global _shared_engine
+    if _shared_engine is None:
+        _shared_engine = CompletionEngine()
+    return _shared_engine
+
+class DocumentCompleter:
+    # Per-editor completion: words used before come first, best score first,
+    # then this document's symbols, keywords and stdlib, and workspace
+    # symbols, each in order. Results are cached per prefix, and a longer
+    # prefix is filtered out of the shorter one's full result when it can be.
+    def __init__(self):
+        self.engine = shared_engine()
+        self.symbols = SortedWords()
+        self.cache = OrderedDict()
+        self.cache_state = None
+
+    def set_symbols(self, symbols):
+        self.symbols = SortedWords(symbols)
+        self.cache.clear()
+
+    def record(self, word):
+        self.engine.usage.record(word)
+
+    def complete(self, prefix, limit=COMPLETION_LIMIT):
+        from editor.workspace import shared_index
+        index = shared_index()
+        prefix = prefix.lower()
+        state = (self.engine.usage.generation, index.generation)
+        if state != self.cache_state:
+            self.cache.clear()
+            self.cache_state = state
+        entry = self.cache.get(prefix)
+        if entry is not None:
+            self.cache.move_to_end(prefix)
+            return entry[0]
+        shorter = self.cache.get(prefix[:-1])
+        if shorter is not None and shorter[1]:
+            # Everything matching the longer prefix is already in there, ranked
+            words = [word for word in shorter[0] if word.lower().startswith(prefix)]
+            entry = (words, True)
+        else:
+            entry = self.build(prefix, limit, index)
+        self.cache[prefix] = entry
+        if len(self.cache) > PREFIX_CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return entry[0]
+
+    def build(self, prefix, limit, index):
+        words = self.engine.usage.ranked(prefix)[:limit]
+        complete = len(words) < limit
+        seen = set(words)
+        for source in (self.symbols.prefixed(prefix, limit), self.engine.builtins.prefixed(prefix, limit),
+                       index.complete(prefix, limit)):
+            if len(source) >= limit:
+                complete = False
+            for word in source:
+                if len(words) >= limit:
+                    return words, False
+                if word not in seen:
+                    seen.add(word)
+                    words.append(word)
+        return words, complete
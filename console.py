@@ -0,0 +1,153 @@
+import os
+import functools
+import tempfile
+from PyQt6.QtWidgets import QPlainTextEdit
+from PyQt6.QtGui import QTextCursor
+from PyQt6.QtCore import QCoreApplication, QTimer, pyqtSignal
+
+# Lines kept in the widget; older ones are dropped from the top
+SCROLLBACK_LINES = 10000
+FLUSH_INTERVAL_MS = 16
+# Inserting into the widget costs per line, so each tick inserts at most this
+FLUSH_MAX_LINES = 2000
+# Scrollback is trimmed in one batch once it overshoots by this many lines;
+# QPlainTextEdit's own maximumBlockCount trims block by block and is far slower
+TRIM_SLACK_LINES = 2000
+
+def remove_spill_file(spill_file, path):
+    spill_file.close()
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+class OutputConsole(QPlainTextEdit):
+    open_full_output = pyqtSignal(str)
+
+    def __init__(self, max_lines=SCROLLBACK_LINES, spill=True, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.max_lines = max_lines
+        # Optionally keep everything in a temp file, since the widget does not
+        self.spill = spill
+        self.spill_file = None
+        self.spill_path = None
+        self.spill_cleanup = None
+        self.pending = []
+        self.pending_lines = 0
+        self.omitted = 0
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(FLUSH_INTERVAL_MS)
+        self.flush_timer.timeout.connect(self.flush)
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.remove_spill)
+
+    def set_scrollback(self, max_lines):
+        self.max_lines = max_lines
+        self.trim()
+
+    def trim(self):
+        document = self.document()
+        excess = document.blockCount() - self.max_lines
+        if excess <= 0:
+            return
+        cursor = QTextCursor(document)
+        cursor.setPosition(document.findBlockByNumber(excess).position(), QTextCursor.MoveMode.KeepAnchor)
+        cursor.removeSelectedText()
+
+    def write(self, text):
+        if self.spill:
+            self.write_spill(text)
+        self.pending.append(text)
+        self.pending_lines += text.count("\n")
+        if self.pending_lines > 2 * self.max_lines:
+            self.compact()
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def compact(self):
+        # The producer is outrunning the widget: keep only what scrollback can hold
+        parts = "".join(self.pending).rsplit("\n", self.max_lines)
+        self.omitted += parts[0].count("\n") + 1
+        self.pending = ["\n".join(parts[1:])]
+        self.pending_lines = self.max_lines
+
+    def flush(self):
+        if self.spill_file is not None:
+            self.spill_file.flush()
+        if not self.pending:
+            return
+        text = "".join(self.pending)
+        self.pending = []
+        self.pending_lines = 0
+        if self.omitted:
+            where = " (full output: right-click > Open Full Output)" if self.spill_path else ""
+            text = f"[... {self.omitted} lines omitted{where} ...]\n" + text
+            self.omitted = 0
+        cut = -1
+        for _ in range(FLUSH_MAX_LINES):
+            cut = text.find("\n", cut + 1)
+            if cut == -1:
+                break
+        if cut != -1 and cut + 1 < len(text):
+            rest = text[cut + 1:]
+            text = text[:cut + 1]
+            self.pending = [rest]
+            self.pending_lines = rest.count("\n")
+            self.flush_timer.start()
+        scrollbar = self.verticalScrollBar()
+        at_bottom = scrollbar.value() == scrollbar.maximum()
+        cursor = self.textCursor()
+        cursor.movePosition(cursor.MoveOperation.End)
+        cursor.insertText(text)
+        if self.document().blockCount() > self.max_lines + TRIM_SLACK_LINES:
+            self.trim()
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def write_spill(self, text):
+        try:
+            if self.spill_file is None:
+                fd, self.spill_path = tempfile.mkstemp(suffix=".log", prefix="shelldesk-output-")
+                self.spill_file = os.fdopen(fd, "w", encoding="utf-8")
+                # The widget's own methods no longer run once it is destroyed
+                self.spill_cleanup = self.destroyed.connect(
+                    functools.partial(remove_spill_file, self.spill_file, self.spill_path))
+            self.spill_file.write(text)
+        except OSError:
+            self.spill = False
+
+    def close_spill(self):
+        if self.spill_file is not None:
+            self.spill_file.close()
+            self.spill_file = None
+
+    def clear(self):
+        self.flush_timer.stop()
+        self.pending = []
+        self.pending_lines = 0
+        self.omitted = 0
+        self.remove_spill()
+        super().clear()
+
+    def remove_spill(self):
+        if self.spill_cleanup is not None:
+            self.destroyed.disconnect(self.spill_cleanup)
+            self.spill_cleanup = None
+        self.close_spill()
+        if self.spill_path and os.path.exists(self.spill_path):
+            try:
+                os.remove(self.spill_path)
+            except OSError:
+                pass
+        self.spill_path = None
+
+    def contextMenuEvent(self, event):
+        menu = self.createStandardContextMenu()
+        if self.spill_path:
+            menu.addSeparator()
+            menu.addAction("Open Full Output", lambda: self.open_full_output.emit(self.spill_path))
+        menu.exec(event.globalPos())
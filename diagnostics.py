@@ -0,0 +1,168 @@
+import sys
+import json
+from collections import OrderedDict
+from PyQt6.QtCore import QCoreApplication, QObject, QProcess, QElapsedTimer, QTimer, pyqtSignal
+
+# A check running longer than this is assumed hung; the checker is restarted
+CHECK_TIMEOUT_MS = 5000
+# A check superseded by a newer edit is abandoned once it has run this long
+ABANDON_AFTER_MS = 500
+# A checker that keeps dying before answering means shell_lite is missing
+MAX_CHECKER_FAILURES = 3
+# Other files open as plain text as far as the checker is concerned
+CHECKED_EXTENSIONS = (".shl", ".sh", ".oka")
+
+# Executed by the checker process: lex and parse each buffer it is sent, the
+# way `shell_lite lint` does, and answer with one JSON line per request.
+CHECKER_SOURCE = r'''
+import os, sys, re, json
+out = sys.stdout
+# The parser prints debug output; keep it off the reply channel
+sys.stdout = open(os.devnull, "w")
+from shell_lite.lexer import Lexer
+from shell_lite.parser import Parser
+location = re.compile(r"line (\d+)(?:, column (\d+))?")
+while True:
+    header = sys.stdin.buffer.readline()
+    if not header:
+        break
+    request = json.loads(header)
+    source = sys.stdin.buffer.read(request["length"]).decode("utf-8", "replace")
+    found = []
+    try:
+        Parser(Lexer(source).tokenize()).parse()
+    except Exception as e:
+        message = str(e) or type(e).__name__
+        match = location.search(message)
+        line = getattr(e, "line", None) or (int(match.group(1)) if match else 1)
+        column = int(match.group(2)) - 1 if match and match.group(2) else 0
+        found.append({"line": line, "column": column, "message": message})
+    out.write(json.dumps({"id": request["id"], "diagnostics": found}) + "\n")
+    out.flush()
+'''
+
+def checks_syntax(path):
+    return path is None or path.lower().endswith(CHECKED_EXTENSIONS)
+
+class DiagnosticsService(QObject):
+    # One long-lived checker process shared by every tab. Only the newest
+    # text of each document waits to be sent; an older request still queued
+    # is replaced, and an answer for text that has changed since is dropped.
+    checked = pyqtSignal(object, object)  # document key, [{"line", "column", "message"}, ...]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.process = None
+        self.buffer = b""
+        self.pending = OrderedDict()
+        self.latest = {}
+        self.in_flight = None
+        self.next_id = 1
+        self.failures = 0
+        self.broken = False
+        self.killed = False
+        self.clock = QElapsedTimer()
+        self.timeout = QTimer(self)
+        self.timeout.setSingleShot(True)
+        self.timeout.setInterval(CHECK_TIMEOUT_MS)
+        self.timeout.timeout.connect(self.restart)
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown)
+
+    def check(self, key, text):
+        if self.broken:
+            return
+        self.pending[key] = text
+        self.pending.move_to_end(key)
+        if self.in_flight is not None and self.in_flight[1] == key and self.clock.elapsed() > ABANDON_AFTER_MS:
+            # Its answer would be thrown away anyway
+            self.restart()
+            return
+        self.send_next()
+
+    def cancel(self, key):
+        self.pending.pop(key, None)
+        self.latest.pop(key, None)
+
+    def spawn(self):
+        from editor.runner import shell_lite_env
+        self.buffer = b""
+        self.killed = False
+        process = QProcess(self)
+        process.setProcessEnvironment(shell_lite_env())
+        process.setStandardErrorFile(QProcess.nullDevice())
+        process.readyReadStandardOutput.connect(self.on_ready_read)
+        process.finished.connect(lambda *args, p=process: self.on_exit(p))
+        process.start(sys.executable, ["-c", CHECKER_SOURCE])
+        self.process = process
+
+    def send_next(self):
+        if self.in_flight is not None or not self.pending or self.broken:
+            return
+        if self.process is None:
+            self.spawn()
+        key, text = self.pending.popitem(last=False)
+        request_id = self.next_id
+        self.next_id += 1
+        self.latest[key] = request_id
+        self.in_flight = (request_id, key)
+        payload = text.encode("utf-8")
+        header = json.dumps({"id": request_id, "length": len(payload)}) + "\n"
+        self.process.write(header.encode("utf-8") + payload)
+        self.clock.start()
+        self.timeout.start()
+
+    def on_ready_read(self):
+        self.buffer += self.process.readAllStandardOutput().data()
+        while b"\n" in self.buffer:
+            line, self.buffer = self.buffer.split(b"\n", 1)
+            try:
+                reply = json.loads(line)
+            except ValueError:
+                continue
+            if self.in_flight is None or reply.get("id") != self.in_flight[0]:
+                continue
+            request_id, key = self.in_flight
+            self.in_flight = None
+            self.timeout.stop()
+            self.failures = 0
+            if self.latest.get(key) == request_id and key not in self.pending:
+                self.checked.emit(key, reply.get("diagnostics", []))
+        self.send_next()
+
+    def restart(self):
+        if self.process is not None:
+            self.killed = True
+            self.process.kill()
+
+    def on_exit(self, process):
+        if process is not self.process:
+            process.deleteLater()
+            return
+        if not self.killed:
+            self.failures += 1
+            if self.failures >= MAX_CHECKER_FAILURES:
+                self.broken = True
+                self.pending.clear()
+        self.process = None
+        self.in_flight = None
+        self.timeout.stop()
+        process.deleteLater()
+        QTimer.singleShot(0, self.send_next)
+
+    def shutdown(self):
+        self.pending.clear()
+        if self.process is not None:
+            self.process.finished.disconnect()
+            self.process.kill()
+            self.process.waitForFinished(1000)
+            self.process = None
+
+_shared_service = None
+
+def shared_diagnostics():
+    global _shared_service
+    if _shared_service is None:
+        _shared_service = DiagnosticsService()
+    return _shared_service
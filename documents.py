@@ -0,0 +1,135 @@
+import os
+import zlib
+from collections import OrderedDict
+
+# Editors kept alive; tabs focused less recently than this many hibernate
+MAX_LIVE_EDITORS = 20
+
+class Document:
+    # One open tab. While hibernated, `widget` is an empty placeholder and
+    # the buffer lives here: compressed when it differs from disk, otherwise
+    # only the file stamp, and it is read back when the tab is focused.
+    def __init__(self, path, widget):
+        self.path = path
+        self.widget = widget
+        self.hibernated = False
+        self.packed = None
+        self.stamp = None
+        self.modified = False
+        self.edits = 0
+        self.cursor = (0, 0)
+        self.first_line = 0
+
+    def is_editor(self):
+        from editor.editor_widget import ShellLiteEditor
+        return isinstance(self.widget, ShellLiteEditor)
+
+    def is_modified(self):
+        if self.hibernated:
+            return self.modified
+        return self.is_editor() and self.widget.isModified()
+
+    def edit_count(self):
+        return self.edits if self.hibernated else self.widget.edit_count
+
+    def text(self):
+        if not self.hibernated:
+            return self.widget.text()
+        if self.packed is not None:
+            return zlib.decompress(self.packed).decode('utf-8')
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def capture(self, editor):
+        self.modified = editor.isModified()
+        self.edits = editor.edit_count
+        self.cursor = editor.getCursorPosition()
+        self.first_line = editor.firstVisibleLine()
+        self.stamp = None
+        self.packed = None
+        if self.path is not None and not self.modified:
+            try:
+                st = os.stat(self.path)
+                self.stamp = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                pass
+        if self.stamp is None:
+            self.packed = zlib.compress(editor.text().encode('utf-8'), 1)
+        self.hibernated = True
+
+    def defer(self, cursor, first_line, content=None):
+        # Hibernated without ever having had an editor, as restored tabs start;
+        # content is given only for a buffer that differs from disk
+        self.cursor = tuple(cursor)
+        self.first_line = first_line
+        self.modified = content is not None
+        self.packed = zlib.compress(content.encode('utf-8'), 1) if content is not None else None
+        self.stamp = None
+        self.hibernated = True
+
+    def restore(self, editor, content):
+        editor.setText(content)
+        editor.setModified(self.modified)
+        editor.edit_count = self.edits
+        editor.setFirstVisibleLine(self.first_line)
+        editor.setCursorPosition(*self.cursor)
+        self.packed = None
+        self.stamp = None
+        self.hibernated = False
+
+class DocumentRegistry:
+    def __init__(self, max_live=MAX_LIVE_EDITORS):
+        self.max_live = max_live
+        self.by_path = {}
+        self.by_widget = {}
+        # Documents with a live editor, least recently focused first
+        self.live = OrderedDict()
+
+    def __len__(self):
+        return len(self.by_widget)
+
+    def documents(self):
+        return list(self.by_widget.values())
+
+    def add(self, document):
+        if document.path is not None:
+            self.by_path[document.path] = document
+        self.by_widget[document.widget] = document
+        if document.is_editor():
+            self.live[document] = None
+
+    def remove(self, document):
+        if document.path is not None and self.by_path.get(document.path) is document:
+            del self.by_path[document.path]
+        self.by_widget.pop(document.widget, None)
+        self.live.pop(document, None)
+
+    def for_path(self, path):
+        return self.by_path.get(path)
+
+    def for_widget(self, widget):
+        return self.by_widget.get(widget)
+
+    def set_path(self, document, path):
+        if document.path is not None and self.by_path.get(document.path) is document:
+            del self.by_path[document.path]
+        document.path = path
+        self.by_path[path] = document
+
+    def set_widget(self, document, widget):
+        self.by_widget.pop(document.widget, None)
+        document.widget = widget
+        self.by_widget[widget] = document
+        if document.is_editor():
+            self.live[document] = None
+        else:
+            self.live.pop(document, None)
+
+    def touch(self, document):
+        if document in self.live:
+            self.live.move_to_end(document)
+
+    def over_limit(self):
+        # Least recently focused first
+        excess = len(self.live) - self.max_live
+        return list(self.live)[:excess] if excess > 0 else []
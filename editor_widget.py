@@ -1,7 +1,32 @@
-from PyQt6.QtWidgets import QApplication
+from PyQt6.QtWidgets import QApplication, QToolTip
 from PyQt6.QtGui import QColor, QFont, QFontMetrics
+from PyQt6.QtCore import QPoint
 from PyQt6.Qsci import QsciScintilla, QsciLexerCustom
 from editor.styles import COLORS
+from editor.tracing import traced
+
+COMPLETION_LIST_ID = 1
+# Scintilla's SC_ORDER_CUSTOM: show list entries in the order given
+SC_ORDER_CUSTOM = 2
+DIAGNOSTIC_INDICATOR = 8
+DIAGNOSTIC_MARKER = 8
+DIAGNOSTICS_MARGIN = 1
+FOLD_MARGIN = 2
+PROFILE_MARGIN = 3
+# Share of the run's time from which a line's cost is shown as warm or hot
+PROFILE_WARM_SHARE = 0.01
+PROFILE_HOT_SHARE = 0.10
+# Quiet time after the last edit before the buffer is checked
+DIAGNOSTICS_DELAY_MS = 400
+# Margin text styles take style numbers shared by every editor, so they
+# are made once
+PROFILE_STYLES = []
+def profile_margin_styles(font):
+    if not PROFILE_STYLES:
+        from PyQt6.Qsci import QsciStyle
+        for color in (COLORS["text_dim"], "#e5c07b", COLORS["error"]):
+            PROFILE_STYLES.append(QsciStyle(-1, "Profile", QColor(color), QColor(COLORS["bg_panel"]), font))
+    return PROFILE_STYLES
 class ShellLiteEditor(QsciScintilla):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -17,6 +42,10 @@ class ShellLiteEditor(QsciScintilla):
         font.setStyleHint(QFont.StyleHint.Monospace)
         self.setFont(font)
         self.setMarginsFont(font)
+        self.editor_font = font
+        self.large_file = False
+        # Bumped on every change, so a finished save knows if the buffer moved on
+        self.edit_count = 0
         self.setColor(QColor(COLORS["text_main"]))
         self.setPaper(QColor(COLORS["editor_bg"]))
         font_metrics = QFontMetrics(font)
@@ -32,53 +61,214 @@ class ShellLiteEditor(QsciScintilla):
         from editor.lexer import ShellLiteLexer
         self.lexer = ShellLiteLexer(self)
         self.setLexer(self.lexer)
-        from PyQt6.Qsci import QsciAPIs
-        self.api = QsciAPIs(self.lexer)
-        keywords = [
-            "say", "print", "show", "ask", "if", "else", "elif", "unless",
-            "while", "until", "for", "forever", "repeat", "times", "stop", "skip",
-            "return", "give", "fn", "is", "break", "continue", "in", "make", "new",
-            "thing", "extends", "has", "can", "to", "try", "catch", "always",
-            "throw", "error", "import", "use", "as", "share", "exit", "const",
-            "true", "false", "yes", "no"
-        ]
-        for k in keywords:
-            self.api.add(k)
-        stdlib = [
-            "math.pi", "math.e", "math.sqrt", "math.sin", "math.cos", "math.floor", "math.ceil", "math.random",
-            "time.date", "time.year", "time.month", "time.day", "time.sleep",
-            "color.red", "color.green", "color.blue", "color.yellow", "color.bold",
-            "path.basename", "path.dirname", "path.ext", "path.exists", "path.join",
-            "env.get", "env.has", "env.set",
-            "re.match", "re.findall", "re.replace", "re.split",
-            "json_stringify", "json_parse"
-        ]
-        for s in stdlib:
-            self.api.add(s)
-        self.api.prepare()
-        self.setAutoCompletionSource(QsciScintilla.AutoCompletionSource.AcsAll)
-        self.setAutoCompletionThreshold(1)
-        self.setAutoCompletionCaseSensitivity(False)
-        self.setAutoCompletionReplaceWord(True)
+        # Fold levels come from the lexer's per-line cache
+        self.setFolding(QsciScintilla.FoldStyle.BoxedTreeFoldStyle, FOLD_MARGIN)
+        self.setFoldMarginColors(QColor(COLORS["bg_panel"]), QColor(COLORS["bg_panel"]))
+        from editor.completion import DocumentCompleter
+        # Completion is ranked here and shown as a user list, which Scintilla
+        # keeps in our order instead of sorting it
+        self.completer = DocumentCompleter()
+        self.setAutoCompletionSource(QsciScintilla.AutoCompletionSource.AcsNone)
+        self.SendScintilla(QsciScintilla.SCI_AUTOCSETORDER, SC_ORDER_CUSTOM)
+        self.SendScintilla(QsciScintilla.SCI_AUTOCSETIGNORECASE, 1)
+        self.SCN_CHARADDED.connect(self.on_char_added)
+        self.userListActivated.connect(self.on_completion_chosen)
+        from editor.symbols import SymbolIndex
+        self.symbol_index = SymbolIndex(self)
+        self.symbol_index.changed.connect(self.on_symbols_changed)
         self.textChanged.connect(self.on_text_changed)
         from PyQt6.QtCore import QTimer
-        self.scan_timer = QTimer()
+        self.scan_timer = QTimer(self)
         self.scan_timer.setSingleShot(True)
-        self.scan_timer.setInterval(2000)
+        self.scan_timer.setInterval(500)
         self.scan_timer.timeout.connect(self.scan_document)
+        self.setup_diagnostics()
+        self.profile_lines = {}
         self.scan_document()
+    def enable_large_file_mode(self):
+        # Huge buffers are plain text: lexing, symbol scans and document-word
+        # completion all walk the whole file, so none of them run
+        self.large_file = True
+        self.SCN_MODIFIED.disconnect(self.lexer.on_modified)
+        self.SCN_MODIFIED.disconnect(self.symbol_index.on_modified)
+        self.lexer.cancel_background()
+        self.lexer.fill_timer.stop()
+        self.setLexer(None)
+        self.setFont(self.editor_font)
+        self.setColor(QColor(COLORS["text_main"]))
+        self.setPaper(QColor(COLORS["editor_bg"]))
+        self.setAutoCompletionSource(QsciScintilla.AutoCompletionSource.AcsNone)
+        self.setFolding(QsciScintilla.FoldStyle.NoFoldStyle, FOLD_MARGIN)
+        self.lexer.fold_timer.stop()
+        self.scan_timer.stop()
+        self.set_diagnostics_enabled(False)
+        font_metrics = QFontMetrics(self.editor_font)
+        self.setMarginWidth(0, font_metrics.horizontalAdvance("000000000") + 10)
     def on_text_changed(self):
-        self.scan_timer.start()
+        self.edit_count += 1
+        if not self.large_file:
+            self.scan_timer.start()
+        if self.diagnostics_enabled:
+            self.diagnostics_timer.start()
+    @traced("scan")
     def scan_document(self):
-        import re
-        code = self.text()
-        funcs = re.findall(r'(?:to|fn)\s+([a-zA-Z_]\w*)', code)
-        vars_ = re.findall(r'([a-zA-Z_]\w*)\s*=', code)
-        if not hasattr(self, 'added_tokens'):
-            self.added_tokens = set()
-        new_tokens = set(funcs + vars_)
-        for token in new_tokens:
-            if token not in self.added_tokens:
-                self.api.add(token)
-                self.added_tokens.add(token)
-        self.api.prepare()
+        if self.large_file:
+            return
+        # Only lines edited since the last scan are rescanned, off the GUI thread
+        self.symbol_index.rescan()
+    def setup_diagnostics(self):
+        # Syntax errors from a checker process: squiggles, a margin dot and
+        # the message as a tooltip when the mouse rests on the line
+        from PyQt6.QtCore import QTimer
+        self.diagnostics_enabled = True
+        self.diagnostics = {}
+        self.checked_edit = None
+        self.diagnostics_timer = QTimer(self)
+        self.diagnostics_timer.setSingleShot(True)
+        self.diagnostics_timer.setInterval(DIAGNOSTICS_DELAY_MS)
+        self.diagnostics_timer.timeout.connect(self.request_diagnostics)
+        self.indicatorDefine(QsciScintilla.IndicatorStyle.SquiggleIndicator, DIAGNOSTIC_INDICATOR)
+        self.setIndicatorForegroundColor(QColor(COLORS["error"]), DIAGNOSTIC_INDICATOR)
+        self.markerDefine(QsciScintilla.MarkerSymbol.Circle, DIAGNOSTIC_MARKER)
+        self.setMarkerBackgroundColor(QColor(COLORS["error"]), DIAGNOSTIC_MARKER)
+        self.setMarkerForegroundColor(QColor(COLORS["error"]), DIAGNOSTIC_MARKER)
+        self.setMarginType(DIAGNOSTICS_MARGIN, QsciScintilla.MarginType.SymbolMargin)
+        self.setMarginWidth(DIAGNOSTICS_MARGIN, 14)
+        self.setMarginMarkerMask(DIAGNOSTICS_MARGIN, 1 << DIAGNOSTIC_MARKER)
+        self.SendScintilla(QsciScintilla.SCI_SETMOUSEDWELLTIME, 500)
+        self.SCN_DWELLSTART.connect(self.on_dwell_start)
+        self.SCN_DWELLEND.connect(lambda *args: QToolTip.hideText())
+        from editor.diagnostics import shared_diagnostics
+        service = shared_diagnostics()
+        service.checked.connect(self.on_diagnostics)
+        key = id(self)
+        self.destroyed.connect(lambda *args: service.cancel(key))
+    def set_diagnostics_enabled(self, enabled):
+        self.diagnostics_enabled = enabled
+        if not enabled:
+            self.diagnostics_timer.stop()
+            from editor.diagnostics import shared_diagnostics
+            shared_diagnostics().cancel(id(self))
+            self.show_diagnostics([])
+    def request_diagnostics(self):
+        if not self.diagnostics_enabled:
+            return
+        from editor.diagnostics import shared_diagnostics
+        self.checked_edit = self.edit_count
+        shared_diagnostics().check(id(self), self.text())
+    def on_diagnostics(self, key, diagnostics):
+        # Positions are only good for the text that was checked
+        if key == id(self) and self.diagnostics_enabled and self.checked_edit == self.edit_count:
+            self.show_diagnostics(diagnostics)
+    def show_diagnostics(self, diagnostics):
+        last_line = max(0, self.lines() - 1)
+        self.clearIndicatorRange(0, 0, last_line, len(self.text(last_line)), DIAGNOSTIC_INDICATOR)
+        self.markerDeleteAll(DIAGNOSTIC_MARKER)
+        self.diagnostics = {}
+        for diagnostic in diagnostics:
+            line = min(max(diagnostic["line"] - 1, 0), last_line)
+            text = self.text(line).rstrip("\r\n")
+            end = len(text.rstrip())
+            start = min(diagnostic["column"], end) or len(text) - len(text.lstrip())
+            if start >= end:
+                # Nothing on the line to underline; mark the character before the end
+                start = max(0, end - 1)
+            self.fillIndicatorRange(line, start, line, max(end, start + 1), DIAGNOSTIC_INDICATOR)
+            self.markerAdd(line, DIAGNOSTIC_MARKER)
+            self.diagnostics.setdefault(line, []).append(diagnostic["message"])
+    def on_dwell_start(self, position, x, y):
+        if position < 0 or not (self.diagnostics or self.profile_lines):
+            return
+        line = self.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, position)
+        tips = list(self.diagnostics.get(line, []))
+        if line in self.profile_lines:
+            entry = self.profile_lines[line]
+            tips.append(f"{entry['hits']} hits, {entry['self_s'] * 1000:.2f}ms self, "
+                        f"{entry['total_s'] * 1000:.2f}ms total")
+        if tips:
+            QToolTip.showText(self.mapToGlobal(QPoint(x, y)), "\n".join(tips), self)
+    def show_profile(self, lines, run_s):
+        # Self time per line in a text margin, coloured by its share of the
+        # run. Scintilla moves margin text with its line, so the figures
+        # stay on their lines while the script is edited afterwards.
+        cool, warm, hot = profile_margin_styles(self.editor_font)
+        self.clearMarginText()
+        self.profile_lines = {}
+        last_line = self.lines() - 1
+        widest = ""
+        for entry in lines:
+            line = entry["line"] - 1
+            if not 0 <= line <= last_line:
+                continue
+            own = entry["self_s"]
+            share = own / run_s if run_s else 0.0
+            style = hot if share >= PROFILE_HOT_SHARE else warm if share >= PROFILE_WARM_SHARE else cool
+            text = f"{own * 1000:.1f}ms" if own < 10 else f"{own:.2f}s"
+            self.setMarginText(line, text, style)
+            self.profile_lines[line] = entry
+            widest = max(widest, text, key=len)
+        self.setMarginType(PROFILE_MARGIN, QsciScintilla.MarginType.TextMargin)
+        self.setMarginWidth(PROFILE_MARGIN, QFontMetrics(self.editor_font).horizontalAdvance(widest + "0") if widest else 0)
+    def clear_profile(self):
+        if self.profile_lines:
+            self.clearMarginText()
+            self.setMarginWidth(PROFILE_MARGIN, 0)
+            self.profile_lines = {}
+    @traced("fold.all")
+    def fold_all(self, fold=True):
+        # The levels are all cached already, so this is one pass inside
+        # Scintilla. Left to itself, Scintilla styles every line it walks
+        # first, a line at a time; the styled position is moved to the end
+        # for the pass and back after it, so nothing is restyled needlessly.
+        if self.large_file:
+            return
+        self.lexer.flush_folds()
+        send = self.SendScintilla
+        end_styled = send(QsciScintilla.SCI_GETENDSTYLED)
+        send(QsciScintilla.SCI_STARTSTYLING, send(QsciScintilla.SCI_GETLENGTH))
+        action = QsciScintilla.SC_FOLDACTION_CONTRACT if fold else QsciScintilla.SC_FOLDACTION_EXPAND
+        send(QsciScintilla.SCI_FOLDALL, action)
+        send(QsciScintilla.SCI_STARTSTYLING, end_styled)
+    def on_symbols_changed(self, symbols):
+        self.completer.set_symbols(symbols)
+    def on_char_added(self, char):
+        if self.large_file:
+            return
+        from editor.completion import completion_prefix
+        line, index = self.getCursorPosition()
+        prefix = completion_prefix(self.text(line)[:index])
+        words = self.completer.complete(prefix) if prefix else []
+        if not words or words == [prefix]:
+            if self.isListActive():
+                self.cancelList()
+            return
+        self.showUserList(COMPLETION_LIST_ID, words)
+    def on_completion_chosen(self, list_id, word):
+        if list_id != COMPLETION_LIST_ID:
+            return
+        from editor.completion import completion_prefix, WORD_AFTER
+        line, index = self.getCursorPosition()
+        text = self.text(line)
+        # Replaces the whole word under the caret, not just the typed part
+        start = index - len(completion_prefix(text[:index]))
+        end = index + len(WORD_AFTER.match(text[index:]).group())
+        self.setSelection(line, start, line, end)
+        self.replaceSelectedText(word)
+        self.completer.record(word)
+    @traced("reload.apply")
+    def apply_line_edits(self, edits):
+        # A file changed on disk, applied as whole-line replacements: the
+        # caret, undo history and styling of untouched lines all stay, and
+        # one undo step takes the reload back out
+        send = self.SendScintilla
+        self.beginUndoAction()
+        for first, end, text in edits:
+            line_count = send(QsciScintilla.SCI_GETLINECOUNT)
+            length = send(QsciScintilla.SCI_GETLENGTH)
+            start = send(QsciScintilla.SCI_POSITIONFROMLINE, first) if first < line_count else length
+            stop = send(QsciScintilla.SCI_POSITIONFROMLINE, end) if end < line_count else length
+            data = text.encode("utf-8")
+            send(QsciScintilla.SCI_SETTARGETRANGE, start, stop)
+            send(QsciScintilla.SCI_REPLACETARGET, len(data), data)
+        self.endUndoAction()
+        self.setModified(False)
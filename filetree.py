@@ -0,0 +1,343 @@
+import os
+import re
+from PyQt6.QtCore import Qt, QAbstractItemModel, QModelIndex, QFileSystemWatcher
+from PyQt6.QtWidgets import QFileIconProvider
+from editor.workspace import SKIP_DIRS
+
+# Rows added per directory at a time; the rest wait behind a "load more" row
+PAGE_SIZE = 500
+
+def compile_pattern(pattern, base=""):
+    # One .gitignore line -> (regex over paths relative to the root, negated, dir_only)
+    pattern = pattern.strip()
+    if not pattern or pattern.startswith("#"):
+        return None
+    negated = pattern.startswith("!")
+    if negated:
+        pattern = pattern[1:]
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+            continue
+        c = pattern[i]
+        if c == "*":
+            regex += "[^/]*"
+        elif c == "?":
+            regex += "[^/]"
+        elif c == "[" and "]" in pattern[i + 1:]:
+            end = pattern.index("]", i + 1)
+            body = pattern[i + 1:end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            regex += "[" + body.replace("\\", "\\\\") + "]"
+            i = end
+        else:
+            regex += re.escape(c)
+        i += 1
+    prefix = re.escape(base + "/") if base else ""
+    if not anchored:
+        prefix += "(?:.*/)?"
+    return re.compile(prefix + regex + "$"), negated, dir_only
+
+class IgnoreRules:
+    # Built-in skips, then .gitignore files as directories are listed, then
+    # the user's own patterns; like git, the last matching rule wins.
+    def __init__(self, root, excludes=()):
+        self.root = root
+        self.defaults = [compile_pattern(name + "/") for name in sorted(SKIP_DIRS)]
+        self.user = [rule for rule in map(compile_pattern, excludes) if rule]
+        self.gitignores = {}
+
+    def gitignore(self, rel_dir):
+        rules = self.gitignores.get(rel_dir)
+        if rules is None:
+            rules = []
+            try:
+                with open(os.path.join(self.root, rel_dir, ".gitignore"), 'r', encoding='utf-8', errors='replace') as f:
+                    for line in f:
+                        rule = compile_pattern(line, rel_dir)
+                        if rule:
+                            rules.append(rule)
+            except OSError:
+                pass
+            self.gitignores[rel_dir] = rules
+        return rules
+
+    def rules_in(self, rel_dir):
+        # Every rule that applies inside rel_dir, lowest precedence first
+        rules = self.defaults + self.gitignore("")
+        current = ""
+        for part in rel_dir.split("/") if rel_dir else []:
+            current = f"{current}/{part}" if current else part
+            rules = rules + self.gitignore(current)
+        return rules + self.user
+
+    def ignored(self, rel_path, is_dir, rules=None):
+        if rules is None:
+            rules = self.rules_in(rel_path.rpartition("/")[0])
+        result = False
+        for regex, negated, dir_only in rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                result = not negated
+        return result
+
+class TreeNode:
+    __slots__ = ("path", "name", "is_dir", "parent", "row", "children", "pending", "more")
+
+    def __init__(self, path, name, is_dir, parent, row, more=False):
+        self.path = path
+        self.name = name
+        self.is_dir = is_dir
+        self.parent = parent
+        self.row = row
+        self.children = []
+        # Sorted (name, is_dir) entries not shown yet; None until first listed
+        self.pending = None
+        self.more = more
+
+    def key(self):
+        return (not self.is_dir, self.name.lower(), self.name)
+
+def entry_key(entry):
+    name, is_dir = entry
+    return (not is_dir, name.lower(), name)
+
+class FileTreeModel(QAbstractItemModel):
+    # The workspace tree, listed one directory at a time as it is expanded.
+    # Ignored entries are dropped while listing, so an ignored directory is
+    # never read, stat-ed or watched; only expanded directories are watched.
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        provider = QFileIconProvider()
+        self.folder_icon = provider.icon(QFileIconProvider.IconType.Folder)
+        self.file_icon = provider.icon(QFileIconProvider.IconType.File)
+        self.root = None
+        self.rules = None
+        self.excludes = []
+        self.watched = {}
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+
+    def set_root(self, path):
+        self.beginResetModel()
+        if self.watched:
+            self.watcher.removePaths(list(self.watched))
+        self.watched = {}
+        path = os.path.abspath(path)
+        self.root = TreeNode(path, os.path.basename(path), True, None, 0)
+        self.rules = IgnoreRules(path, self.excludes)
+        self.endResetModel()
+
+    def set_excludes(self, patterns):
+        self.excludes = list(patterns)
+        if self.root is not None:
+            self.set_root(self.root.path)
+
+    def node(self, index):
+        return index.internalPointer() if index.isValid() else self.root
+
+    def file_path(self, index):
+        node = self.node(index)
+        return None if node is None or node.more else node.path
+
+    def is_more(self, index):
+        return index.isValid() and index.internalPointer().more
+
+    def index(self, row, column, parent=QModelIndex()):
+        node = self.node(parent)
+        if node is None or column != 0 or not 0 <= row < len(node.children):
+            return QModelIndex()
+        return self.createIndex(row, 0, node.children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self.root:
+            return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        node = self.node(parent)
+        return len(node.children) if node is not None else 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self.node(parent)
+        if node is None or not node.is_dir:
+            return False
+        return node.pending is None or bool(node.children)
+
+    def canFetchMore(self, parent):
+        node = self.node(parent)
+        return node is not None and node.is_dir and node.pending is None
+
+    def fetchMore(self, parent):
+        node = self.node(parent)
+        node.pending = self.list_directory(node)
+        self.watch(node)
+        self.show_page(node, parent)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if node.more:
+                remaining = len(node.parent.pending)
+                return f"Load {min(PAGE_SIZE, remaining)} more... ({remaining} not shown)"
+            return node.name
+        if role == Qt.ItemDataRole.DecorationRole and not node.more:
+            return self.folder_icon if node.is_dir else self.file_icon
+        if role == Qt.ItemDataRole.ToolTipRole and not node.more:
+            return node.path
+        return None
+
+    def list_directory(self, node):
+        entries = []
+        base = os.path.relpath(node.path, self.root.path).replace(os.sep, "/")
+        base = "" if base == "." else base + "/"
+        rules = self.rules.rules_in(base.rstrip("/"))
+        try:
+            with os.scandir(node.path) as it:
+                for entry in it:
+                    # Hidden entries stay hidden, as they were with QFileSystemModel
+                    if entry.name.startswith('.'):
+                        continue
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if not self.rules.ignored(base + entry.name, is_dir, rules):
+                        entries.append((entry.name, is_dir))
+        except OSError:
+            pass
+        entries.sort(key=entry_key)
+        return entries
+
+    def show_page(self, node, index):
+        if node.children and node.children[-1].more:
+            last = len(node.children) - 1
+            self.beginRemoveRows(index, last, last)
+            node.children.pop()
+            self.endRemoveRows()
+        page = node.pending[:PAGE_SIZE]
+        del node.pending[:PAGE_SIZE]
+        first = len(node.children)
+        if page:
+            self.beginInsertRows(index, first, first + len(page) - 1)
+            for row, (name, is_dir) in enumerate(page, first):
+                node.children.append(TreeNode(os.path.join(node.path, name), name, is_dir, node, row))
+            self.endInsertRows()
+        if node.pending:
+            row = len(node.children)
+            self.beginInsertRows(index, row, row)
+            node.children.append(TreeNode(None, "", False, node, row, more=True))
+            self.endInsertRows()
+
+    def load_more(self, index):
+        node = index.internalPointer().parent
+        self.show_page(node, index.parent())
+
+    def watch(self, node):
+        if node.path not in self.watched:
+            self.watched[node.path] = node
+            self.watcher.addPath(node.path)
+
+    def unwatch(self, node):
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current.is_dir and self.watched.pop(current.path, None) is not None:
+                self.watcher.removePath(current.path)
+            stack.extend(current.children)
+
+    def index_of(self, node):
+        return QModelIndex() if node is self.root else self.createIndex(node.row, 0, node)
+
+    def on_directory_changed(self, path):
+        node = self.watched.get(path)
+        if node is None:
+            return
+        index = self.index_of(node)
+        entries = self.list_directory(node)
+        shown = [child for child in node.children if not child.more]
+        # Entries sorting before the last shown row are shown, the rest stay paged
+        if node.pending and shown:
+            cutoff = shown[-1].key()
+            visible = [e for e in entries if entry_key(e) <= cutoff]
+            node.pending = [e for e in entries if entry_key(e) > cutoff]
+        else:
+            visible = entries
+            node.pending = []
+        wanted = {entry_key(e) for e in visible}
+        # Rows come and go a run of adjacent rows at a time, and the rows
+        # are renumbered once after all of them, not after every row
+        removed = []
+        for child in shown:
+            if child.key() not in wanted:
+                if removed and removed[-1][1] == child.row - 1:
+                    removed[-1][1] = child.row
+                else:
+                    removed.append([child.row, child.row])
+        # Last run first, so the rows of the runs before it still hold
+        for first, last in reversed(removed):
+            for child in node.children[first:last + 1]:
+                self.unwatch(child)
+            self.beginRemoveRows(index, first, last)
+            del node.children[first:last + 1]
+            self.endRemoveRows()
+        if removed:
+            self.renumber(node)
+        existing = {child.key() for child in node.children if not child.more}
+        added = []
+        for row, (name, is_dir) in enumerate(visible):
+            if entry_key((name, is_dir)) in existing:
+                continue
+            child = TreeNode(os.path.join(node.path, name), name, is_dir, node, row)
+            if added and added[-1][0] + len(added[-1][1]) == row:
+                added[-1][1].append(child)
+            else:
+                added.append((row, [child]))
+        # First run first: the rows before each run are already final
+        for first, children in added:
+            self.beginInsertRows(index, first, first + len(children) - 1)
+            node.children[first:first] = children
+            self.endInsertRows()
+        if added:
+            self.renumber(node)
+        has_more_row = bool(node.children) and node.children[-1].more
+        if has_more_row and not node.pending:
+            last = len(node.children) - 1
+            self.beginRemoveRows(index, last, last)
+            node.children.pop()
+            self.endRemoveRows()
+        elif node.pending and not has_more_row:
+            last = len(node.children)
+            self.beginInsertRows(index, last, last)
+            node.children.append(TreeNode(None, "", False, node, last, more=True))
+            self.endInsertRows()
+        elif has_more_row:
+            more = self.index(len(node.children) - 1, 0, index)
+            self.dataChanged.emit(more, more)
+
+    def renumber(self, node):
+        for row, child in enumerate(node.children):
+            child.row = row
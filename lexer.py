@@ -1,15 +1,148 @@
-from PyQt6.Qsci import QsciLexerCustom
+import re
+from PyQt6.Qsci import QsciLexerCustom, QsciScintilla
 from PyQt6.QtGui import QColor, QFont
+from PyQt6.QtCore import QThread, QTimer, pyqtSignal
+from editor.workers import start_job
+from editor.tracing import traced
+
+KEYWORDS = {
+    "say", "print", "show", "ask", "if", "else", "elif", "unless",
+    "while", "until", "for", "forever", "repeat", "times", "stop", "skip",
+    "return", "give", "fn", "is", "break", "continue", "in", "make", "new",
+    "thing", "extends", "has", "can", "to", "try", "catch", "always",
+    "throw", "error", "import", "use", "as", "share", "exit", "const",
+    "when"
+}
+
+# Style ids, shared with the lexer instance attributes of the same name
+DEFAULT, KEYWORD, STRING, COMMENT, NUMBER, FUNCTION, OPERATOR = range(7)
+
+# End-of-line states: a line either ends clean or inside an open string
+STATE_DEFAULT = 0
+STATE_DQ_STRING = 1
+STATE_SQ_STRING = 2
+
+token_spec = [
+    ('COMMENT', r'#.*'),
+    ('STRING',  r'"[^"\n]*"|\'[^\'\n]*\''),
+    ('OPEN_DQ', r'"[^"\n]*'),
+    ('OPEN_SQ', r'\'[^\'\n]*'),
+    ('NUMBER',  r'\d+(\.\d*)?'),
+    ('KEYWORD', r'\b(' + '|'.join(KEYWORDS) + r')\b'),
+    ('OPERATOR', r'[+\-*/%=<>!&|^~]+'),
+    ('SKIP',    r'[ \t\n]+'),
+    ('MISC',    r'.'),
+]
+TOKEN_REGEX = re.compile('|'.join('(?P<%s>%s)' % pair for pair in token_spec))
+KIND_STYLES = {'KEYWORD': KEYWORD, 'STRING': STRING, 'OPEN_DQ': STRING,
+               'OPEN_SQ': STRING, 'COMMENT': COMMENT, 'NUMBER': NUMBER}
+OPEN_STATES = {'OPEN_DQ': STATE_DQ_STRING, 'OPEN_SQ': STATE_SQ_STRING}
+CLOSE_QUOTES = {STATE_DQ_STRING: '"', STATE_SQ_STRING: "'"}
+STYLE_BYTES = [bytes((style,)) for style in range(OPERATOR + 1)]
+
+# Lines starting with one of these open a fold when the next code line is
+# indented deeper; blank and comment-only lines take the level below them
+BLOCK_KEYWORDS = {
+    b"fn", b"to", b"if", b"elif", b"else", b"unless", b"while", b"until", b"for",
+    b"forever", b"repeat", b"try", b"catch", b"always", b"when", b"thing"
+}
+LINE_START = re.compile(rb'([ \t]*)(?:(#)|([A-Za-z_]\w*))?(\S)?')
+MAX_FOLD_INDENT = 1000
+# Fold levels set per turn of the event loop, bottom of the edit first; a
+# freshly loaded big file gets its folds over a few turns, not one stall
+FOLD_SLICE_LINES = 2000
+
+# Style requests spanning more lines than this go to the tokenizer thread
+BACKGROUND_MIN_LINES = 2000
+CHUNK_LINES = 1000
+IDLE_FILL_MS = 250
+
+def tokenize_line(line, state=STATE_DEFAULT):
+    # Returns ([(byte_length, style), ...], end_state) for one line of text,
+    # including its EOL characters. Adjacent runs of one style are merged.
+    runs = []
+    ascii_only = line.isascii()
+    pos = 0
+    if state in CLOSE_QUOTES:
+        close = line.find(CLOSE_QUOTES[state])
+        if close == -1:
+            nl = len(line.rstrip('\r\n'))
+            head, tail = line[:nl], line[nl:]
+            if head:
+                runs.append([len(head) if ascii_only else len(head.encode('utf-8', 'surrogateescape')), STRING])
+            if tail:
+                runs.append([len(tail), DEFAULT])
+            return runs, state
+        pos = close + 1
+        runs.append([pos if ascii_only else len(line[:pos].encode('utf-8', 'surrogateescape')), STRING])
+        state = STATE_DEFAULT
+    for mo in TOKEN_REGEX.finditer(line, pos):
+        kind = mo.lastgroup
+        style = KIND_STYLES.get(kind, DEFAULT)
+        if kind in OPEN_STATES:
+            state = OPEN_STATES[kind]
+        if ascii_only:
+            length = mo.end() - mo.start()
+        else:
+            length = len(mo.group().encode('utf-8', 'surrogateescape'))
+        if runs and runs[-1][1] == style:
+            runs[-1][0] += length
+        else:
+            runs.append([length, style])
+    return runs, state
+
+def line_block(raw, tab_width=4):
+    # (indent columns, opens a block) for a code line, None for blank and
+    # comment-only lines; works on the line's bytes, no decoding needed
+    indent, comment, word, other = LINE_START.match(raw).groups()
+    if comment or not (word or other):
+        return None
+    columns = len(indent.expandtabs(tab_width)) if b'\t' in indent else len(indent)
+    return min(columns, MAX_FOLD_INDENT), word in BLOCK_KEYWORDS
+
+class TokenizerThread(QThread):
+    # generation, first line, per-line runs, per-line end states, style bytes
+    chunk_ready = pyqtSignal(int, int, object, object, bytes)
+
+    def __init__(self, generation, first_line, data, state, parent=None):
+        super().__init__(parent)
+        self.generation = generation
+        self.first_line = first_line
+        self.data = data
+        self.state = state
+
+    @traced("lex.background")
+    def run(self):
+        lines = self.data.splitlines(keepends=True)
+        state = self.state
+        for offset in range(0, len(lines), CHUNK_LINES):
+            if self.isInterruptionRequested():
+                return
+            chunk_runs = []
+            chunk_states = []
+            styles = bytearray()
+            for raw in lines[offset:offset + CHUNK_LINES]:
+                runs, state = tokenize_line(raw.decode('utf-8', 'surrogateescape'), state)
+                chunk_runs.append(runs)
+                chunk_states.append(state)
+                for length, style in runs:
+                    styles += STYLE_BYTES[style] * length
+            self.chunk_ready.emit(self.generation, self.first_line + offset,
+                                  chunk_runs, chunk_states, bytes(styles))
+
 class ShellLiteLexer(QsciLexerCustom):
+    # Emitted after an edit changed any fold level
+    folds_changed = pyqtSignal()
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.DEFAULT = 0
-        self.KEYWORD = 1
-        self.STRING = 2
-        self.COMMENT = 3
-        self.NUMBER = 4
-        self.FUNCTION = 5
-        self.OPERATOR = 6
+        self.DEFAULT = DEFAULT
+        self.KEYWORD = KEYWORD
+        self.STRING = STRING
+        self.COMMENT = COMMENT
+        self.NUMBER = NUMBER
+        self.FUNCTION = FUNCTION
+        self.OPERATOR = OPERATOR
         from editor.styles import COLORS
         self.colors = {
             self.DEFAULT: COLORS["text_main"],
@@ -20,25 +153,33 @@ class ShellLiteLexer(QsciLexerCustom):
             self.FUNCTION: "#8be9fd",
             self.OPERATOR: "#ffb86c"
         }
-        self.keywords = {
-            "say", "print", "show", "ask", "if", "else", "elif", "unless",
-            "while", "until", "for", "forever", "repeat", "times", "stop", "skip",
-            "return", "give", "fn", "is", "break", "continue", "in", "make", "new",
-            "thing", "extends", "has", "can", "to", "try", "catch", "always",
-            "throw", "error", "import", "use", "as", "share", "exit", "const",
-            "when"
-        }
-        import re
-        token_spec = [
-            ('COMMENT', r'#.*'),
-            ('STRING',  r'"[^"]*"|\'[^\']*\''),
-            ('NUMBER',  r'\d+(\.\d*)?'),
-            ('KEYWORD', r'\b(' + '|'.join(self.keywords) + r')\b'),
-            ('OPERATOR', r'[+\-*/%=<>!&|^~]+'),
-            ('SKIP',    r'[ \t\n]+'),
-            ('MISC',    r'.'),
-        ]
-        self.tok_regex = re.compile('|'.join('(?P<%s>%s)' % pair for pair in token_spec))
+        self.keywords = KEYWORDS
+        self.tok_regex = TOKEN_REGEX
+        # Per-line cache: end-of-line state and token runs. A line whose runs
+        # are None has to be lexed again before its styling can be trusted.
+        self.line_states = [None]
+        self.line_runs = [None]
+        # Background tokenization: chunks from an older generation are stale
+        self.generation = 0
+        self.job = None
+        self.provisional = None
+        self.fill_timer = QTimer(self)
+        self.fill_timer.setSingleShot(True)
+        self.fill_timer.setInterval(IDLE_FILL_MS)
+        self.fill_timer.timeout.connect(self.fill_idle)
+        # Per-line fold cache: line_block() of each line and the level last
+        # given to Scintilla. Only lines an edit touched are looked at again.
+        self.line_blocks = [None]
+        self.fold_levels = [None]
+        self.fold_dirty = None
+        self.fold_timer = QTimer(self)
+        self.fold_timer.setSingleShot(True)
+        self.fold_timer.setInterval(0)
+        self.fold_timer.timeout.connect(self.update_folds)
+        if isinstance(parent, QsciScintilla):
+            parent.SCN_MODIFIED.connect(self.on_modified)
+            self.reset_cache()
+            self.reset_folds()
     def language(self):
         return "ShellLite"
     def description(self, style):
@@ -46,26 +187,289 @@ class ShellLiteLexer(QsciLexerCustom):
         if style == self.STRING: return "String"
         if style == self.COMMENT: return "Comment"
         return "Default"
+    def reset_cache(self):
+        line_count = self.parent().SendScintilla(QsciScintilla.SCI_GETLINECOUNT)
+        self.line_states = [None] * line_count
+        self.line_runs = [None] * line_count
+    def on_modified(self, position, mod_type, text, length, lines_added, *args):
+        if not mod_type & (QsciScintilla.SC_MOD_INSERTTEXT | QsciScintilla.SC_MOD_DELETETEXT):
+            return
+        editor = self.parent()
+        self.provisional = None
+        if self.job is not None:
+            self.cancel_background()
+        self.fill_timer.start()
+        line = editor.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, position)
+        if lines_added > 0:
+            # The old end state of `line` now belongs to its last new line
+            self.line_states[line:line] = [None] * lines_added
+            self.line_runs[line + 1:line + 1] = [None] * lines_added
+        elif lines_added < 0:
+            del self.line_states[line:line - lines_added]
+            del self.line_runs[line + 1:line + 1 - lines_added]
+        if line < len(self.line_runs):
+            self.line_runs[line] = None
+        if len(self.line_runs) != editor.SendScintilla(QsciScintilla.SCI_GETLINECOUNT):
+            self.reset_cache()
+        self.mark_folds(line, lines_added)
+    def reset_folds(self):
+        line_count = self.parent().SendScintilla(QsciScintilla.SCI_GETLINECOUNT)
+        self.line_blocks = [None] * line_count
+        self.fold_levels = [None] * line_count
+        self.fold_dirty = (0, line_count - 1)
+        self.fold_timer.start()
+    def mark_folds(self, line, lines_added):
+        if lines_added > 0:
+            self.line_blocks[line + 1:line + 1] = [None] * lines_added
+            self.fold_levels[line + 1:line + 1] = [None] * lines_added
+        elif lines_added < 0:
+            del self.line_blocks[line + 1:line + 1 - lines_added]
+            del self.fold_levels[line + 1:line + 1 - lines_added]
+        if line < len(self.fold_levels):
+            # Scintilla moves header flags around itself as lines come and go
+            self.fold_levels[line] = None
+        first, last = line, line + max(lines_added, 0)
+        if self.fold_dirty is not None:
+            # Lines already waiting move with the edit
+            old_first, old_last = self.fold_dirty
+            if old_first > line:
+                old_first = max(line, old_first + lines_added)
+            if old_last > line:
+                old_last = max(line, old_last + lines_added)
+            first, last = min(first, old_first), max(last, old_last)
+        self.fold_dirty = (first, last)
+        self.fold_timer.start()
+    @traced("fold")
+    def update_folds(self):
+        if self.fold_dirty is None:
+            return
+        editor = self.parent()
+        send = editor.SendScintilla
+        line_count = send(QsciScintilla.SCI_GETLINECOUNT)
+        if len(self.fold_levels) != line_count:
+            self.reset_folds()
+        first, last = self.fold_dirty
+        last = min(last, line_count - 1)
+        first = min(first, last)
+        # A line's level depends only on the lines below it, so the rest of
+        # the range can wait for the next turn
+        top = max(first, last - FOLD_SLICE_LINES + 1)
+        self.fold_dirty = (first, top - 1) if top > first else None
+        tab_width = send(QsciScintilla.SCI_GETTABWIDTH)
+        blocks = [None] * (last - top + 1)
+        _, data = self.line_bytes(top, last)
+        for offset, raw in enumerate(data.splitlines()[:len(blocks)]):
+            blocks[offset] = line_block(raw, tab_width)
+        self.line_blocks[top:last + 1] = blocks
+        # Walk upwards from the first code line after the range; at the top
+        # of the edit, on to the code line before it, whose header flag
+        # depends on the edited lines
+        below = last + 1
+        while below < line_count and self.line_blocks[below] is None:
+            below += 1
+        indent_below = self.line_blocks[below][0] if below < line_count else 0
+        start = top
+        if self.fold_dirty is None:
+            start = first - 1
+            while start > 0 and self.line_blocks[start] is None:
+                start -= 1
+            start = max(start, 0)
+        header = QsciScintilla.SC_FOLDLEVELHEADERFLAG
+        changed = False
+        unfold = []
+        # Every level change is also an SCN_MODIFIED, and none of our slots
+        # want those; QScintilla's own handler is done by hand below
+        editor.blockSignals(True)
+        try:
+            for line in range(last, start - 1, -1):
+                block = self.line_blocks[line]
+                if block is None:
+                    level = (QsciScintilla.SC_FOLDLEVELBASE + indent_below) | QsciScintilla.SC_FOLDLEVELWHITEFLAG
+                else:
+                    indent, opens = block
+                    level = QsciScintilla.SC_FOLDLEVELBASE + indent
+                    if opens and indent_below > indent:
+                        level |= header
+                    indent_below = indent
+                old_level = self.fold_levels[line]
+                if level == old_level:
+                    continue
+                self.fold_levels[line] = level
+                send(QsciScintilla.SCI_SETFOLDLEVEL, line, level)
+                changed = True
+                if old_level is not None and old_level & header and not level & header:
+                    unfold.append((line, old_level))
+                elif level & header and not (old_level or 0) & header:
+                    send(QsciScintilla.SCI_SETFOLDEXPANDED, line, 1)
+        finally:
+            editor.blockSignals(False)
+        for line, old_level in unfold:
+            if not send(QsciScintilla.SCI_GETFOLDEXPANDED, line):
+                # No longer a header, so nothing could show its hidden lines again
+                send(QsciScintilla.SCI_SETFOLDEXPANDED, line, 1)
+                end = send(QsciScintilla.SCI_GETLASTCHILD, line, old_level & QsciScintilla.SC_FOLDLEVELNUMBERMASK)
+                send(QsciScintilla.SCI_SHOWLINES, line + 1, end)
+        if self.fold_dirty is not None:
+            self.fold_timer.start()
+        if changed:
+            self.folds_changed.emit()
+    def flush_folds(self):
+        while self.fold_dirty is not None:
+            self.update_folds()
+    def fold_headers(self):
+        # (line, indent) of every line that opens a fold, from the cache
+        self.flush_folds()
+        header = QsciScintilla.SC_FOLDLEVELHEADERFLAG
+        return [(line, self.line_blocks[line][0]) for line, level in enumerate(self.fold_levels)
+                if level is not None and level & header]
+    def state_before(self, line):
+        if line > 0 and self.line_states[line - 1] is not None:
+            return self.line_states[line - 1]
+        return STATE_DEFAULT
+    def line_bytes(self, first_line, last_line):
+        # Copies only [first_line, last_line] out of Scintilla, EOLs included
+        send = self.parent().SendScintilla
+        range_start = send(QsciScintilla.SCI_POSITIONFROMLINE, first_line)
+        if last_line + 1 < send(QsciScintilla.SCI_GETLINECOUNT):
+            range_end = send(QsciScintilla.SCI_POSITIONFROMLINE, last_line + 1)
+        else:
+            range_end = send(QsciScintilla.SCI_GETLENGTH)
+        data = self.parent().bytes(range_start, range_end).data()[:range_end - range_start]
+        return range_start, data
+    @traced("lex")
     def styleText(self, start, end):
-        self.startStyling(start)
-        full_text = self.parent().text()
-        text_slice = full_text[start:end]
-        for mo in self.tok_regex.finditer(text_slice):
-            kind = mo.lastgroup
-            value = mo.group()
-            length = len(value.encode('utf-8')) 
-            if kind == 'KEYWORD':
-                self.setStyling(length, self.KEYWORD)
-            elif kind == 'STRING':
-                self.setStyling(length, self.STRING)
-            elif kind == 'COMMENT':
-                self.setStyling(length, self.COMMENT)
-            elif kind == 'NUMBER':
-                self.setStyling(length, self.NUMBER)
-            elif kind == 'SKIP':
-                self.setStyling(length, self.DEFAULT)
-            else:
-                self.setStyling(length, self.DEFAULT)
+        send = self.parent().SendScintilla
+        line_count = send(QsciScintilla.SCI_GETLINECOUNT)
+        if len(self.line_runs) != line_count:
+            self.reset_cache()
+        first_line = send(QsciScintilla.SCI_LINEFROMPOSITION, start)
+        last_line = send(QsciScintilla.SCI_LINEFROMPOSITION, max(start, end - 1))
+        if last_line - first_line > BACKGROUND_MIN_LINES:
+            # Too much to lex on the GUI thread: color the viewport now and
+            # let the tokenizer thread catch up from the end-styled position.
+            if self.job is None:
+                self.start_background(first_line)
+            self.style_viewport(first_line, last_line)
+            self.startStyling(send(QsciScintilla.SCI_POSITIONFROMLINE, first_line))
+            return
+        pos, data = self.line_bytes(first_line, last_line)
+        lines = data.splitlines(keepends=True)
+        state = self.state_before(first_line)
+        line_no = first_line
+        self.startStyling(pos)
+        index = 0
+        while index < len(lines):
+            raw = lines[index]
+            runs, end_state = tokenize_line(raw.decode('utf-8', 'surrogateescape'), state)
+            for length, style in runs:
+                self.setStyling(length, style)
+            old_state = self.line_states[line_no]
+            self.line_states[line_no] = end_state
+            self.line_runs[line_no] = runs
+            pos += len(raw)
+            line_no += 1
+            index += 1
+            state = end_state
+            if line_no >= line_count:
+                continue
+            if end_state != old_state:
+                # The next line was styled from a different start state
+                self.line_runs[line_no] = None
+                continue
+            # The edit is absorbed: skip every following line still holding
+            # valid styling and resume only at the next dirty one.
+            skip_to = line_no
+            while skip_to <= last_line and self.line_runs[skip_to] is not None:
+                skip_to += 1
+            if skip_to == line_no:
+                continue
+            for raw in lines[index:index + skip_to - line_no]:
+                pos += len(raw)
+            index += skip_to - line_no
+            line_no = skip_to
+            state = self.line_states[line_no - 1]
+            self.startStyling(pos)
+        if self.job is None:
+            self.fill_timer.start()
+    def style_viewport(self, first_line, last_line):
+        # Provisional styling of the visible lines. The cache is left alone
+        # since the start state may still be corrected by the tokenizer.
+        send = self.parent().SendScintilla
+        top = send(QsciScintilla.SCI_DOCLINEFROMVISIBLE, send(QsciScintilla.SCI_GETFIRSTVISIBLELINE))
+        bottom = top + send(QsciScintilla.SCI_LINESONSCREEN) + 1
+        top, bottom = max(top, first_line), min(bottom, last_line)
+        if top > bottom or self.provisional == (top, bottom):
+            return
+        self.provisional = (top, bottom)
+        pos, data = self.line_bytes(top, bottom)
+        state = self.state_before(top)
+        self.startStyling(pos)
+        for raw in data.splitlines(keepends=True):
+            runs, state = tokenize_line(raw.decode('utf-8', 'surrogateescape'), state)
+            for length, style in runs:
+                self.setStyling(length, style)
+    def start_background(self, first_line):
+        self.cancel_background()
+        pos, data = self.line_bytes(first_line, self.parent().SendScintilla(QsciScintilla.SCI_GETLINECOUNT) - 1)
+        self.job = TokenizerThread(self.generation, first_line, data, self.state_before(first_line))
+        self.job.chunk_ready.connect(self.apply_chunk)
+        self.job.finished.connect(self.on_job_finished)
+        start_job(self.job, QThread.Priority.LowPriority)
+    def cancel_background(self):
+        self.generation += 1
+        if self.job is not None:
+            self.job.requestInterruption()
+            self.job = None
+    def on_job_finished(self):
+        if self.sender() is self.job:
+            self.job = None
+    def fill_idle(self):
+        send = self.parent().SendScintilla
+        end_styled = send(QsciScintilla.SCI_GETENDSTYLED)
+        if self.job is None and end_styled < send(QsciScintilla.SCI_GETLENGTH):
+            self.start_background(send(QsciScintilla.SCI_LINEFROMPOSITION, end_styled))
+    @traced("lex.apply")
+    def apply_chunk(self, generation, first_line, chunk_runs, chunk_states, styles):
+        if generation != self.generation:
+            return
+        send = self.parent().SendScintilla
+        end_styled = send(QsciScintilla.SCI_GETENDSTYLED)
+        current = send(QsciScintilla.SCI_LINEFROMPOSITION, end_styled)
+        skip = current - first_line
+        if skip >= len(chunk_states):
+            return
+        if skip < 0 or (skip and chunk_states[skip - 1] != self.line_states[current - 1]):
+            # The GUI thread restyled ahead of the tokenizer differently
+            self.cancel_background()
+            self.fill_timer.start()
+            return
+        offset = sum(length for runs in chunk_runs[:skip] for length, _ in runs)
+        # One batched pass for the whole chunk
+        self.startStyling(send(QsciScintilla.SCI_POSITIONFROMLINE, current))
+        send(QsciScintilla.SCI_SETSTYLINGEX, len(styles) - offset, styles[offset:])
+        last = first_line + len(chunk_states)
+        old_state = self.line_states[last - 1]
+        self.line_states[current:last] = chunk_states[skip:]
+        self.line_runs[current:last] = chunk_runs[skip:]
+        self.provisional = None
+        line_count = len(self.line_runs)
+        if last >= line_count:
+            return
+        if chunk_states[-1] != old_state:
+            self.line_runs[last] = None
+            return
+        # Caught up with styling that is still valid: jump to its end
+        valid_to = last
+        while valid_to < line_count and self.line_runs[valid_to] is not None:
+            valid_to += 1
+        if valid_to == last:
+            return
+        self.cancel_background()
+        if valid_to < line_count:
+            self.startStyling(send(QsciScintilla.SCI_POSITIONFROMLINE, valid_to))
+            self.fill_timer.start()
+        else:
+            self.startStyling(send(QsciScintilla.SCI_GETLENGTH))
     def defaultColor(self, style):
         return QColor(self.colors.get(style, "#d4d4d4"))
     def defaultPaper(self, style):
@@ -0,0 +1,242 @@
+import os
+import threading
+from collections import OrderedDict
+from PyQt6.QtCore import QCoreApplication, QObject, QRunnable, QThreadPool, pyqtSignal
+from editor.tracing import tracer, traced
+
+# Files above this size open in large-file mode: streamed in, no highlighting
+LARGE_FILE_BYTES = 8 * 1024 * 1024
+LOAD_CHUNK_CHARS = 2 * 1024 * 1024
+# Chunks in flight between the loader and the editor, so memory stays bounded
+LOAD_CHUNKS_AHEAD = 2
+SNIFF_BYTES = 8192
+HEX_PREVIEW_BYTES = 4096
+LOADER_THREADS = 4
+# Recently read files kept in memory, so reopening one skips the disk
+CACHE_MAX_FILES = 32
+CACHE_MAX_CHARS = 32 * 1024 * 1024
+# Reads ahead of need queue behind reads the user asked for
+PREFETCH_PRIORITY = -1
+
+def looks_binary(head):
+    if b"\0" in head:
+        return True
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off by the sniff window is still text
+        return e.start < len(head) - 3
+    return False
+
+def hex_preview(data):
+    lines = []
+    for offset in range(0, len(data), 16):
+        row = data[offset:offset + 16]
+        hex_part = " ".join(f"{b:02x}" for b in row)
+        text_part = "".join(chr(b) if 32 <= b < 127 else "." for b in row)
+        lines.append(f"{offset:08x}  {hex_part:<47}  |{text_part}|")
+    return "\n".join(lines)
+
+def file_stamp(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+class LoadSignals(QObject):
+    loaded = pyqtSignal(str, str, object)  # content, path, (mtime_ns, size) read
+    error = pyqtSignal(str, str)
+    binary = pyqtSignal(str, int, str)  # path, size, hex dump of the first bytes
+    large_started = pyqtSignal(str, int)
+    chunk = pyqtSignal(str, str, int)  # path, text, bytes read so far
+    large_finished = pyqtSignal(str)
+    done = pyqtSignal()
+
+class FileLoadTask(QRunnable):
+    def __init__(self, path, prefetch=False):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.path = path
+        self.prefetch = prefetch
+        self.signals = LoadSignals()
+        self.credits = threading.Semaphore(LOAD_CHUNKS_AHEAD)
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    @traced("load.read")
+    def run(self):
+        try:
+            self.load()
+        except Exception as e:
+            self.signals.error.emit(self.path, str(e))
+        finally:
+            self.signals.done.emit()
+
+    def load(self):
+        stamp = file_stamp(self.path)
+        size = stamp[1]
+        with open(self.path, 'rb') as f:
+            head = f.read(max(SNIFF_BYTES, HEX_PREVIEW_BYTES))
+        if self.prefetch and (size >= LARGE_FILE_BYTES or looks_binary(head[:SNIFF_BYTES])):
+            # Only worth caching what would open as a normal tab
+            return
+        if looks_binary(head[:SNIFF_BYTES]):
+            self.signals.binary.emit(self.path, size, hex_preview(head[:HEX_PREVIEW_BYTES]))
+            return
+        if size < LARGE_FILE_BYTES:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            self.signals.loaded.emit(content, self.path, stamp)
+            return
+        self.signals.large_started.emit(self.path, size)
+        with open(self.path, 'r', encoding='utf-8', errors='replace') as f:
+            while True:
+                text = f.read(LOAD_CHUNK_CHARS)
+                if not text:
+                    break
+                # Wait for the editor to take a chunk before reading further
+                while not self.credits.acquire(timeout=0.1):
+                    if self.cancelled.is_set():
+                        return
+                if self.cancelled.is_set():
+                    return
+                self.signals.chunk.emit(self.path, text, f.buffer.tell())
+        self.signals.large_finished.emit(self.path)
+
+class FileLoader(QObject):
+    # One loader for the window: a bounded pool, one read per path at a
+    # time, and an mtime-checked cache of recently read contents.
+    loaded = pyqtSignal(str, str)
+    error = pyqtSignal(str)
+    binary = pyqtSignal(str, int, str)
+    large_started = pyqtSignal(str, int)
+    chunk = pyqtSignal(str, str, int)
+    large_finished = pyqtSignal(str)
+    prefetched = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(LOADER_THREADS)
+        self.in_flight = {}
+        self.prefetching = {}
+        self.tasks = set()
+        self.cache = OrderedDict()
+        self.cache_chars = 0
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown)
+
+    def load(self, path):
+        if path in self.in_flight:
+            return
+        content = self.cached(path)
+        if content is not None:
+            self.loaded.emit(content, path)
+            return
+        task = FileLoadTask(path)
+        task.signals.loaded.connect(self.on_loaded)
+        task.signals.error.connect(self.on_error)
+        task.signals.binary.connect(self.binary)
+        task.signals.large_started.connect(self.large_started)
+        task.signals.chunk.connect(self.chunk)
+        task.signals.large_finished.connect(self.large_finished)
+        task.signals.done.connect(lambda t=task: self.on_done(t))
+        task.trace_start = tracer().now()
+        self.in_flight[path] = task
+        self.tasks.add(task)
+        self.pool.start(task)
+
+    def prefetch(self, path):
+        # Reads into the cache without opening anything; False if there is nothing to do
+        if path in self.in_flight or path in self.prefetching or self.cached(path) is not None:
+            return False
+        task = FileLoadTask(path, prefetch=True)
+        # Bound slots, not lambdas: the task may be freed inside its own done handler
+        task.signals.loaded.connect(self.on_prefetch_loaded)
+        task.signals.done.connect(self.on_prefetch_done)
+        self.prefetching[path] = task
+        self.tasks.add(task)
+        self.pool.start(task, PREFETCH_PRIORITY)
+        return True
+
+    def on_prefetch_loaded(self, content, path, stamp):
+        self.store(path, stamp, content)
+
+    def on_prefetch_done(self):
+        signals = self.sender()
+        for path, task in list(self.prefetching.items()):
+            if task.signals is signals:
+                del self.prefetching[path]
+                self.tasks.discard(task)
+                self.prefetched.emit(path)
+                return
+
+    def is_loading(self, path):
+        return path in self.in_flight
+
+    def chunk_taken(self, path):
+        task = self.in_flight.get(path)
+        if task is not None:
+            task.credits.release()
+
+    def cancel(self, path):
+        task = self.in_flight.pop(path, None)
+        if task is not None:
+            task.cancel()
+
+    def on_loaded(self, content, path, stamp):
+        task = self.in_flight.get(path)
+        if task is not None:
+            # Queued to the GUI thread to here: read time plus the wait for the event loop
+            tracer().complete("load", task.trace_start, path=path)
+        self.store(path, stamp, content)
+        self.loaded.emit(content, path)
+
+    def on_error(self, path, message):
+        self.error.emit(message)
+
+    def on_done(self, task):
+        # Queued after every other signal of the task, so nothing is lost
+        self.tasks.discard(task)
+        if self.in_flight.get(task.path) is task:
+            del self.in_flight[task.path]
+
+    def cached(self, path):
+        entry = self.cache.get(path)
+        if entry is None:
+            return None
+        try:
+            stamp = file_stamp(path)
+        except OSError:
+            stamp = None
+        if stamp != entry[0]:
+            self.forget(path)
+            return None
+        self.cache.move_to_end(path)
+        return entry[1]
+
+    def store(self, path, stamp, content):
+        if len(content) > CACHE_MAX_CHARS // 4:
+            return
+        self.forget(path)
+        self.cache[path] = (stamp, content)
+        self.cache_chars += len(content)
+        while len(self.cache) > CACHE_MAX_FILES or self.cache_chars > CACHE_MAX_CHARS:
+            old_path, (old_stamp, old_content) = self.cache.popitem(last=False)
+            self.cache_chars -= len(old_content)
+
+    def touch(self, path):
+        self.cached(path)
+
+    def forget(self, path):
+        entry = self.cache.pop(path, None)
+        if entry is not None:
+            self.cache_chars -= len(entry[1])
+
+    def shutdown(self):
+        for task in list(self.in_flight.values()) + list(self.prefetching.values()):
+            task.cancel()
+        self.in_flight = {}
+        self.prefetching = {}
+        self.pool.waitForDone()
@@ -1,20 +1,71 @@
+import time
+STARTED = time.perf_counter()
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import Qt
-from editor.app import ShellDeskWindow
-from editor.styles import STYLESHEET
+from PyQt6.QtCore import Qt, QObject, QEvent, QTimer
+
+class StartupProfile(QObject):
+    # Phase timings from interpreter start to the deferred UI being built;
+    # the first paint is caught with an event filter on the window
+    def __init__(self, enabled, quit_when_done=False):
+        super().__init__()
+        self.enabled = enabled
+        self.quit_when_done = quit_when_done
+        self.last = STARTED
+        self.phases = []
+        self.painted = False
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def watch(self, window):
+        window.installEventFilter(self)
+        window.startup_finished.connect(self.on_finished)
+
+    def eventFilter(self, obj, event):
+        if not self.painted and event.type() == QEvent.Type.Paint:
+            self.painted = True
+            self.mark("first paint")
+        return False
+
+    def on_finished(self):
+        self.mark("deferred setup")
+        if self.enabled:
+            self.report()
+        if self.quit_when_done:
+            QTimer.singleShot(0, QApplication.quit)
+
+    def report(self):
+        total = sum(seconds for _, seconds in self.phases)
+        for phase, seconds in self.phases:
+            print(f"{phase:<20} {seconds * 1000:>8.1f} ms", file=sys.stderr)
+        print(f"{'total':<20} {total * 1000:>8.1f} ms", file=sys.stderr)
+        sys.stderr.flush()
+
 def main():
+    profile = StartupProfile("--profile-startup" in sys.argv, "--quit-after-startup" in sys.argv)
+    argv = [arg for arg in sys.argv if arg not in ("--profile-startup", "--quit-after-startup")]
+    profile.mark("python + Qt imports")
     if hasattr(Qt, 'AA_ShareOpenGLContexts'):
         QApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
     if hasattr(Qt, 'AA_UseHighDpiPixmaps'):
         QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps)
-    app = QApplication(sys.argv)
+    app = QApplication(argv)
     app.setApplicationName("ShellDesk")
+    profile.mark("QApplication")
+    from editor.app import ShellDeskWindow
+    from editor.styles import STYLESHEET
+    profile.mark("editor imports")
     app.setStyleSheet(STYLESHEET)
     window = ShellDeskWindow()
+    profile.watch(window)
+    profile.mark("window")
     window.show()
+    profile.mark("show")
     sys.exit(app.exec())
 if __name__ == "__main__":
     main()
@@ -0,0 +1,92 @@
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTreeWidget, QTreeWidgetItem
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from editor.styles import COLORS
+
+# Quiet time after the fold structure changes before the tree is rebuilt
+OUTLINE_DELAY_MS = 300
+OUTLINE_LABEL_CHARS = 80
+
+class OutlinePanel(QWidget):
+    # The fold headers of the current editor, nested by indentation. Built
+    # from the lexer's fold cache, so it never parses the document itself.
+    open_line = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.editor = None
+        self.lines = []
+        self.shape = None
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(6, 6, 6, 6)
+        layout.setSpacing(4)
+        self.status = QLabel("Outline")
+        self.status.setStyleSheet(f"color: {COLORS['text_dim']}; font-size: 11px;")
+        layout.addWidget(self.status)
+        self.tree = QTreeWidget()
+        self.tree.setHeaderHidden(True)
+        self.tree.setUniformRowHeights(True)
+        self.tree.itemActivated.connect(self.on_item_activated)
+        layout.addWidget(self.tree)
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(OUTLINE_DELAY_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def set_editor(self, editor):
+        if editor is self.editor:
+            return
+        if self.editor is not None:
+            try:
+                self.editor.lexer.folds_changed.disconnect(self.on_folds_changed)
+            except (TypeError, RuntimeError):
+                pass
+        self.editor = editor
+        if editor is not None:
+            editor.lexer.folds_changed.connect(self.on_folds_changed)
+        self.refresh()
+
+    def on_folds_changed(self):
+        if self.isVisible():
+            self.refresh_timer.start()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+
+    def refresh(self):
+        self.refresh_timer.stop()
+        editor = self.editor
+        if editor is None or editor.large_file:
+            self.lines = []
+            self.shape = None
+            self.tree.clear()
+            self.status.setText("Outline")
+            return
+        headers = editor.lexer.fold_headers()
+        shape = [(indent, editor.text(line).strip()[:OUTLINE_LABEL_CHARS]) for line, indent in headers]
+        self.lines = [line for line, indent in headers]
+        self.status.setText(f"Outline ({len(headers)} blocks)")
+        if shape == self.shape:
+            # Only line numbers moved; the tree looks the same
+            return
+        self.shape = shape
+        self.tree.clear()
+        top = []
+        stack = []
+        for index, (indent, label) in enumerate(shape):
+            while stack and stack[-1][0] >= indent:
+                stack.pop()
+            if stack:
+                item = QTreeWidgetItem(stack[-1][1], [label])
+            else:
+                item = QTreeWidgetItem([label])
+                top.append(item)
+            item.setData(0, Qt.ItemDataRole.UserRole, index)
+            stack.append((indent, item))
+        self.tree.addTopLevelItems(top)
+        self.tree.expandAll()
+
+    def on_item_activated(self, item):
+        index = item.data(0, Qt.ItemDataRole.UserRole)
+        if index is not None and index < len(self.lines):
+            self.open_line.emit(self.lines[index])
@@ -0,0 +1,445 @@
+import os
+import sys
+import json
+import time
+import codecs
+import hashlib
+import tempfile
+from PyQt6.QtGui import QColor
+from PyQt6.QtCore import Qt, QCoreApplication, QObject, QProcess, QElapsedTimer, QTimer, pyqtSignal
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox,
+                             QTabWidget, QTreeWidget, QHeaderView)
+from editor.styles import COLORS
+from editor.completion import cache_dir
+from editor.runner import KILL_TIMEOUT_MS, shell_lite_env
+
+PROFILE_VERSION = 1
+# Saved profiles kept per script, oldest removed first
+PROFILE_KEEP = 20
+# Python functions kept from the cProfile stats, by own time
+PROFILE_PYTHON_FUNCTIONS = 100
+
+# Executed by the profiled process: lex and parse the script, then run it
+# with cProfile on and Interpreter.visit wrapped to time every node that
+# carries a source line. Nodes without one (calls, conditions) count
+# towards the line around them. A line's self time leaves out the nested
+# nodes of other lines it runs; its total only counts the outermost visit,
+# so recursion is not counted twice. Calls are timed the same way per
+# ShellLite function name. Code run by an import counts as the import line.
+PROFILE_RUN_SOURCE = r'''
+import sys, json, time, signal, cProfile, pstats
+script, prefix, keep = sys.argv[1], sys.argv[2], int(sys.argv[3])
+# Stop terminates the run; exiting through the handlers below still writes
+# what was recorded up to then
+signal.signal(signal.SIGTERM, lambda *args: sys.exit(143))
+clock = time.perf_counter
+lines = {}
+calls = {}
+node_hits = {}
+node_lines = {}
+profiler = cProfile.Profile()
+code = 0
+parse_s = run_s = 0.0
+try:
+    from shell_lite import ast_nodes
+    from shell_lite.lexer import Lexer
+    from shell_lite.parser import Parser
+    from shell_lite.interpreter import Interpreter
+    with open(script, "r", encoding="utf-8") as f:
+        source = f.read()
+    sys.argv = ["shell_lite.main", script]
+    began = clock()
+    statements = Parser(Lexer(source).tokenize()).parse()
+    parse_s = clock() - began
+    # Built before visit is wrapped: it runs the standard library's
+    # imports, whose nodes carry lines of other files
+    interpreter = Interpreter()
+    visit = Interpreter.visit
+    line_frames = []
+    call_frames = []
+    open_lines = set()
+    open_calls = set()
+    importing = [0]
+    def profiled_visit(self, node):
+        if importing[0]:
+            return visit(self, node)
+        line = getattr(node, "line", 0)
+        if isinstance(node, ast_nodes.Call):
+            name = node.name
+        elif isinstance(node, ast_nodes.MethodCall):
+            name = node.instance_name + "." + node.method_name
+        else:
+            name = None
+        if not line and name is None:
+            return visit(self, node)
+        if line:
+            key = id(node)
+            node_hits[key] = node_hits.get(key, 0) + 1
+            node_lines[key] = line
+            outer_line = line not in open_lines
+            open_lines.add(line)
+            line_frames.append(0.0)
+        if name is not None:
+            outer_call = name not in open_calls
+            open_calls.add(name)
+            call_frames.append(0.0)
+        imports = isinstance(node, (ast_nodes.Import, ast_nodes.ImportAs))
+        importing[0] += imports
+        began = clock()
+        try:
+            return visit(self, node)
+        finally:
+            elapsed = clock() - began
+            importing[0] -= imports
+            if line:
+                inner = line_frames.pop()
+                if line_frames:
+                    line_frames[-1] += elapsed
+                stats = lines.setdefault(line, [0.0, 0.0])
+                stats[0] += elapsed - inner
+                if outer_line:
+                    open_lines.discard(line)
+                    stats[1] += elapsed
+            if name is not None:
+                inner = call_frames.pop()
+                if call_frames:
+                    call_frames[-1] += elapsed
+                stats = calls.setdefault(name, [0, 0.0, 0.0])
+                stats[0] += 1
+                stats[1] += elapsed - inner
+                if outer_call:
+                    open_calls.discard(name)
+                    stats[2] += elapsed
+    Interpreter.visit = profiled_visit
+    began = clock()
+    profiler.enable()
+    try:
+        for statement in statements:
+            interpreter.visit(statement)
+    finally:
+        profiler.disable()
+        run_s = clock() - began
+except SystemExit as e:
+    code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+except Exception as e:
+    line = getattr(e, "line", 0)
+    print(f"[ShellLite Error]{f' on line {line}' if line else ''}: {e}")
+    code = 1
+finally:
+    sys.stdout.flush()
+    functions = []
+    try:
+        profiler.dump_stats(prefix + ".prof")
+        stats = pstats.Stats(profiler).stats
+        top = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)
+        for (filename, number, function), (primitive, count, own, total, callers) in top[:keep]:
+            if filename == "~":
+                label = function
+            else:
+                label = f"{function} ({filename.replace(chr(92), '/').rsplit('/', 1)[-1]}:{number})"
+            functions.append([label, count, own, total])
+    except (OSError, TypeError):
+        pass
+    with open(prefix + ".json", "w") as f:
+        # A line runs as often as the node on it that ran most; its
+        # expressions are visited once per run of the statement
+        hits = {}
+        for key, count in node_hits.items():
+            line = node_lines[key]
+            hits[line] = max(hits.get(line, 0), count)
+        lines = {line: [hits.get(line, 0)] + stats for line, stats in lines.items()}
+        json.dump({"exit_code": code, "parse_s": parse_s, "run_s": run_s, "lines": lines,
+                   "calls": calls, "python": functions}, f)
+sys.exit(code)
+'''
+
+def profile_dir(path):
+    # One folder per script, so earlier runs of it are there to compare with
+    key = hashlib.sha1((path or "untitled").encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir(), "profiles", key)
+
+def saved_profiles(path):
+    # Newest first
+    directory = profile_dir(path)
+    try:
+        names = sorted((name for name in os.listdir(directory) if name.endswith(".json")), reverse=True)
+    except OSError:
+        return []
+    return [os.path.join(directory, name) for name in names]
+
+def load_profile(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(profile, dict) or profile.get("version") != PROFILE_VERSION:
+        return None
+    return profile
+
+def prune_profiles(path):
+    for stale in saved_profiles(path)[PROFILE_KEEP:]:
+        for name in (stale, stale[:-len(".json")] + ".prof"):
+            try:
+                os.remove(name)
+            except OSError:
+                pass
+
+def line_keys(lines):
+    # Lines are matched across runs by their text and how often that text
+    # came before, so edits elsewhere in the script do not break the match
+    seen = {}
+    keys = {}
+    for entry in sorted(lines, key=lambda entry: entry["line"]):
+        text = entry["text"].strip()
+        seen[text] = seen.get(text, 0) + 1
+        keys[entry["line"]] = (text, seen[text])
+    return keys
+
+class ProfileRun(QObject):
+    output = pyqtSignal(str)
+    done = pyqtSignal(object)  # profile dict, or None when nothing was recorded
+    failed = pyqtSignal(str)
+
+    def __init__(self, script_content, cwd, path=None, parent=None):
+        super().__init__(parent)
+        self.script_content = script_content
+        self.cwd = cwd
+        self.path = path
+        self.temp_path = None
+        self.stopped = False
+        self.process = None
+        self.clock = QElapsedTimer()
+        self.decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        directory = profile_dir(path)
+        self.prefix = os.path.join(directory, time.strftime("%Y%m%d-%H%M%S") + f"-{int(time.time() * 1000) % 1000:03d}")
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.kill_if_running)
+
+    def start(self):
+        self.clock.start()
+        try:
+            os.makedirs(os.path.dirname(self.prefix), exist_ok=True)
+            fd, self.temp_path = tempfile.mkstemp(suffix=".shl", prefix=".shelldesk-run-", dir=self.cwd)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.script_content)
+        except OSError as e:
+            self.failed.emit(f"Error saving temp file: {e}")
+            return
+        self.process = QProcess(self)
+        self.process.setWorkingDirectory(self.cwd)
+        self.process.setProcessEnvironment(shell_lite_env())
+        self.process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
+        self.process.readyReadStandardOutput.connect(self.on_output)
+        self.process.finished.connect(self.on_finished)
+        self.process.errorOccurred.connect(self.on_error)
+        self.process.start(sys.executable, ["-c", PROFILE_RUN_SOURCE, self.temp_path, self.prefix,
+                                            str(PROFILE_PYTHON_FUNCTIONS)])
+
+    def is_running(self):
+        return self.process is not None and self.process.state() != QProcess.ProcessState.NotRunning
+
+    def stop(self):
+        if self.is_running():
+            self.stopped = True
+            self.process.terminate()
+            QTimer.singleShot(KILL_TIMEOUT_MS, self.kill_if_running)
+
+    def kill_if_running(self):
+        if self.is_running():
+            self.process.kill()
+
+    def on_output(self):
+        text = self.decoder.decode(self.process.readAllStandardOutput().data())
+        if text:
+            self.output.emit(text)
+
+    def on_error(self, error):
+        if error == QProcess.ProcessError.FailedToStart:
+            self.remove_temp()
+            self.failed.emit(f"Execution failed: {self.process.errorString()}")
+
+    def on_finished(self, exit_code, exit_status):
+        self.on_output()
+        self.remove_temp()
+        wall = self.clock.elapsed() / 1000
+        try:
+            with open(self.prefix + ".json", "r") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            self.done.emit(None)
+            return
+        source_lines = self.script_content.split("\n")
+        lines = []
+        for line, (hits, own, total) in raw["lines"].items():
+            number = int(line)
+            text = source_lines[number - 1].rstrip("\r") if 0 < number <= len(source_lines) else ""
+            lines.append({"line": number, "text": text, "hits": hits, "self_s": own, "total_s": total})
+        functions = [{"name": name, "kind": "script", "calls": count, "self_s": own, "total_s": total}
+                     for name, (count, own, total) in raw["calls"].items()]
+        functions += [{"name": name, "kind": "python", "calls": count, "self_s": own, "total_s": total}
+                      for name, count, own, total in raw["python"]]
+        profile = {
+            "version": PROFILE_VERSION,
+            "path": self.path,
+            "finished": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "exit_code": exit_code if not self.stopped else None,
+            "stopped": self.stopped,
+            "wall_s": wall,
+            "parse_s": raw["parse_s"],
+            "run_s": raw["run_s"],
+            "lines": sorted(lines, key=lambda entry: entry["line"]),
+            "functions": functions,
+            "file": self.prefix + ".json",
+            "stats_file": self.prefix + ".prof",
+        }
+        try:
+            with open(self.prefix + ".json", "w", encoding="utf-8") as f:
+                json.dump(profile, f, indent=1)
+        except OSError:
+            pass
+        prune_profiles(self.path)
+        self.done.emit(profile)
+
+    def remove_temp(self):
+        if self.temp_path and os.path.exists(self.temp_path):
+            try:
+                os.remove(self.temp_path)
+            except OSError:
+                pass
+        self.temp_path = None
+
+class ProfilePanel(QWidget):
+    # Hot lines and functions of the last profiled run, each with the change
+    # against an earlier saved run of the same script
+    open_line = pyqtSignal(int)
+    LINE_COLUMNS = ["Line", "Source", "Hits", "Self ms", "Total ms", "% of run", "Δ self ms"]
+    FUNCTION_COLUMNS = ["Function", "Kind", "Calls", "Self ms", "Total ms", "% of run", "Δ self ms"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.profile = None
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(6, 6, 6, 6)
+        layout.setSpacing(4)
+        header = QHBoxLayout()
+        self.status = QLabel("")
+        self.status.setStyleSheet(f"color: {COLORS['text_dim']}; font-size: 11px;")
+        self.status.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        header.addWidget(self.status)
+        header.addStretch()
+        header.addWidget(QLabel("Compare with:"))
+        self.compare = QComboBox()
+        self.compare.currentIndexChanged.connect(self.on_compare_changed)
+        header.addWidget(self.compare)
+        self.close_button = QPushButton("Close")
+        self.close_button.clicked.connect(self.hide)
+        header.addWidget(self.close_button)
+        layout.addLayout(header)
+        self.views = QTabWidget()
+        self.lines = self.make_table(self.LINE_COLUMNS, 1)
+        self.lines.itemActivated.connect(self.on_item_activated)
+        self.views.addTab(self.lines, "Hot Lines")
+        self.functions = self.make_table(self.FUNCTION_COLUMNS, 0)
+        self.views.addTab(self.functions, "Hot Functions")
+        layout.addWidget(self.views)
+
+    def make_table(self, columns, stretch):
+        table = QTreeWidget()
+        table.setColumnCount(len(columns))
+        table.setHeaderLabels(columns)
+        table.setRootIsDecorated(False)
+        table.setUniformRowHeights(True)
+        table.setSortingEnabled(True)
+        table.header().setSectionResizeMode(stretch, QHeaderView.ResizeMode.Stretch)
+        return table
+
+    def start(self, path):
+        self.profile = None
+        self.lines.clear()
+        self.functions.clear()
+        self.compare.blockSignals(True)
+        self.compare.clear()
+        self.compare.blockSignals(False)
+        self.status.setText(f"Profiling {os.path.basename(path) if path else 'untitled script'}...")
+
+    def show_profile(self, profile):
+        self.profile = profile
+        self.compare.blockSignals(True)
+        self.compare.clear()
+        self.compare.addItem("Nothing", None)
+        for saved in saved_profiles(profile["path"]):
+            if saved != profile["file"]:
+                self.compare.addItem(os.path.basename(saved)[:-len(".json")], saved)
+        self.compare.setCurrentIndex(1 if self.compare.count() > 1 else 0)
+        self.compare.blockSignals(False)
+        self.on_compare_changed()
+        state = "stopped" if profile["stopped"] else f"exit code {profile['exit_code']}"
+        self.status.setText(f"{profile['wall_s']:.2f}s wall, {profile['run_s']:.2f}s running, "
+                            f"{profile['parse_s'] * 1000:.0f}ms parsing ({state}). Saved to {profile['file']}")
+        self.status.setToolTip(f"cProfile stats: {profile['stats_file']}\n"
+                               "Times include the profiler's own overhead")
+
+    def on_compare_changed(self):
+        if self.profile is None:
+            return
+        saved = self.compare.currentData()
+        previous = load_profile(saved) if saved else None
+        self.fill_lines(previous)
+        self.fill_functions(previous)
+
+    def fill_lines(self, previous):
+        from editor.suite import ResultItem
+        entries = self.profile["lines"]
+        before = {}
+        if previous is not None:
+            keys = line_keys(previous["lines"])
+            before = {keys[entry["line"]]: entry["self_s"] for entry in previous["lines"]}
+        keys = line_keys(entries)
+        self.fill(self.lines, entries, lambda entry: [entry["line"], entry["text"].strip(), entry["hits"]],
+                  lambda entry: before.get(keys[entry["line"]]), previous is not None, ResultItem)
+
+    def fill_functions(self, previous):
+        from editor.suite import ResultItem
+        before = {}
+        if previous is not None:
+            before = {(entry["kind"], entry["name"]): entry["self_s"] for entry in previous["functions"]}
+        self.fill(self.functions, self.profile["functions"],
+                  lambda entry: [entry["name"], entry["kind"], entry["calls"]],
+                  lambda entry: before.get((entry["kind"], entry["name"])), previous is not None, ResultItem)
+
+    def fill(self, table, entries, leading, previous_self, comparing, item_class):
+        table.setSortingEnabled(False)
+        table.clear()
+        overall = self.profile["run_s"] or 1.0
+        items = []
+        for entry in entries:
+            values = leading(entry)
+            own = entry["self_s"]
+            share = own / overall * 100
+            earlier = previous_self(entry)
+            delta = own - (earlier or 0.0) if comparing else None
+            item = item_class([str(value) for value in values] + [
+                f"{own * 1000:.2f}", f"{entry['total_s'] * 1000:.2f}",
+                f"{share:.1f}",
+                "" if delta is None else ("new" if earlier is None else f"{delta * 1000:+.2f}")])
+            for column, value in enumerate(values):
+                if not isinstance(value, str):
+                    item.setData(column, Qt.ItemDataRole.UserRole, value)
+            item.setData(3, Qt.ItemDataRole.UserRole, own)
+            item.setData(4, Qt.ItemDataRole.UserRole, entry["total_s"])
+            item.setData(5, Qt.ItemDataRole.UserRole, share)
+            item.setData(6, Qt.ItemDataRole.UserRole, delta)
+            if delta is not None and earlier is not None and abs(delta) >= 0.0005:
+                item.setForeground(6, QColor(COLORS["error"] if delta > 0 else "#98c379"))
+            item.setToolTip(0, str(values[0]))
+            items.append(item)
+        table.addTopLevelItems(items)
+        table.setSortingEnabled(True)
+        table.sortItems(3, Qt.SortOrder.DescendingOrder)
+
+    def on_item_activated(self, item):
+        line = item.data(0, Qt.ItemDataRole.UserRole)
+        if line:
+            self.open_line.emit(line - 1)
@@ -0,0 +1,410 @@
+import gc
+import os
+import re
+from PyQt6.QtCore import Qt, QObject, QThread, QTimer, QFileSystemWatcher, pyqtSignal
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QListWidget
+from editor.filetree import IgnoreRules
+from editor.styles import COLORS
+from editor.workers import start_job
+
+QUICK_OPEN_LIMIT = 50
+# Broad queries stop collecting after this many matches, taken in index order
+# (shortest file names first); narrower queries are always exhaustive
+MAX_MATCHES = 1000
+# Candidates checked per keystroke; a longer scan is finished in later passes
+SCAN_BUDGET = 3000
+REBUILD_DELAY_MS = 500
+# inotify watches are a shared, limited resource; deeper trees fall back to
+# a rescan when the palette is opened
+WATCH_LIMIT = 4096
+
+NONZERO_BYTE = re.compile(rb'[^\x00]')
+BIT_POSITIONS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+def subsequence_regex(query):
+    # Deterministic: each [^c]*c step consumes up to the next c, no backtracking
+    return re.compile("".join(f"[^{re.escape(c)}]*{re.escape(c)}" for c in query))
+
+def base_name(lowered):
+    return lowered[lowered.rfind("/") + 1:]
+
+def path_score(query, lowered, name, match):
+    # Cheap tiers, each a single C-level string operation: the file name
+    # starting with, containing or fuzzily matching the query beats a hit
+    # spread over the directories; shorter paths break ties
+    if name.startswith(query):
+        score = 60
+    elif query in name:
+        score = 40
+    elif match(name):
+        score = 20
+    elif query in lowered:
+        score = 10
+    else:
+        score = 0
+    return score - len(lowered) * 0.1
+
+class PathSnapshot:
+    # Immutable, built off the GUI thread: paths in a fixed order plus, per
+    # character, a bitset of the paths that contain it
+    def __init__(self, paths):
+        self.paths = sorted(paths, key=lambda p: (len(p) - p.rfind("/"), len(p), p))
+        self.lowered = [p.lower() for p in self.paths]
+        self.names = [base_name(p) for p in self.lowered]
+        size = len(self.paths) // 8 + 1
+        bits = {}
+        for i, text in enumerate(self.lowered):
+            byte, bit = i >> 3, 1 << (i & 7)
+            for c in set(text):
+                row = bits.get(c)
+                if row is None:
+                    row = bits[c] = bytearray(size)
+                row[byte] |= bit
+        self.size = size
+        self.members = frozenset(self.paths)
+        self.bits = {c: int.from_bytes(row, 'little') for c, row in bits.items()}
+        self.all = (1 << len(self.paths)) - 1
+        # The first young-generation collection after a build walks every
+        # new list; run it here, on the building thread, not on a keystroke
+        gc.collect(1)
+
+    def candidates(self, query, start=0):
+        # Ids from start on of paths containing every query character, in index order
+        mask = self.all >> start << start
+        for c in set(query):
+            mask &= self.bits.get(c, 0)
+            if not mask:
+                return
+        data = mask.to_bytes(self.size, 'little')
+        for m in NONZERO_BYTE.finditer(data):
+            base = m.start() * 8
+            for bit in BIT_POSITIONS[data[m.start()]]:
+                yield base + bit
+
+def scan_directory(root, rel_dir, rules):
+    # (file names, subdirectory names) of one directory, ignore rules applied
+    files, dirs = [], []
+    prefix = rel_dir + "/" if rel_dir else ""
+    applicable = rules.rules_in(rel_dir)
+    try:
+        with os.scandir(os.path.join(root, rel_dir)) as it:
+            for entry in it:
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if rules.ignored(prefix + entry.name, is_dir, applicable):
+                    continue
+                (dirs if is_dir else files).append(entry.name)
+    except OSError:
+        pass
+    return files, dirs
+
+class PathWalkThread(QThread):
+    walked = pyqtSignal(int, str, object)  # generation, relative start dir, {rel_dir: [file names]}
+
+    def __init__(self, generation, root, rules, start=""):
+        super().__init__()
+        self.generation = generation
+        self.root = root
+        self.rules = rules
+        self.start_dir = start
+
+    def run(self):
+        tree = {}
+        stack = [self.start_dir]
+        while stack:
+            if self.isInterruptionRequested():
+                return
+            rel_dir = stack.pop()
+            files, dirs = scan_directory(self.root, rel_dir, self.rules)
+            tree[rel_dir] = files
+            prefix = rel_dir + "/" if rel_dir else ""
+            stack.extend(prefix + name for name in dirs)
+        self.walked.emit(self.generation, self.start_dir, tree)
+
+class SnapshotThread(QThread):
+    built = pyqtSignal(int, object)
+
+    def __init__(self, generation, paths):
+        super().__init__()
+        self.generation = generation
+        self.paths = paths
+
+    def run(self):
+        self.built.emit(self.generation, PathSnapshot(self.paths))
+
+class PathIndex(QObject):
+    # Relative paths of every file in the workspace. Queries run against the
+    # last snapshot plus the files added or removed since it was built.
+    ready = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root = None
+        self.rules = None
+        self.generation = 0
+        self.tree = {}
+        self.snapshot = PathSnapshot([])
+        self.added = set()
+        self.removed = set()
+        self.building = False
+        self.changelog = []
+        self.rebuild_timer = QTimer(self)
+        self.rebuild_timer.setSingleShot(True)
+        self.rebuild_timer.setInterval(REBUILD_DELAY_MS)
+        self.rebuild_timer.timeout.connect(self.rebuild)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.watched = set()
+        self.unwatched = False
+        self.last_query = None
+        self.last_ids = []
+        # Id the last scan stopped after, when it was capped or ran out of budget
+        self.last_stop = None
+        self.partial = False
+
+    def open(self, root, excludes=()):
+        if self.watched:
+            self.watcher.removePaths([os.path.join(self.root, d) for d in self.watched])
+        self.watched = set()
+        self.unwatched = False
+        self.generation += 1
+        self.root = os.path.abspath(root)
+        self.rules = IgnoreRules(self.root, excludes)
+        self.tree = {}
+        self.snapshot = PathSnapshot([])
+        self.added = set()
+        self.removed = set()
+        self.building = False
+        self.changelog = []
+        self.last_query = None
+        self.walk("")
+
+    def walk(self, rel_dir):
+        job = PathWalkThread(self.generation, self.root, self.rules, rel_dir)
+        job.walked.connect(self.on_walked)
+        start_job(job, QThread.Priority.LowPriority)
+
+    def refresh(self):
+        # Catches up on changes in directories past the watch limit
+        if self.unwatched and self.root is not None:
+            self.walk("")
+
+    def on_walked(self, generation, start, tree):
+        if generation != self.generation:
+            return
+        self.drop_tree(start)
+        for rel_dir, files in tree.items():
+            self.add_directory(rel_dir, files)
+        if not self.snapshot.paths:
+            self.rebuild()
+        else:
+            self.rebuild_timer.start()
+
+    def add_directory(self, rel_dir, files):
+        self.tree[rel_dir] = set(files)
+        prefix = rel_dir + "/" if rel_dir else ""
+        for name in files:
+            self.file_added(prefix + name)
+        if len(self.watched) < WATCH_LIMIT:
+            self.watched.add(rel_dir)
+            self.watcher.addPath(os.path.join(self.root, rel_dir))
+        else:
+            self.unwatched = True
+
+    def drop_tree(self, rel_dir):
+        prefix = rel_dir + "/" if rel_dir else ""
+        for sub in [d for d in self.tree if d == rel_dir or d.startswith(prefix)]:
+            sub_prefix = sub + "/" if sub else ""
+            for name in self.tree.pop(sub):
+                self.file_removed(sub_prefix + name)
+            if sub in self.watched:
+                self.watched.discard(sub)
+                self.watcher.removePath(os.path.join(self.root, sub))
+
+    def file_added(self, path):
+        if self.building:
+            self.changelog.append((True, path))
+        self.removed.discard(path)
+        if path not in self.snapshot.members:
+            self.added.add(path)
+
+    def file_removed(self, path):
+        if self.building:
+            self.changelog.append((False, path))
+        self.added.discard(path)
+        if path in self.snapshot.members:
+            self.removed.add(path)
+
+    def on_directory_changed(self, directory):
+        if self.root is None:
+            return
+        rel_dir = os.path.relpath(directory, self.root).replace(os.sep, "/")
+        rel_dir = "" if rel_dir == "." else rel_dir
+        if rel_dir not in self.tree:
+            return
+        if not os.path.isdir(directory):
+            self.drop_tree(rel_dir)
+        else:
+            files, dirs = scan_directory(self.root, rel_dir, self.rules)
+            prefix = rel_dir + "/" if rel_dir else ""
+            old = self.tree[rel_dir]
+            for name in old.difference(files):
+                self.file_removed(prefix + name)
+            for name in set(files).difference(old):
+                self.file_added(prefix + name)
+            self.tree[rel_dir] = set(files)
+            children = {d for d in self.tree if d != rel_dir and d.rpartition("/")[0] == rel_dir}
+            current = {prefix + name for name in dirs}
+            for gone in children - current:
+                self.drop_tree(gone)
+            for new in current - children:
+                # A new or renamed directory is walked in the background
+                self.walk(new)
+        self.rebuild_timer.start()
+
+    def rebuild(self):
+        if self.building:
+            self.rebuild_timer.start()
+            return
+        paths = [f"{d}/{name}" if d else name for d, names in self.tree.items() for name in names]
+        self.building = True
+        self.changelog = []
+        job = SnapshotThread(self.generation, paths)
+        job.built.connect(self.on_built)
+        start_job(job, QThread.Priority.LowPriority)
+
+    def on_built(self, generation, snapshot):
+        if generation != self.generation:
+            return
+        self.building = False
+        self.snapshot = snapshot
+        self.added = set()
+        self.removed = set()
+        # Replay what changed while the snapshot was being built
+        for was_added, path in self.changelog:
+            if was_added:
+                self.file_added(path)
+            else:
+                self.file_removed(path)
+        self.changelog = []
+        self.last_query = None
+        self.ready.emit(len(snapshot.paths) + len(self.added) - len(self.removed))
+
+    def query(self, text, limit=QUICK_OPEN_LIMIT):
+        query = text.lower().replace("\\", "/").replace(" ", "")
+        snapshot = self.snapshot
+        removed = self.removed
+        if not query:
+            self.partial = False
+            return [p for p in snapshot.paths[:limit] if p not in removed]
+        match = subsequence_regex(query).match
+        lowered = snapshot.lowered
+        ids = []
+        stop = None
+        # Typing one more character only narrows the last result: its matches
+        # are re-checked, and a capped scan resumes from where it stopped
+        if self.last_query is not None and query.startswith(self.last_query):
+            ids = [i for i in self.last_ids if match(lowered[i])]
+            source = () if self.last_stop is None else snapshot.candidates(query, self.last_stop + 1)
+        else:
+            source = snapshot.candidates(query)
+        if len(ids) >= MAX_MATCHES:
+            stop = ids[MAX_MATCHES - 1]
+            del ids[MAX_MATCHES:]
+        else:
+            budget = SCAN_BUDGET
+            for i in source:
+                if match(lowered[i]):
+                    ids.append(i)
+                    if len(ids) >= MAX_MATCHES:
+                        stop = i
+                        break
+                budget -= 1
+                if not budget:
+                    stop = i
+                    break
+        self.partial = stop is not None and len(ids) < MAX_MATCHES
+        self.last_query = query
+        self.last_ids = ids
+        self.last_stop = stop
+        names = snapshot.names
+        scored = [(path_score(query, lowered[i], names[i], match), snapshot.paths[i]) for i in ids
+                  if snapshot.paths[i] not in removed]
+        for path in self.added:
+            low = path.lower()
+            if match(low):
+                scored.append((path_score(query, low, base_name(low), match), path))
+        scored.sort(key=lambda item: -item[0])
+        return [path for _, path in scored[:limit]]
+
+class QuickOpenDialog(QDialog):
+    chosen = pyqtSignal(str)
+
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.setWindowFlags(Qt.WindowType.Popup)
+        self.setStyleSheet(f"background-color: {COLORS['bg_panel']}; color: {COLORS['text_main']}; border: 1px solid {COLORS['border']};")
+        self.resize(560, 360)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(6, 6, 6, 6)
+        self.input = QLineEdit()
+        self.input.setPlaceholderText("Go to file...")
+        self.input.textChanged.connect(self.update_results)
+        self.input.returnPressed.connect(self.accept_current)
+        self.input.installEventFilter(self)
+        self.results = QListWidget()
+        self.results.itemActivated.connect(lambda item: self.accept_current())
+        layout.addWidget(self.input)
+        layout.addWidget(self.results)
+        index.ready.connect(lambda count: self.update_results(self.input.text()))
+
+    def popup(self):
+        parent = self.parentWidget()
+        if parent is not None:
+            top_left = parent.mapToGlobal(parent.rect().topLeft())
+            self.move(top_left.x() + (parent.width() - self.width()) // 2, top_left.y() + 60)
+        self.show()
+        self.input.clear()
+        self.update_results("")
+        self.input.setFocus()
+        self.index.refresh()
+
+    def update_results(self, text):
+        if not self.isVisible():
+            return
+        self.results.clear()
+        self.results.addItems(self.index.query(text))
+        if self.results.count():
+            self.results.setCurrentRow(0)
+        if self.index.partial:
+            # Same query again resumes the scan where this pass stopped
+            QTimer.singleShot(0, lambda: self.continue_results(text))
+
+    def continue_results(self, text):
+        if self.input.text() == text:
+            self.update_results(text)
+
+    def eventFilter(self, obj, event):
+        if obj is self.input and event.type() == event.Type.KeyPress:
+            key = event.key()
+            if key in (Qt.Key.Key_Down, Qt.Key.Key_Up):
+                step = 1 if key == Qt.Key.Key_Down else -1
+                row = max(0, min(self.results.count() - 1, self.results.currentRow() + step))
+                self.results.setCurrentRow(row)
+                return True
+            if key == Qt.Key.Key_Escape:
+                self.hide()
+                return True
+        return super().eventFilter(obj, event)
+
+    def accept_current(self):
+        item = self.results.currentItem()
+        if item is None:
+            return
+        self.hide()
+        self.chosen.emit(os.path.join(self.index.root, *item.text().split("/")))
@@ -0,0 +1,292 @@
+import os
+import sys
+import json
+import codecs
+import tempfile
+from PyQt6.QtCore import QCoreApplication, QObject, QProcess, QProcessEnvironment, QElapsedTimer, QTimer, pyqtSignal
+from editor.tracing import tracer
+
+# Grace period between terminate() and kill() when a run is stopped
+KILL_TIMEOUT_MS = 3000
+
+# Warm pool: pre-started interpreters with shell_lite already imported
+WARM_POOL_SIZE = 2
+# Scripts a warm worker runs before it is replaced; 1 gives every run a fresh process
+RUNS_PER_WORKER = 1
+# A pool whose workers keep dying on startup falls back to cold runs
+MAX_WORKER_FAILURES = 3
+RUN_END_MARKER = "\x00shelldesk-run-end\x00"
+
+# Executed by each warm worker: import once, then read length-prefixed
+# requests from stdin and end each run's output with the marker and exit code.
+WORKER_SOURCE = r'''
+import os, sys, json
+import shell_lite.main as shell_lite_main
+runs = int(sys.argv[1])
+marker = "\x00shelldesk-run-end\x00"
+for _ in range(runs):
+    header = sys.stdin.buffer.readline()
+    if not header:
+        break
+    request = json.loads(header)
+    source = sys.stdin.buffer.read(request["length"]).decode("utf-8")
+    os.chdir(request["cwd"])
+    sys.argv = ["shell_lite.main", "<editor>"]
+    code = 0
+    try:
+        shell_lite_main.execute_source(source, shell_lite_main.Interpreter())
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    # Both streams are marked, so the editor knows when each one is drained
+    sys.stderr.write(marker + str(code) + "\n")
+    sys.stderr.flush()
+    sys.stdout.write(marker + str(code) + "\n")
+    sys.stdout.flush()
+'''
+
+def shell_lite_env():
+    env = QProcessEnvironment.systemEnvironment()
+    # Fix PYTHONPATH to include the 'shell-lite' directory so 'shell_lite' module can be imported
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    shell_lite_path = os.path.join(project_root, "shell-lite")
+    env.insert("PYTHONPATH", shell_lite_path + os.pathsep + env.value("PYTHONPATH", ""))
+    # Output is streamed to the console, so the child must not block-buffer it
+    env.insert("PYTHONUNBUFFERED", "1")
+    return env
+
+class WarmPool(QObject):
+    def __init__(self, size=WARM_POOL_SIZE, runs_per_worker=RUNS_PER_WORKER, parent=None):
+        super().__init__(parent)
+        self.size = size
+        self.runs_per_worker = runs_per_worker
+        self.idle = []
+        self.runs_left = {}
+        self.failures = 0
+        self.broken = False
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown)
+
+    def fill(self):
+        while not self.broken and len(self.idle) < self.size:
+            self.spawn()
+
+    def spawn(self):
+        process = QProcess(self)
+        process.setProcessEnvironment(shell_lite_env())
+        process.finished.connect(lambda *args, p=process: self.on_idle_exit(p))
+        process.start(sys.executable, ["-c", WORKER_SOURCE, str(self.runs_per_worker)])
+        self.runs_left[process] = self.runs_per_worker
+        self.idle.append(process)
+
+    def on_idle_exit(self, process):
+        # A worker that dies before it was ever used failed to import shell_lite
+        if process in self.idle:
+            self.idle.remove(process)
+            self.runs_left.pop(process, None)
+            process.deleteLater()
+            self.failures += 1
+            if self.failures >= MAX_WORKER_FAILURES:
+                self.broken = True
+            else:
+                QTimer.singleShot(0, self.fill)
+
+    def acquire(self):
+        while self.idle:
+            process = self.idle.pop(0)
+            if process.state() != QProcess.ProcessState.NotRunning:
+                process.finished.disconnect()
+                self.runs_left[process] -= 1
+                QTimer.singleShot(0, self.fill)
+                return process
+        return None
+
+    def release(self, process):
+        if self.runs_left.get(process, 0) > 0 and process.state() == QProcess.ProcessState.Running:
+            self.failures = 0
+            process.finished.connect(lambda *args, p=process: self.on_idle_exit(p))
+            self.idle.append(process)
+        else:
+            self.retire(process)
+
+    def retire(self, process):
+        self.runs_left.pop(process, None)
+        if process.state() == QProcess.ProcessState.NotRunning:
+            process.deleteLater()
+        else:
+            # Its last run is done; let it exit on its own
+            process.finished.connect(process.deleteLater)
+            process.closeWriteChannel()
+
+    def shutdown(self):
+        for process in self.idle:
+            process.finished.disconnect()
+            process.kill()
+            process.waitForFinished(1000)
+            process.deleteLater()
+        self.idle = []
+        self.runs_left = {}
+
+class ScriptRun(QObject):
+    output = pyqtSignal(int, str)
+    errors = pyqtSignal(int, str)
+    finished = pyqtSignal(int, int, float)  # run id, exit code, elapsed seconds
+    failed = pyqtSignal(int, str)
+
+    def __init__(self, run_id, script_content, cwd, pool=None, parent=None):
+        super().__init__(parent)
+        self.run_id = run_id
+        self.script_content = script_content
+        self.cwd = cwd
+        self.pool = pool
+        self.warm = False
+        self.done = False
+        self.temp_path = None
+        self.stopped = False
+        self.first_output = None
+        self.held = {"stdout": "", "stderr": ""}
+        self.exit_codes = {}
+        self.clock = QElapsedTimer()
+        self.stdout_decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        self.stderr_decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        self.process = None
+        self.trace_start = None
+        self.finished.connect(lambda *_: self.trace_end("ok"))
+        self.failed.connect(lambda *_: self.trace_end("failed"))
+
+    def trace_end(self, result):
+        if self.trace_start is not None:
+            tracer().complete("run", self.trace_start, warm=self.warm, result=result)
+            self.trace_start = None
+
+    def attach(self, process):
+        self.process = process
+        process.readyReadStandardOutput.connect(self.on_stdout)
+        process.readyReadStandardError.connect(self.on_stderr)
+        process.finished.connect(self.on_finished)
+        process.errorOccurred.connect(self.on_error)
+
+    def detach(self):
+        process = self.process
+        process.readyReadStandardOutput.disconnect(self.on_stdout)
+        process.readyReadStandardError.disconnect(self.on_stderr)
+        process.finished.disconnect(self.on_finished)
+        process.errorOccurred.disconnect(self.on_error)
+        self.pool.release(process)
+
+    def start(self):
+        self.clock.start()
+        self.trace_start = tracer().now()
+        process = self.pool.acquire() if self.pool is not None and not self.pool.broken else None
+        if process is not None:
+            # Warm path: the script goes over stdin, no temp file
+            self.warm = True
+            self.attach(process)
+            payload = self.script_content.encode("utf-8")
+            header = json.dumps({"length": len(payload), "cwd": self.cwd}) + "\n"
+            process.write(header.encode("utf-8") + payload)
+            return
+        try:
+            # Unique per run so concurrent runs never share a file
+            fd, self.temp_path = tempfile.mkstemp(suffix=".shl", prefix=".shelldesk-run-", dir=self.cwd)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.script_content)
+        except OSError as e:
+            self.failed.emit(self.run_id, f"Error saving temp file: {e}")
+            return
+        process = QProcess(self)
+        process.setWorkingDirectory(self.cwd)
+        process.setProcessEnvironment(shell_lite_env())
+        self.attach(process)
+        # Using shell_lite.main instead of shell_lite.src.main
+        process.start(sys.executable, ["-m", "shell_lite.main", self.temp_path])
+
+    def is_running(self):
+        return not self.done and self.process is not None and \
+            self.process.state() != QProcess.ProcessState.NotRunning
+
+    def elapsed(self):
+        return self.clock.elapsed() / 1000 if self.clock.isValid() else 0.0
+
+    def stop(self):
+        if not self.is_running():
+            return
+        self.stopped = True
+        self.process.terminate()
+        QTimer.singleShot(KILL_TIMEOUT_MS, self.kill_if_running)
+
+    def kill_if_running(self):
+        if self.is_running():
+            self.process.kill()
+
+    def note_output(self):
+        if self.first_output is None:
+            self.first_output = self.elapsed()
+
+    def on_stdout(self):
+        text = self.stdout_decoder.decode(self.process.readAllStandardOutput().data())
+        self.take_output("stdout", text, self.output)
+
+    def on_stderr(self):
+        text = self.stderr_decoder.decode(self.process.readAllStandardError().data())
+        self.take_output("stderr", text, self.errors)
+
+    def take_output(self, stream, text, signal):
+        if self.warm:
+            text = self.split_marker(stream, text)
+        if text:
+            self.note_output()
+            signal.emit(self.run_id, text)
+        if len(self.exit_codes) == 2 and not self.done:
+            self.done = True
+            self.detach()
+            self.finished.emit(self.run_id, self.exit_codes["stdout"], self.elapsed())
+
+    def split_marker(self, stream, text):
+        # Returns the output to show; records the exit code once the marker arrives
+        text = self.held[stream] + text
+        self.held[stream] = ""
+        index = text.find(RUN_END_MARKER)
+        if index != -1:
+            code_end = text.find("\n", index)
+            if code_end == -1:
+                self.held[stream] = text[index:]
+            else:
+                code = text[index + len(RUN_END_MARKER):code_end]
+                self.exit_codes[stream] = int(code) if code.lstrip("-").isdigit() else 1
+            return text[:index]
+        if "\x00" in text[-len(RUN_END_MARKER):]:
+            # Hold back a suffix that may be the start of a split marker
+            for size in range(min(len(RUN_END_MARKER), len(text)), 0, -1):
+                if RUN_END_MARKER.startswith(text[-size:]):
+                    self.held[stream] = text[-size:]
+                    return text[:-size]
+        return text
+
+    def on_finished(self, exit_code, exit_status):
+        if self.done:
+            return
+        self.done = True
+        if self.held["stdout"]:
+            self.output.emit(self.run_id, self.held["stdout"])
+        if self.held["stderr"]:
+            self.errors.emit(self.run_id, self.held["stderr"])
+        self.remove_temp()
+        if self.warm:
+            exit_code = self.exit_codes.get("stdout", self.exit_codes.get("stderr", exit_code))
+            self.pool.retire(self.process)
+        self.finished.emit(self.run_id, exit_code, self.elapsed())
+
+    def on_error(self, error):
+        if error == QProcess.ProcessError.FailedToStart:
+            self.done = True
+            self.remove_temp()
+            self.failed.emit(self.run_id, f"Execution failed: {self.process.errorString()}")
+
+    def remove_temp(self):
+        if self.temp_path and os.path.exists(self.temp_path):
+            try:
+                os.remove(self.temp_path)
+            except OSError:
+                pass
+        self.temp_path = None
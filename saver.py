@@ -0,0 +1,154 @@
+import os
+import hashlib
+import tempfile
+from PyQt6.QtCore import QCoreApplication, QObject, QRunnable, QThreadPool, pyqtSignal
+from editor.tracing import tracer, traced
+
+SAVER_THREADS = 4
+
+def encode_text(text):
+    # Same bytes the old text-mode write produced, newline translation included
+    if os.linesep != "\n":
+        text = text.replace("\n", os.linesep)
+    return text.encode("utf-8")
+
+def content_hash(data):
+    return hashlib.sha1(data).hexdigest()
+
+def atomic_write(path, data):
+    # Written next to the target and renamed over it, so a crash mid-write
+    # leaves either the old file or the new one, never a truncated one
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+        except OSError:
+            pass
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+class SaveSignals(QObject):
+    saved = pyqtSignal(int, object, bool)  # save id, (hash, mtime_ns, size) on disk, whether written
+    failed = pyqtSignal(int, str)
+    done = pyqtSignal()
+
+class SaveTask(QRunnable):
+    def __init__(self, save_id, path, text, known):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.save_id = save_id
+        self.path = path
+        self.text = text
+        self.known = known
+        self.signals = SaveSignals()
+
+    @traced("save.write")
+    def run(self):
+        try:
+            data = encode_text(self.text)
+            digest = content_hash(data)
+            written = not self.unchanged(data, digest)
+            if written:
+                atomic_write(self.path, data)
+            st = os.stat(self.path)
+            self.signals.saved.emit(self.save_id, (digest, st.st_mtime_ns, st.st_size), written)
+        except Exception as e:
+            self.signals.failed.emit(self.save_id, str(e))
+        finally:
+            self.text = None
+            self.signals.done.emit()
+
+    def unchanged(self, data, digest):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        if st.st_size != len(data):
+            return False
+        if self.known is not None and self.known[1:] == (st.st_mtime_ns, st.st_size):
+            return digest == self.known[0]
+        # Not written by us, or changed since: compare against the file itself
+        with open(self.path, "rb") as f:
+            return f.read() == data
+
+class FileSaver(QObject):
+    # Writes run on a small pool; saves of one path run one after another,
+    # so a later save can never be overtaken by an earlier one.
+    saved = pyqtSignal(int, str, bool)  # save id, path, whether the file was written
+    failed = pyqtSignal(int, str, str)  # save id, path, message
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(SAVER_THREADS)
+        self.next_id = 1
+        self.hashes = {}
+        self.running = {}
+        self.queued = {}
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown)
+
+    def save(self, path, text):
+        save_id = self.next_id
+        self.next_id += 1
+        self.queued.setdefault(path, []).append((save_id, text))
+        if path not in self.running:
+            self.start_next(path)
+        return save_id
+
+    def start_next(self, path):
+        queue = self.queued.get(path)
+        if not queue:
+            self.queued.pop(path, None)
+            return
+        save_id, text = queue.pop(0)
+        task = SaveTask(save_id, path, text, self.hashes.get(path))
+        task.trace_start = tracer().now()
+        task.signals.saved.connect(lambda i, known, written, p=path: self.on_saved(i, p, known, written))
+        task.signals.failed.connect(lambda i, message, p=path: self.on_failed(i, p, message))
+        task.signals.done.connect(lambda p=path: self.on_done(p))
+        self.running[path] = task
+        self.pool.start(task)
+
+    def is_saving(self):
+        return bool(self.running)
+
+    def on_saved(self, save_id, path, known, written):
+        self.trace_end(path, "saved")
+        self.hashes[path] = known
+        self.saved.emit(save_id, path, written)
+
+    def on_failed(self, save_id, path, message):
+        # The file on disk is no longer known to match any hash
+        self.hashes.pop(path, None)
+        self.trace_end(path, "failed")
+        self.failed.emit(save_id, path, message)
+
+    def trace_end(self, path, result):
+        task = self.running.get(path)
+        if task is not None:
+            tracer().complete("save", task.trace_start, path=path, result=result)
+
+    def on_done(self, path):
+        self.running.pop(path, None)
+        self.start_next(path)
+
+    def forget(self, path):
+        self.hashes.pop(path, None)
+
+    def shutdown(self):
+        # Pending writes are finished, not dropped, before the app exits
+        while self.running or self.queued:
+            self.pool.waitForDone()
+            QCoreApplication.processEvents()
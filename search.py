@@ -0,0 +1,367 @@
+import os
+import re
+import mmap
+from functools import lru_cache
+from PyQt6.QtCore import Qt, QCoreApplication, QThread, QTimer, pyqtSignal
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QCheckBox,
+                             QLabel, QTreeWidget, QTreeWidgetItem)
+from editor.filetree import IgnoreRules
+from editor.loader import looks_binary, SNIFF_BYTES
+from editor.quickopen import scan_directory
+from editor.styles import COLORS
+from editor.workers import start_job
+
+SEARCH_DELAY_MS = 250
+# The first files are searched on the search thread itself, so small trees
+# never pay for starting the pool; anything past this goes to the pool
+INLINE_FILES = 200
+INLINE_BYTES = 16 * 1024 * 1024
+# A pool task is a batch of files, cut at whichever limit is reached first
+BATCH_FILES = 64
+BATCH_BYTES = 32 * 1024 * 1024
+# Batches handed to the pool ahead of the results coming back
+BATCHES_AHEAD = 16
+SEARCH_PROCESSES = max(1, min(8, (os.cpu_count() or 2) - 1))
+MAX_HITS_PER_FILE = 1000
+MAX_RESULTS = 20000
+PREVIEW_CHARS = 200
+# UTF-8 continuation bytes; a line prefix without them is one byte per character
+UTF8_CONTINUATION = bytes(range(0x80, 0xC0))
+# Newlines are counted over slices of at most this many bytes, so a match
+# deep in a huge file never copies the whole prefix
+COUNT_BLOCK = 1024 * 1024
+
+_pool = None
+
+def search_pool():
+    global _pool
+    if _pool is None:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        # Spawned, not forked: forking a process that runs Qt threads is unsafe
+        _pool = ProcessPoolExecutor(max_workers=SEARCH_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(shutdown_pool)
+    return _pool
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def build_query(query, regex=False, match_case=False):
+    # (needle, regex, match_case), the picklable form a search is run from;
+    # raises re.error for a bad regex
+    needle = query.encode('utf-8')
+    if regex:
+        compiled(needle, match_case)
+    return needle, regex, match_case
+
+@lru_cache(maxsize=8)
+def compiled(source, match_case):
+    return re.compile(source, re.MULTILINE if match_case else re.MULTILINE | re.IGNORECASE)
+
+def folded_finder(needle):
+    # Case-insensitive literal search: lower-casing a block and using
+    # bytes.find is several times faster than an IGNORECASE regex
+    needle = needle.lower()
+    overlap = len(needle) - 1
+    block_start, block_end, block = 0, 0, b""
+
+    def find(data, pos):
+        nonlocal block_start, block_end, block
+        size = len(data)
+        while pos < size:
+            if not block_start <= pos < block_end:
+                block_start = pos
+                block_end = min(pos + COUNT_BLOCK + overlap, size)
+                block = data[block_start:block_end].lower()
+            i = block.find(needle, pos - block_start)
+            if i != -1:
+                return block_start + i
+            if block_end == size:
+                break
+            # Matches starting in the overlap were not fully inside the block
+            pos = block_end - overlap
+            block_end = block_start
+        return -1
+    return find
+
+def make_finder(spec):
+    # find(data, pos) -> offset of the next match at or after pos, or -1
+    needle, regex, match_case = spec
+    if regex:
+        search = compiled(needle, match_case).search
+
+        def find(data, pos):
+            m = search(data, pos)
+            return -1 if m is None else m.start()
+        return find
+    if match_case:
+        return lambda data, pos: data.find(needle, pos)
+    return folded_finder(needle)
+
+def count_newlines(data, start, end):
+    if end - start <= COUNT_BLOCK:
+        return data[start:end].count(b"\n")
+    count = 0
+    for pos in range(start, end, COUNT_BLOCK):
+        count += data[pos:min(pos + COUNT_BLOCK, end)].count(b"\n")
+    return count
+
+def search_file(path, spec, max_hits=MAX_HITS_PER_FILE):
+    # [(line, column, line text)] with at most one hit per line. The file is
+    # mapped, not read, so only the lines that match become Python strings.
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if looks_binary(data[:SNIFF_BYTES]):
+                    return []
+                return scan_mapped(data, make_finder(spec), max_hits)
+    except (OSError, ValueError):
+        return []
+
+def scan_mapped(data, find, max_hits):
+    hits = []
+    size = len(data)
+    line = 0
+    counted = 0
+    pos = 0
+    while pos <= size and len(hits) < max_hits:
+        start = find(data, pos)
+        if start == -1:
+            break
+        line_start = data.rfind(b"\n", counted, start) + 1 or counted
+        line += count_newlines(data, counted, line_start)
+        counted = line_start
+        line_end = data.find(b"\n", start)
+        if line_end == -1:
+            line_end = size
+        # Very long lines are previewed from just before the match
+        preview_start = max(line_start, start - PREVIEW_CHARS // 2)
+        # The editor takes the column in characters; counted without decoding
+        # what may be a very long prefix
+        column = len(data[line_start:start].translate(None, UTF8_CONTINUATION))
+        text = data[preview_start:min(line_end, preview_start + PREVIEW_CHARS * 4)].decode('utf-8', 'replace')
+        hits.append((line, column, text[:PREVIEW_CHARS].rstrip("\r")))
+        pos = line_end + 1
+    return hits
+
+def search_batch(paths, spec):
+    # Runs in a pool process
+    results = []
+    for path in paths:
+        hits = search_file(path, spec)
+        if hits:
+            results.append((path, hits))
+    return len(paths), results
+
+class SearchThread(QThread):
+    found = pyqtSignal(int, object)  # generation, [(path, [(line, column, text)])]
+    progress = pyqtSignal(int, int)  # generation, files searched
+    finished_search = pyqtSignal(int, int, bool)  # generation, files searched, stopped at MAX_RESULTS
+
+    def __init__(self, generation, root, rules, spec):
+        super().__init__()
+        self.generation = generation
+        self.root = root
+        self.rules = rules
+        self.spec = spec
+        self.searched = 0
+        self.hits = 0
+
+    def run(self):
+        inline_bytes = 0
+        batch, batch_bytes = [], 0
+        futures = set()
+        for path, size in self.walk():
+            if self.isInterruptionRequested():
+                break
+            if self.searched < INLINE_FILES and inline_bytes + size <= INLINE_BYTES:
+                inline_bytes += size
+                self.searched += 1
+                hits = search_file(path, self.spec)
+                if hits:
+                    self.report([(path, hits)])
+                elif self.searched % 50 == 0:
+                    self.progress.emit(self.generation, self.searched)
+                continue
+            batch.append(path)
+            batch_bytes += size
+            if len(batch) >= BATCH_FILES or batch_bytes >= BATCH_BYTES:
+                futures.add(search_pool().submit(search_batch, batch, self.spec))
+                batch, batch_bytes = [], 0
+                while len(futures) >= BATCHES_AHEAD and not self.isInterruptionRequested():
+                    futures = self.collect(futures)
+        if batch and not self.isInterruptionRequested():
+            futures.add(search_pool().submit(search_batch, batch, self.spec))
+        while futures and not self.isInterruptionRequested():
+            futures = self.collect(futures)
+        for future in futures:
+            future.cancel()
+        if not self.isInterruptionRequested():
+            self.finished_search.emit(self.generation, self.searched, self.hits >= MAX_RESULTS)
+
+    def collect(self, futures):
+        from concurrent.futures import wait, FIRST_COMPLETED
+        done, pending = wait(futures, timeout=0.1, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                count, results = future.result()
+            except Exception:
+                continue
+            self.searched += count
+            self.report(results)
+            self.progress.emit(self.generation, self.searched)
+        return pending
+
+    def report(self, results):
+        if self.hits >= MAX_RESULTS:
+            self.requestInterruption()
+            return
+        if results:
+            self.hits += sum(len(hits) for _, hits in results)
+            self.found.emit(self.generation, results)
+            if self.hits >= MAX_RESULTS:
+                # Enough to look at; the rest of the tree is not searched
+                self.finished_search.emit(self.generation, self.searched, True)
+                self.requestInterruption()
+
+    def walk(self):
+        # (path, size) of every file the workspace shows, ignore rules applied
+        stack = [""]
+        while stack:
+            if self.isInterruptionRequested():
+                return
+            rel_dir = stack.pop()
+            files, dirs = scan_directory(self.root, rel_dir, self.rules)
+            directory = os.path.join(self.root, rel_dir)
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    continue
+                yield path, size
+            prefix = rel_dir + "/" if rel_dir else ""
+            stack.extend(prefix + name for name in reversed(dirs))
+
+class FindInFilesPanel(QWidget):
+    open_hit = pyqtSignal(str, int, int)  # path, line, column
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root = None
+        self.excludes = []
+        self.generation = 0
+        self.job = None
+        self.file_items = {}
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(6, 6, 6, 6)
+        layout.setSpacing(4)
+        self.input = QLineEdit()
+        self.input.setPlaceholderText("Find in files...")
+        self.input.setStyleSheet(f"background-color: {COLORS['bg_dark']}; color: {COLORS['text_main']}; border: 1px solid {COLORS['border']}; padding: 3px;")
+        layout.addWidget(self.input)
+        options = QHBoxLayout()
+        self.regex_box = QCheckBox("Regex")
+        self.case_box = QCheckBox("Match case")
+        options.addWidget(self.regex_box)
+        options.addWidget(self.case_box)
+        options.addStretch()
+        layout.addLayout(options)
+        self.status = QLabel("")
+        self.status.setStyleSheet(f"color: {COLORS['text_dim']}; font-size: 11px;")
+        layout.addWidget(self.status)
+        self.results = QTreeWidget()
+        self.results.setHeaderHidden(True)
+        self.results.setUniformRowHeights(True)
+        self.results.itemActivated.connect(self.on_item_activated)
+        layout.addWidget(self.results)
+        # Typing restarts the search once the query settles
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.start_search)
+        self.input.textChanged.connect(lambda text: self.search_timer.start())
+        self.input.returnPressed.connect(self.start_search)
+        self.regex_box.toggled.connect(lambda checked: self.start_search())
+        self.case_box.toggled.connect(lambda checked: self.start_search())
+
+    def set_root(self, root, excludes=()):
+        changed = root != self.root or list(excludes) != self.excludes
+        self.root = root
+        self.excludes = list(excludes)
+        if changed and self.input.text():
+            self.start_search()
+
+    def focus_query(self, text=""):
+        if text:
+            self.input.setText(text)
+        self.input.setFocus()
+        self.input.selectAll()
+
+    def cancel(self):
+        self.search_timer.stop()
+        self.generation += 1
+        if self.job is not None:
+            self.job.requestInterruption()
+            self.job = None
+
+    def start_search(self):
+        self.cancel()
+        self.results.clear()
+        self.file_items = {}
+        query = self.input.text()
+        if not query or self.root is None:
+            self.status.setText("")
+            return
+        try:
+            spec = build_query(query, self.regex_box.isChecked(), self.case_box.isChecked())
+        except re.error as e:
+            self.status.setText(f"Invalid regex: {e}")
+            return
+        self.status.setText("Searching...")
+        # Rules are rebuilt per search, so edited .gitignore files are picked up
+        self.job = SearchThread(self.generation, self.root, IgnoreRules(self.root, self.excludes), spec)
+        self.job.found.connect(self.on_found)
+        self.job.progress.connect(self.on_progress)
+        self.job.finished_search.connect(self.on_finished)
+        start_job(self.job, QThread.Priority.LowPriority)
+
+    def hit_count(self):
+        return sum(item.childCount() for item in self.file_items.values())
+
+    def on_found(self, generation, results):
+        if generation != self.generation:
+            return
+        for path, hits in results:
+            item = QTreeWidgetItem([os.path.relpath(path, self.root)])
+            item.setToolTip(0, path)
+            for line, column, text in hits:
+                child = QTreeWidgetItem(item, [f"{line + 1}: {text.strip()}"])
+                child.setData(0, Qt.ItemDataRole.UserRole, (path, line, column))
+            item.setText(0, f"{item.text(0)} ({len(hits)})")
+            self.file_items[path] = item
+            self.results.addTopLevelItem(item)
+            item.setExpanded(True)
+
+    def on_progress(self, generation, searched):
+        if generation == self.generation:
+            self.status.setText(f"Searching... {self.hit_count()} matches in {len(self.file_items)} files ({searched} searched)")
+
+    def on_finished(self, generation, searched, truncated):
+        if generation != self.generation:
+            return
+        self.job = None
+        note = f", stopped at {MAX_RESULTS}" if truncated else ""
+        self.status.setText(f"{self.hit_count()} matches in {len(self.file_items)} files ({searched} searched{note})")
+
+    def on_item_activated(self, item, column=0):
+        hit = item.data(0, Qt.ItemDataRole.UserRole)
+        if hit is not None:
+            self.open_hit.emit(*hit)
@@ -0,0 +1,78 @@
+import os
+import json
+import hashlib
+from editor.completion import cache_dir
+
+SESSION_VERSION = 1
+# Placeholder tabs inserted per turn of the event loop while restoring
+RESTORE_TAB_BATCH = 8
+# Restored tabs are read ahead into the loader cache a few files at a time,
+# nearest the current tab first, and only as many as the cache keeps
+PREFETCH_BATCH = 4
+PREFETCH_MAX_FILES = 16
+
+def backup_dir():
+    return os.path.join(cache_dir(), "session")
+
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def write_backup(directory, digest, text):
+    path = os.path.join(directory, digest + ".txt")
+    if os.path.exists(path):
+        # Named by content, so an unchanged buffer is not written again
+        return
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def read_backup(digest):
+    try:
+        with open(os.path.join(backup_dir(), digest + ".txt"), "r", encoding="utf-8", newline="") as f:
+            text = f.read()
+    except (OSError, ValueError):
+        return None
+    return text if content_hash(text) == digest else None
+
+def save_session(settings, root, tabs, current):
+    # tabs: (path, cursor, first line, text or None for buffers matching disk)
+    directory = backup_dir()
+    kept = set()
+    entries = []
+    saved_current = None
+    for i, (path, cursor, first_line, text) in enumerate(tabs):
+        entry = {"path": path, "cursor": list(cursor), "first_line": first_line}
+        if text is not None:
+            digest = content_hash(text)
+            try:
+                os.makedirs(directory, exist_ok=True)
+                write_backup(directory, digest, text)
+            except OSError:
+                continue
+            entry["hash"] = digest
+            kept.add(digest)
+        if i == current:
+            saved_current = len(entries)
+        entries.append(entry)
+    settings.setValue("session", json.dumps({
+        "version": SESSION_VERSION,
+        "root": root,
+        "tabs": entries,
+        "current": saved_current,
+    }))
+    try:
+        for name in os.listdir(directory):
+            if name.partition(".")[0] not in kept:
+                os.remove(os.path.join(directory, name))
+    except OSError:
+        pass
+
+def load_session(settings):
+    try:
+        session = json.loads(settings.value("session", "", type=str) or "null")
+    except ValueError:
+        return None
+    if not isinstance(session, dict) or session.get("version") != SESSION_VERSION:
+        return None
+    return session
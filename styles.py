@@ -10,7 +10,8 @@ COLORS = {
     "selection": "#3e4451",
     "editor_bg": "#1e1e1e",
     "status_bg": "#007acc",     
-    "status_bg_dark": "#2d2d2d"
+    "status_bg_dark": "#2d2d2d",
+    "error": "#e06c75"
 }
 STYLESHEET = f"""
 QMainWindow {{
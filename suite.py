@@ -0,0 +1,451 @@
+import os
+import sys
+import json
+import time
+import fnmatch
+import tempfile
+import subprocess
+from PyQt6.QtGui import QColor
+from PyQt6.QtCore import Qt, QCoreApplication, QObject, QProcess, QElapsedTimer, QThread, QTimer, pyqtSignal
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTreeWidget,
+                             QTreeWidgetItem, QDialog, QFormLayout, QLineEdit, QSpinBox,
+                             QDoubleSpinBox, QDialogButtonBox, QFileDialog, QHeaderView)
+from editor.styles import COLORS
+from editor.workers import start_job
+
+SUITE_PATTERN = "*.shl"
+SUITE_WORKERS = max(1, min(8, os.cpu_count() or 1))
+SUITE_TIMEOUT_S = 60.0
+# Output kept per script for the results panel and the export
+SUITE_OUTPUT_CHARS = 20000
+RESULTS_VERSION = 1
+
+# Executed by each suite process: lex, parse and run one script, then write
+# its CPU time and peak RSS (children included) to the stats file, since
+# the parent cannot see rusage through QProcess. Unlike `shell_lite.main`,
+# a script that raises exits non-zero, so it counts as failed.
+SUITE_RUN_SOURCE = r'''
+import sys, json, time
+script, stats_path = sys.argv[1], sys.argv[2]
+code = 0
+try:
+    from shell_lite.lexer import Lexer
+    from shell_lite.parser import Parser
+    from shell_lite.interpreter import Interpreter
+    with open(script, "r", encoding="utf-8") as f:
+        source = f.read()
+    sys.argv = ["shell_lite.main", script]
+    interpreter = Interpreter()
+    for statement in Parser(Lexer(source).tokenize()).parse():
+        interpreter.visit(statement)
+except SystemExit as e:
+    code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+except Exception as e:
+    line = getattr(e, "line", 0)
+    print(f"[ShellLite Error]{f' on line {line}' if line else ''}: {e}")
+    code = 1
+finally:
+    sys.stdout.flush()
+    try:
+        import resource
+        own = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu = own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+        # ru_maxrss is in KiB on Linux and in bytes on macOS
+        scale = 1024 if sys.platform == "darwin" else 1
+        rss = max(own.ru_maxrss, children.ru_maxrss) // scale
+    except ImportError:
+        cpu, rss = time.process_time(), None
+    with open(stats_path, "w") as f:
+        json.dump({"cpu_s": cpu, "peak_rss_kb": rss}, f)
+sys.exit(code)
+'''
+
+def git_commit(root):
+    # Recorded with exported results, to line runs up with commits
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, capture_output=True,
+                                text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip() or None
+
+class ScriptDiscoveryThread(QThread):
+    found = pyqtSignal(object)  # sorted script paths
+
+    def __init__(self, root, excludes, pattern):
+        super().__init__()
+        self.root = root
+        self.excludes = excludes
+        self.pattern = pattern
+
+    def run(self):
+        from editor.filetree import IgnoreRules
+        from editor.quickopen import scan_directory
+        rules = IgnoreRules(self.root, self.excludes)
+        paths = []
+        stack = [""]
+        while stack:
+            if self.isInterruptionRequested():
+                return
+            rel_dir = stack.pop()
+            files, dirs = scan_directory(self.root, rel_dir, rules)
+            for name in files:
+                if fnmatch.fnmatch(name, self.pattern):
+                    paths.append(os.path.join(self.root, rel_dir, name))
+            prefix = rel_dir + "/" if rel_dir else ""
+            stack.extend(prefix + name for name in dirs)
+        self.found.emit(sorted(paths))
+
+class SuiteRun(QObject):
+    # Runs every script as its own process, at most `workers` at a time,
+    # each killed once it has run for `timeout` seconds
+    started = pyqtSignal(str)  # path
+    finished = pyqtSignal(object)  # result dict
+    done = pyqtSignal(float)  # wall seconds for the whole suite
+
+    def __init__(self, root, paths, workers=SUITE_WORKERS, timeout=SUITE_TIMEOUT_S, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.queue = list(paths)
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.running = {}
+        self.results = []
+        self.stopped = False
+        self.clock = QElapsedTimer()
+        self.stats_dir = tempfile.mkdtemp(prefix="shelldesk-suite-")
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.stop)
+
+    def start(self):
+        self.clock.start()
+        self.start_next()
+
+    def start_next(self):
+        from editor.runner import shell_lite_env
+        while self.queue and len(self.running) < self.workers and not self.stopped:
+            path = self.queue.pop(0)
+            stats_path = os.path.join(self.stats_dir, f"{len(self.results) + len(self.running)}.json")
+            process = QProcess(self)
+            process.setWorkingDirectory(self.root)
+            process.setProcessEnvironment(shell_lite_env())
+            process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
+            process.readyReadStandardOutput.connect(self.on_output)
+            process.finished.connect(self.on_finished)
+            process.errorOccurred.connect(self.on_error)
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            timer.setTimerType(Qt.TimerType.PreciseTimer)
+            timer.timeout.connect(lambda p=process: self.on_timeout(p))
+            clock = QElapsedTimer()
+            clock.start()
+            self.running[process] = {"path": path, "stats": stats_path, "clock": clock, "timer": timer,
+                                     "output": [], "chars": 0, "timed_out": False}
+            process.start(sys.executable, ["-c", SUITE_RUN_SOURCE, path, stats_path])
+            if self.timeout > 0:
+                timer.start(int(self.timeout * 1000))
+            self.started.emit(path)
+        if not self.running and (not self.queue or self.stopped):
+            self.finish()
+
+    def on_output(self):
+        process = self.sender()
+        state = self.running.get(process)
+        if state is None:
+            return
+        text = process.readAllStandardOutput().data().decode("utf-8", "replace")
+        if state["chars"] < SUITE_OUTPUT_CHARS:
+            state["output"].append(text[:SUITE_OUTPUT_CHARS - state["chars"]])
+            state["chars"] += len(text)
+
+    def on_timeout(self, process):
+        state = self.running.get(process)
+        if state is not None:
+            state["timed_out"] = True
+            process.kill()
+
+    def on_error(self, error):
+        if error == QProcess.ProcessError.FailedToStart:
+            self.complete(self.sender(), None, self.sender().errorString())
+
+    def on_finished(self, exit_code, exit_status):
+        process = self.sender()
+        if process in self.running:
+            self.on_output()
+            self.complete(process, exit_code, None)
+
+    def complete(self, process, exit_code, error):
+        state = self.running.pop(process)
+        state["timer"].stop()
+        state["timer"].deleteLater()
+        wall = state["clock"].elapsed() / 1000
+        stats = {}
+        try:
+            with open(state["stats"], "r") as f:
+                stats = json.load(f)
+            os.remove(state["stats"])
+        except (OSError, ValueError):
+            pass
+        if error is not None:
+            status = "error"
+        elif state["timed_out"]:
+            status = "timeout"
+        elif self.stopped:
+            status = "stopped"
+        else:
+            status = "passed" if exit_code == 0 else "failed"
+        result = {
+            "path": os.path.relpath(state["path"], self.root),
+            "status": status,
+            "exit_code": exit_code if error is None and not state["timed_out"] else None,
+            "wall_s": wall,
+            "cpu_s": stats.get("cpu_s"),
+            "peak_rss_kb": stats.get("peak_rss_kb"),
+            "output": error if error is not None else "".join(state["output"]),
+        }
+        self.results.append(result)
+        process.deleteLater()
+        self.finished.emit(result)
+        self.start_next()
+
+    def stop(self):
+        self.stopped = True
+        self.queue = []
+        for process in list(self.running):
+            process.kill()
+
+    def is_running(self):
+        return bool(self.running or self.queue)
+
+    def finish(self):
+        try:
+            os.rmdir(self.stats_dir)
+        except OSError:
+            pass
+        self.done.emit(self.clock.elapsed() / 1000)
+
+    def export(self, path, wall):
+        results = sorted(self.results, key=lambda result: result["path"])
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": RESULTS_VERSION,
+                "root": self.root,
+                "commit": git_commit(self.root),
+                "finished": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "workers": self.workers,
+                "timeout_s": self.timeout,
+                "wall_s": wall,
+                "results": results,
+            }, f, indent=2)
+
+class SuiteOptionsDialog(QDialog):
+    def __init__(self, settings, parent=None):
+        super().__init__(parent)
+        self.settings = settings
+        self.setWindowTitle("Run All in Folder")
+        layout = QFormLayout(self)
+        self.pattern = QLineEdit(settings.value("suite/pattern", SUITE_PATTERN, type=str))
+        layout.addRow("Scripts matching:", self.pattern)
+        self.workers = QSpinBox()
+        self.workers.setRange(1, 64)
+        self.workers.setValue(settings.value("suite/workers", SUITE_WORKERS, type=int))
+        layout.addRow("Parallel processes:", self.workers)
+        self.timeout = QDoubleSpinBox()
+        self.timeout.setRange(0, 3600)
+        self.timeout.setDecimals(1)
+        self.timeout.setSuffix(" s")
+        self.timeout.setSpecialValueText("No timeout")
+        self.timeout.setValue(settings.value("suite/timeout", SUITE_TIMEOUT_S, type=float))
+        layout.addRow("Timeout per script:", self.timeout)
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+    def options(self):
+        pattern = self.pattern.text().strip() or SUITE_PATTERN
+        self.settings.setValue("suite/pattern", pattern)
+        self.settings.setValue("suite/workers", self.workers.value())
+        self.settings.setValue("suite/timeout", self.timeout.value())
+        return pattern, self.workers.value(), self.timeout.value()
+
+class ResultItem(QTreeWidgetItem):
+    # Numeric columns sort by value, not by their text
+    def __lt__(self, other):
+        column = self.treeWidget().sortColumn() if self.treeWidget() else 0
+        mine = self.data(column, Qt.ItemDataRole.UserRole)
+        theirs = other.data(column, Qt.ItemDataRole.UserRole)
+        if mine is not None or theirs is not None:
+            return (mine if mine is not None else -1) < (theirs if theirs is not None else -1)
+        return self.text(column) < other.text(column)
+
+class SuiteResultsPanel(QWidget):
+    open_script = pyqtSignal(str)
+    COLUMNS = ["Script", "Status", "Wall s", "CPU s", "Peak RSS MB"]
+    STATUS_COLORS = {"passed": "#98c379", "failed": COLORS["error"], "timeout": "#e5c07b",
+                     "error": COLORS["error"], "stopped": COLORS["text_dim"], "skipped": COLORS["text_dim"], "running": COLORS["text_dim"]}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root = None
+        self.run = None
+        self.job = None
+        self.wall = None
+        self.items = {}
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(6, 6, 6, 6)
+        layout.setSpacing(4)
+        header = QHBoxLayout()
+        self.status = QLabel("")
+        self.status.setStyleSheet(f"color: {COLORS['text_dim']}; font-size: 11px;")
+        header.addWidget(self.status)
+        header.addStretch()
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.clicked.connect(self.stop)
+        header.addWidget(self.stop_button)
+        self.export_button = QPushButton("Export JSON...")
+        self.export_button.clicked.connect(self.export)
+        header.addWidget(self.export_button)
+        self.close_button = QPushButton("Close")
+        self.close_button.clicked.connect(self.hide)
+        header.addWidget(self.close_button)
+        layout.addLayout(header)
+        self.results = QTreeWidget()
+        self.results.setColumnCount(len(self.COLUMNS))
+        self.results.setHeaderLabels(self.COLUMNS)
+        self.results.setRootIsDecorated(False)
+        self.results.setUniformRowHeights(True)
+        self.results.setSortingEnabled(True)
+        self.results.header().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.results.itemActivated.connect(self.on_item_activated)
+        layout.addWidget(self.results)
+        self.export_button.setEnabled(False)
+        self.stop_button.setEnabled(False)
+
+    def start(self, root, excludes, pattern, workers, timeout):
+        self.stop()
+        if self.run is not None:
+            # A stopped run still reports its killed processes; it is
+            # ignored from here and dropped once they have all finished
+            if self.run.is_running():
+                self.run.done.connect(self.run.deleteLater)
+            else:
+                self.run.deleteLater()
+            self.run = None
+        self.results.clear()
+        self.items = {}
+        self.root = root
+        self.wall = None
+        self.export_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self.options = (workers, timeout)
+        self.status.setText(f"Looking for {pattern} in {root}...")
+        self.job = ScriptDiscoveryThread(root, excludes, pattern)
+        self.job.found.connect(self.on_found)
+        start_job(self.job, QThread.Priority.LowPriority)
+
+    def on_found(self, paths):
+        if self.sender() is not self.job:
+            return
+        self.job = None
+        if not paths:
+            self.status.setText("No matching scripts")
+            self.stop_button.setEnabled(False)
+            return
+        workers, timeout = self.options
+        self.run = SuiteRun(self.root, paths, workers, timeout, self)
+        self.run.started.connect(self.on_started)
+        self.run.finished.connect(self.on_finished)
+        self.run.done.connect(self.on_done)
+        self.total = len(paths)
+        self.results.setSortingEnabled(False)
+        for path in paths:
+            item = ResultItem([os.path.relpath(path, self.root), "queued", "", "", ""])
+            item.setToolTip(0, path)
+            item.setData(0, Qt.ItemDataRole.UserRole + 1, path)
+            self.items[path] = item
+        self.results.addTopLevelItems(list(self.items.values()))
+        self.results.setSortingEnabled(True)
+        self.run.start()
+        self.update_status()
+
+    def on_started(self, path):
+        if self.sender() is not self.run:
+            return
+        self.set_status(self.items[path], "running")
+
+    def on_finished(self, result):
+        if self.sender() is not self.run:
+            return
+        item = self.items[os.path.join(self.root, result["path"])]
+        self.set_status(item, result["status"])
+        rss = result["peak_rss_kb"]
+        for column, value, text in ((2, result["wall_s"], f"{result['wall_s']:.2f}"),
+                                    (3, result["cpu_s"], f"{result['cpu_s']:.2f}" if result["cpu_s"] is not None else ""),
+                                    (4, rss, f"{rss / 1024:.1f}" if rss is not None else "")):
+            item.setText(column, text)
+            item.setData(column, Qt.ItemDataRole.UserRole, value)
+        if result["output"]:
+            item.setToolTip(1, result["output"][-2000:])
+        self.update_status()
+
+    def set_status(self, item, status):
+        item.setText(1, status)
+        item.setForeground(1, QColor(self.STATUS_COLORS.get(status, COLORS["text_main"])))
+
+    def update_status(self):
+        if self.run is None:
+            return
+        counts = {}
+        for result in self.run.results:
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+        summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+        if self.wall is None:
+            self.status.setText(f"{len(self.run.results)}/{self.total} done ({summary or 'starting'}), "
+                                f"{len(self.run.running)} running")
+        else:
+            self.status.setText(f"{self.total} scripts in {self.wall:.2f}s: {summary}")
+
+    def on_done(self, wall):
+        if self.sender() is not self.run:
+            return
+        self.wall = wall
+        for item in self.items.values():
+            if item.text(1) == "queued":
+                self.set_status(item, "skipped")
+        self.stop_button.setEnabled(False)
+        self.export_button.setEnabled(True)
+        self.update_status()
+
+    def stop(self):
+        if self.job is not None:
+            self.job.requestInterruption()
+            self.job = None
+        if self.run is not None and self.run.is_running():
+            self.run.stop()
+
+    def is_running(self):
+        return self.job is not None or (self.run is not None and self.run.is_running())
+
+    def export(self):
+        if self.run is None or self.wall is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Export Results", os.path.join(self.root, "suite-results.json"),
+                                              "JSON (*.json)")
+        if not path:
+            return
+        try:
+            self.run.export(path, self.wall)
+        except OSError as e:
+            self.status.setText(f"Export failed: {e}")
+            return
+        self.status.setText(f"Exported {len(self.run.results)} results to {path}")
+
+    def on_item_activated(self, item):
+        path = item.data(0, Qt.ItemDataRole.UserRole + 1)
+        if path:
+            self.open_script.emit(path)
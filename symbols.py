@@ -0,0 +1,119 @@
+import re
+from PyQt6.Qsci import QsciScintilla
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+from editor.workers import start_job
+from editor.tracing import traced
+
+FUNC_REGEX = re.compile(r'(?:to|fn)\s+([a-zA-Z_]\w*)')
+VAR_REGEX = re.compile(r'([a-zA-Z_]\w*)\s*=')
+
+def scan_line(text):
+    return tuple(FUNC_REGEX.findall(text) + VAR_REGEX.findall(text))
+
+class SymbolScanThread(QThread):
+    scanned = pyqtSignal(int, object)
+
+    def __init__(self, generation, first_line, data, lines):
+        super().__init__()
+        self.generation = generation
+        self.first_line = first_line
+        self.data = data
+        self.lines = lines
+
+    @traced("scan.background")
+    def run(self):
+        found = dict.fromkeys(self.lines, ())
+        for offset, raw in enumerate(self.data.splitlines()):
+            line = self.first_line + offset
+            if line in found:
+                found[line] = scan_line(raw.decode('utf-8', 'replace'))
+        self.scanned.emit(self.generation, found)
+
+class SymbolIndex(QObject):
+    # Emitted with the full symbol set, only when it differs from the last one
+    changed = pyqtSignal(object)
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        line_count = editor.SendScintilla(QsciScintilla.SCI_GETLINECOUNT)
+        # Definitions per line, and how many lines define each symbol
+        self.line_symbols = [()] * line_count
+        self.counts = {}
+        self.published = set()
+        self.dirty = set(range(line_count))
+        self.generation = 0
+        self.job = None
+        self.rescan_pending = False
+        editor.SCN_MODIFIED.connect(self.on_modified)
+
+    def on_modified(self, position, mod_type, text, length, lines_added, *args):
+        if not mod_type & (QsciScintilla.SC_MOD_INSERTTEXT | QsciScintilla.SC_MOD_DELETETEXT):
+            return
+        self.generation += 1
+        line = self.editor.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, position)
+        if lines_added > 0:
+            self.line_symbols[line + 1:line + 1] = [()] * lines_added
+            self.dirty = {d + lines_added if d > line else d for d in self.dirty}
+            self.dirty.update(range(line, line + lines_added + 1))
+        elif lines_added < 0:
+            removed = -lines_added
+            for symbols in self.line_symbols[line + 1:line + 1 + removed]:
+                self.release(symbols)
+            del self.line_symbols[line + 1:line + 1 + removed]
+            self.dirty = {d - removed if d > line + removed else d
+                          for d in self.dirty if not line < d <= line + removed}
+            self.dirty.add(line)
+        else:
+            self.dirty.add(line)
+
+    def retain(self, symbols):
+        for symbol in symbols:
+            self.counts[symbol] = self.counts.get(symbol, 0) + 1
+
+    def release(self, symbols):
+        for symbol in symbols:
+            count = self.counts[symbol] - 1
+            if count:
+                self.counts[symbol] = count
+            else:
+                del self.counts[symbol]
+
+    def rescan(self):
+        if self.job is not None:
+            self.rescan_pending = True
+            return
+        self.rescan_pending = False
+        if not self.dirty:
+            return
+        send = self.editor.SendScintilla
+        first_line, last_line = min(self.dirty), max(self.dirty)
+        start = send(QsciScintilla.SCI_POSITIONFROMLINE, first_line)
+        end = send(QsciScintilla.SCI_GETLINEENDPOSITION, last_line)
+        data = self.editor.bytes(start, end).data()[:end - start]
+        self.job = SymbolScanThread(self.generation, first_line, data, set(self.dirty))
+        self.job.scanned.connect(self.apply)
+        self.job.finished.connect(self.on_job_finished)
+        start_job(self.job, QThread.Priority.LowPriority)
+
+    def on_job_finished(self):
+        self.job = None
+        # Lines edited while the scan ran are still dirty
+        if self.rescan_pending:
+            self.rescan()
+
+    def apply(self, generation, found):
+        if generation != self.generation:
+            return
+        for line, symbols in found.items():
+            if self.line_symbols[line] != symbols:
+                self.release(self.line_symbols[line])
+                self.retain(symbols)
+                self.line_symbols[line] = symbols
+            self.dirty.discard(line)
+        self.publish()
+
+    def publish(self):
+        if self.published.symmetric_difference(self.counts.keys()):
+            self.published = set(self.counts)
+            self.changed.emit(set(self.published))
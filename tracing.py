@@ -0,0 +1,165 @@
+import os
+import sys
+import json
+import time
+import threading
+import traceback
+from collections import deque
+from functools import wraps
+from PyQt6.QtCore import QCoreApplication, QObject, QTimer, pyqtSignal
+
+# Spans kept for export; the oldest drop off first
+TRACE_MAX_EVENTS = 200000
+EXPORT_MINUTES = 5
+HEARTBEAT_MS = 100
+# The GUI thread not getting back to the event loop for this long is a stall
+STALL_THRESHOLD_MS = 250
+LATENCY_REPORT_MS = 1000
+
+class Tracer:
+    # Completed spans as (name, start ns, duration ns, thread id, args). Appending
+    # to a deque is atomic, so worker threads record without a lock.
+    def __init__(self, max_events=TRACE_MAX_EVENTS):
+        self.events = deque(maxlen=max_events)
+        self.thread_names = {}
+        self.main_ident = threading.main_thread().ident
+
+    def now(self):
+        return time.perf_counter_ns()
+
+    def complete(self, name, start, end=None, **args):
+        if end is None:
+            end = time.perf_counter_ns()
+        ident = threading.get_ident()
+        if ident not in self.thread_names:
+            self.thread_names[ident] = "GUI" if ident == self.main_ident else threading.current_thread().name
+        self.events.append((name, start, end - start, ident, args or None))
+
+    def span(self, name, **args):
+        return Span(self, name, args)
+
+    def chrome_events(self, minutes=EXPORT_MINUTES):
+        cutoff = time.perf_counter_ns() - int(minutes * 60e9)
+        pid = os.getpid()
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "ShellDesk"}}]
+        for ident, name in list(self.thread_names.items()):
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": ident, "args": {"name": name}})
+        for name, start, duration, ident, args in list(self.events):
+            if start + duration < cutoff:
+                continue
+            event = {"name": name, "cat": name.split(".")[0], "ph": "X", "pid": pid, "tid": ident,
+                     "ts": start / 1000, "dur": duration / 1000}
+            if args:
+                event["args"] = args
+            events.append(event)
+        return events
+
+    def export(self, path, minutes=EXPORT_MINUTES):
+        # Chrome trace-event format; opens in Perfetto and chrome://tracing
+        events = self.chrome_events(minutes)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+        return len(events)
+
+class Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.complete(self.name, self.start, **self.args)
+        return False
+
+_tracer = None
+
+def tracer():
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+def traced(name):
+    # Records every call of the decorated function as a span
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracer().complete(name, start)
+        return wrapper
+    return decorate
+
+class StallWatchdog(QObject):
+    # A GUI timer beats every HEARTBEAT_MS; a plain Python thread watches the
+    # beats and, when they stop, samples the GUI thread's stack while it is
+    # still stuck. The late beat that ends the stall records it as a span.
+    latency = pyqtSignal(float)  # worst event-loop delay over the last report, ms
+    stalled = pyqtSignal(float, str)  # stall length in ms, GUI stack when it was caught
+
+    def __init__(self, threshold_ms=STALL_THRESHOLD_MS, parent=None):
+        super().__init__(parent)
+        self.threshold_ms = threshold_ms
+        self.last_beat = time.perf_counter_ns()
+        self.last_report = self.last_beat
+        self.worst = 0.0
+        self.stall_stack = None
+        self.stop_event = threading.Event()
+        self.timer = QTimer(self)
+        self.timer.setInterval(HEARTBEAT_MS)
+        self.timer.timeout.connect(self.beat)
+        self.thread = threading.Thread(target=self.watch, name="stall-watchdog", daemon=True)
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.stop)
+
+    def start(self):
+        self.last_beat = time.perf_counter_ns()
+        self.timer.start()
+        self.thread.start()
+
+    def stop(self):
+        self.timer.stop()
+        self.stop_event.set()
+
+    def beat(self):
+        now = time.perf_counter_ns()
+        # When this beat was due; anything past it is event-loop delay
+        due = self.last_beat + HEARTBEAT_MS * 1000000
+        delay = max(0.0, (now - due) / 1e6)
+        self.last_beat = now
+        self.worst = max(self.worst, delay)
+        stack = self.stall_stack
+        if stack is not None:
+            self.stall_stack = None
+            tracer().complete("stall", due, now, stack=stack)
+            self.stalled.emit(delay, stack)
+        if (now - self.last_report) / 1e6 >= LATENCY_REPORT_MS:
+            self.latency.emit(self.worst)
+            self.worst = 0.0
+            self.last_report = now
+
+    def watch(self):
+        main_ident = threading.main_thread().ident
+        while not self.stop_event.wait(HEARTBEAT_MS / 1000):
+            beat = self.last_beat
+            waited = (time.perf_counter_ns() - beat) / 1e6
+            if waited < HEARTBEAT_MS + self.threshold_ms or self.stall_stack is not None:
+                continue
+            frame = sys._current_frames().get(main_ident)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+            if self.last_beat != beat:
+                # The GUI thread got back to the event loop meanwhile
+                continue
+            self.stall_stack = stack
+            # Also on stderr, in case the stall never ends
+            sys.stderr.write(f"ShellDesk: GUI thread stalled for {waited:.0f} ms at:\n{stack}")
+            sys.stderr.flush()
@@ -0,0 +1,177 @@
+import os
+import difflib
+import hashlib
+from PyQt6.QtCore import QObject, QThread, QTimer, QFileSystemWatcher, pyqtSignal
+from editor.tracing import traced
+from editor.workers import start_job
+
+# Change events are collected this long before one pass checks them all, so
+# a branch switch touching hundreds of files is a single pass
+CHANGE_SETTLE_MS = 200
+
+def split_lines(text):
+    # Lines as Scintilla counts them; str.splitlines also breaks on form
+    # feeds and other separators the editor keeps inside a line
+    lines = text.split("\n")
+    last = lines.pop()
+    lines = [line + "\n" for line in lines]
+    if last:
+        lines.append(last)
+    return lines
+
+def line_edits(old, new):
+    # (first line, end line, replacement text) turning old into new, last
+    # first so applying one never moves the lines of the next
+    a = split_lines(old)
+    b = split_lines(new)
+    matcher = difflib.SequenceMatcher(None, a, b)
+    edits = [(i1, i2, "".join(b[j1:j2]))
+             for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"]
+    edits.reverse()
+    return edits
+
+def decode_text(data):
+    # What the loader's text-mode read gives for the same bytes
+    text = data.decode("utf-8", "replace")
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+class ChangeCheckThread(QThread):
+    # requests: (path, (hash, mtime_ns, size) last seen or None, buffer text
+    # to diff against or None, edit count of that text)
+    # results: (path, stamp or None when gone, hash, new text or None when
+    # the content is unchanged, line edits or None, edit count)
+    checked = pyqtSignal(object)
+
+    def __init__(self, requests):
+        super().__init__()
+        self.requests = requests
+
+    @traced("reload.check")
+    def run(self):
+        results = []
+        for path, known, buffer, edit_count in self.requests:
+            if self.isInterruptionRequested():
+                return
+            try:
+                st = os.stat(path)
+                stamp = (st.st_mtime_ns, st.st_size)
+                if known is not None and known[1:] == stamp:
+                    continue
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                results.append((path, None, None, None, None, edit_count))
+                continue
+            digest = hashlib.sha1(data).hexdigest()
+            if known is not None and known[0] == digest:
+                # Touched, or rewritten with the same bytes
+                results.append((path, stamp, digest, None, None, edit_count))
+                continue
+            text = decode_text(data)
+            edits = None
+            if buffer is not None:
+                edits = line_edits(buffer, text) if buffer != text else []
+            results.append((path, stamp, digest, text, edits, edit_count))
+        self.checked.emit(results)
+
+class ExternalChangeWatcher(QObject):
+    # Watches the open files and their folders; the folder is what still
+    # reports a file replaced by rename or deleted and written again, which
+    # drops the watch on the file itself. Every event only marks the path
+    # pending; `due` fires once the burst has settled, and the owner answers
+    # with check() so only one background pass runs at a time.
+    due = pyqtSignal(object)  # set of paths
+    checked = pyqtSignal(object)  # ChangeCheckThread results
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.on_file_changed)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.folders = {}
+        self.known = {}
+        self.pending = set()
+        self.job = None
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(CHANGE_SETTLE_MS)
+        self.timer.timeout.connect(self.flush)
+
+    def watch(self, path, known=None):
+        folder = os.path.dirname(os.path.abspath(path))
+        paths = self.folders.setdefault(folder, set())
+        if not paths:
+            self.watcher.addPath(folder)
+        paths.add(path)
+        self.watcher.addPath(path)
+        if known is not None:
+            self.known[path] = known
+
+    def unwatch(self, path):
+        folder = os.path.dirname(os.path.abspath(path))
+        paths = self.folders.get(folder)
+        if paths is None or path not in paths:
+            return
+        paths.discard(path)
+        self.watcher.removePath(path)
+        if not paths:
+            del self.folders[folder]
+            self.watcher.removePath(folder)
+        self.known.pop(path, None)
+        self.pending.discard(path)
+
+    def note_written(self, path, known):
+        # Our own save; the events it raises then compare equal and are ignored
+        if known is not None:
+            self.known[path] = known
+
+    def on_file_changed(self, path):
+        self.mark(path)
+
+    def on_directory_changed(self, folder):
+        for path in self.folders.get(folder, ()):
+            self.mark(path)
+
+    def mark(self, path):
+        self.pending.add(path)
+        self.timer.start()
+
+    def flush(self):
+        if self.job is not None or not self.pending:
+            # Picked up again when the running pass finishes
+            return
+        paths = self.pending
+        self.pending = set()
+        self.due.emit(paths)
+
+    def check(self, requests):
+        requests = [(path, self.known.get(path), buffer, edit_count)
+                    for path, buffer, edit_count in requests]
+        if not requests:
+            return
+        self.job = ChangeCheckThread(requests)
+        self.job.checked.connect(self.on_checked)
+        self.job.finished.connect(self.on_job_finished)
+        start_job(self.job, QThread.Priority.LowPriority)
+
+    def postpone(self, path):
+        # Checked again on the next pass, e.g. once a save in flight is done
+        # or against the text typed while this one ran
+        self.known.pop(path, None)
+        self.mark(path)
+
+    def on_checked(self, results):
+        for path, stamp, digest, text, edits, edit_count in results:
+            if stamp is None:
+                self.known.pop(path, None)
+                continue
+            self.known[path] = (digest,) + stamp
+            if path in self.folders.get(os.path.dirname(os.path.abspath(path)), ()) and path not in self.watcher.files():
+                # Replaced by rename; the new file needs a watch of its own
+                self.watcher.addPath(path)
+        self.checked.emit(results)
+
+    def on_job_finished(self):
+        self.job = None
+        if self.pending:
+            self.timer.start()
@@ -0,0 +1,22 @@
+from PyQt6.QtCore import QCoreApplication, QThread
+
+# Worker threads stay referenced here until they finish, so closing the
+# editor that started one never destroys a QThread that is still running.
+running_jobs = set()
+_quit_hooked = False
+
+def start_job(job, priority=QThread.Priority.InheritPriority):
+    global _quit_hooked
+    app = QCoreApplication.instance()
+    if app is not None and not _quit_hooked:
+        app.aboutToQuit.connect(wait_for_jobs)
+        _quit_hooked = True
+    running_jobs.add(job)
+    job.finished.connect(lambda: running_jobs.discard(job))
+    job.start(priority)
+    return job
+
+def wait_for_jobs():
+    for job in list(running_jobs):
+        job.requestInterruption()
+        job.wait()
@@ -0,0 +1,164 @@
+import os
+import json
+import bisect
+import hashlib
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+from editor.workers import start_job
+from editor.completion import COMPLETION_LIMIT
+
+SCRIPT_EXTENSIONS = (".shl", ".oka")
+SKIP_DIRS = {".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv"}
+CACHE_VERSION = 1
+# Below this many changed files the pool costs more than it saves
+POOL_MIN_FILES = 8
+
+def index_file(path):
+    # Runs in a pool process: [(name, line), ...] for one script
+    from editor.symbols import scan_line
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return path, []
+    symbols = []
+    for line, text in enumerate(data.decode('utf-8', 'replace').splitlines()):
+        for name in scan_line(text):
+            symbols.append((name, line))
+    return path, symbols
+
+def walk_scripts(root):
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names[:] = [d for d in dir_names if d not in SKIP_DIRS and not d.startswith('.')]
+        for name in file_names:
+            if name.endswith(SCRIPT_EXTENSIONS):
+                yield os.path.join(dir_path, name)
+
+def cache_path(root):
+    from editor.completion import cache_dir
+    digest = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir(), f"workspace-{digest}.json")
+
+def load_cache(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache.get("files", {})
+
+def save_cache(path, root, files):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": CACHE_VERSION, "root": root, "files": files}, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+class WorkspaceIndexThread(QThread):
+    indexed = pyqtSignal(str, object, int)  # root, files, number reindexed
+
+    def __init__(self, root, max_workers=None):
+        super().__init__()
+        self.root = root
+        self.max_workers = max_workers
+
+    def run(self):
+        cached = load_cache(cache_path(self.root))
+        files = {}
+        stale = []
+        for path in walk_scripts(self.root):
+            if self.isInterruptionRequested():
+                return
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entry = cached.get(path)
+            if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                files[path] = entry
+            else:
+                files[path] = [st.st_mtime_ns, st.st_size, []]
+                stale.append(path)
+        if len(stale) < POOL_MIN_FILES:
+            results = map(index_file, stale)
+            self.collect(files, results)
+        else:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # Spawned, not forked: forking a process that runs Qt threads is unsafe
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context) as pool:
+                results = pool.map(index_file, stale, chunksize=max(1, len(stale) // 64))
+                if not self.collect(files, results):
+                    pool.shutdown(cancel_futures=True)
+                    return
+        if self.isInterruptionRequested():
+            return
+        if stale or len(files) != len(cached):
+            save_cache(cache_path(self.root), self.root, files)
+        self.indexed.emit(self.root, files, len(stale))
+
+    def collect(self, files, results):
+        for path, symbols in results:
+            if self.isInterruptionRequested():
+                return False
+            files[path][2] = symbols
+        return True
+
+class WorkspaceIndex(QObject):
+    ready = pyqtSignal(int, int)  # files indexed, files reindexed
+
+    def __init__(self):
+        super().__init__()
+        self.root = None
+        self.job = None
+        self.definitions = {}
+        self.names = []
+        self.lowered = []
+        # Bumped whenever the names change, for caches built on them
+        self.generation = 0
+
+    def open(self, root):
+        if self.job is not None:
+            self.job.requestInterruption()
+        self.root = root
+        self.job = WorkspaceIndexThread(root)
+        self.job.indexed.connect(self.on_indexed)
+        start_job(self.job, QThread.Priority.LowPriority)
+
+    def on_indexed(self, root, files, reindexed):
+        if root != self.root:
+            return
+        self.job = None
+        definitions = {}
+        for path, (mtime, size, symbols) in files.items():
+            for name, line in symbols:
+                definitions.setdefault(name, []).append((path, line))
+        self.definitions = definitions
+        # Sorted case-folded names, so a prefix lookup is two bisections
+        pairs = sorted((name.lower(), name) for name in definitions)
+        self.lowered = [low for low, _ in pairs]
+        self.names = [name for _, name in pairs]
+        self.generation += 1
+        self.ready.emit(len(files), reindexed)
+
+    def complete(self, prefix, limit=COMPLETION_LIMIT):
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self.lowered, prefix)
+        end = bisect.bisect_left(self.lowered, prefix + "\uffff", start)
+        return self.names[start:min(end, start + limit)]
+
+    def find_definition(self, name):
+        return self.definitions.get(name, [])
+
+_shared_index = None
+
+def shared_index():
+    global _shared_index
+    if _shared_index is None:
+        _shared_index = WorkspaceIndex()
+    return _shared_index